@@ -1,56 +1,38 @@
 import streamlit as st
-from streamlit_gsheets import GSheetsConnection
 import pandas as pd
 
+from core import assets, prefetch, tokens, warmup
+from core.quota import SIGNUP
+from core.sheets import connect
+from core.users import load_users_index, read_users, user_password, write_users
+
 # --- GLOBAL CONFIG ---
 st.set_page_config(page_title="Prime Ivy Portal", layout="wide")
 
-URL = "https://docs.google.com/spreadsheets/d/1XLiSWYDUagXCsNbLKs_HE-BsaQzgFMw-M8FMU500f0M/edit?usp=sharing"
+# Preload exam banks, answer keys and the users index once per process
+# (no-op when tools/serve.py already did it at boot).
+warmup.start_in_background()
 
 # --- AUTH STATE INIT ---
 if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
 if "user_name" not in st.session_state:
     st.session_state.user_name = ""
-
-# --- SHEETS HELPERS ---
-def read_users(conn) -> pd.DataFrame:
-    df = conn.read(spreadsheet=URL, worksheet="Users", ttl=0)
-    if df is None or df.empty:
-        return pd.DataFrame(columns=["Username", "Password"])
-
-    # normalize colnames
-    col_map = {c.strip().lower(): c for c in df.columns}
-    ucol = col_map.get("username")
-    pcol = col_map.get("password")
-
-    if not ucol or not pcol:
-        # force expected shape so error messages are clearer
-        return pd.DataFrame(columns=["Username", "Password"])
-
-    # rename to canonical
-    df = df.rename(columns={ucol: "Username", pcol: "Password"})
-
-    # drop blank rows
-    df = df.dropna(subset=["Username", "Password"])
-    df["Username"] = df["Username"].astype(str)
-    df["Password"] = df["Password"].astype(str)
-    return df
-
-
-def write_users(conn, users_df: pd.DataFrame):
-    # MUST write back full sheet
-    conn.update(spreadsheet=URL, worksheet="Users", data=users_df)
+tokens.restore()  # a refresh or reconnect with a valid session token skips the login form
 
 
 def login_page():
     _, center, _ = st.columns([1, 1.5, 1])
     with center:
         st.image(
-            "https://github.com/primeivy/SAT/blob/main/assets/images/College%20Counseling%20&%20Academic%20Mentorship.png?raw=true",
+            assets.resolve(
+                "https://github.com/primeivy/SAT/blob/main/assets/images/College%20Counseling%20&%20Academic%20Mentorship.png?raw=true"
+            ),
             width=200,
         )
         st.title("Prime Ivy Portal")
+        if not warmup.is_ready():
+            st.caption("⏳ Preparing exams… logging in may take a few extra seconds.")
 
         tab1, tab2 = st.tabs(["Log In", "Create Account"])
 
@@ -67,28 +49,18 @@ def login_page():
                     return
 
                 try:
-                    conn = st.connection("gsheets", type=GSheetsConnection)
-                    users_df = read_users(conn)
-
-                    if users_df.empty:
-                        st.error("User database is empty. Please create an account.")
-                        return
-
-                    # normalize for matching
-                    users_df["Username_norm"] = users_df["Username"].astype(str).str.strip().str.lower()
-                    users_df["Password_norm"] = users_df["Password"].astype(str).str.strip()
-
                     user_input = str(user).strip().lower()
                     pw_input = str(pw).strip()
 
-                    match = users_df[
-                        (users_df["Username_norm"] == user_input) &
-                        (users_df["Password_norm"] == pw_input)
-                    ]
+                    # an unknown name may be a signup on another worker; user_password re-reads (rate-limited)
+                    stored_pw = user_password(user_input)
+                    if stored_pw is None and not load_users_index():
+                        st.error("User database is empty. Please create an account.")
+                        return
 
-                    if not match.empty:
-                        st.session_state.authenticated = True
-                        st.session_state.user_name = user_input
+                    if stored_pw == pw_input:
+                        tokens.login(user_input)
+                        st.session_state._prefetch = prefetch.submit(user_input)
                         st.switch_page("pages/dashboard.py")
                     else:
                         st.error("Invalid username or password.")
@@ -113,7 +85,7 @@ def login_page():
                     return
 
                 try:
-                    conn = st.connection("gsheets", type=GSheetsConnection)
+                    conn = connect(SIGNUP)
                     users_df = read_users(conn)
 
                     # if sheet is missing required columns
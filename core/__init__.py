@@ -0,0 +1 @@
+"""Shared helpers for the Prime Ivy portal pages."""
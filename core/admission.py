@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# A class clicking "Start Exam" together would otherwise load banks, start
+# timer fragments and render first questions all at once. New attempts wait
+# here until two budgets allow them in:
+#   concurrency - admitted students still starting up (admitted, first
+#                 question not rendered yet) at any one time;
+#   rate        - admissions per second, as a token bucket with a burst.
+# Budgets are per worker process, since each worker's CPU is what a surge
+# exhausts. Nobody's module timer starts before they are admitted.
+CONCURRENCY_ENV = "SAT_ADMIT_CONCURRENCY"
+RATE_ENV = "SAT_ADMIT_RATE"
+BURST_ENV = "SAT_ADMIT_BURST"
+START_LEASE_SEC = 30.0  # an admitted start that never reports back frees its slot after this
+WAITER_TIMEOUT_SEC = 15.0  # a waiter that stops polling (closed tab) leaves the queue
+
+
+class AdmissionController:
+    """FIFO waiting room in front of exam starts."""
+
+    def __init__(self, concurrency: int = 20, rate_per_sec: float = 5.0, burst: int = 10):
+        self.concurrency = max(1, concurrency)
+        self.rate = max(0.01, rate_per_sec)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._waiting: OrderedDict[str, float] = OrderedDict()  # ticket -> last poll
+        self._starting: dict[str, float] = {}  # ticket -> admitted at
+        self._start_sec = 2.0  # moving average of admit -> first render
+        self._lock = threading.Lock()
+
+    def poll(self, ticket: str) -> tuple[bool, int, float]:
+        """(admitted, position in queue, ETA seconds); joins the queue on first call."""
+        now = time.monotonic()
+        with self._lock:
+            if ticket in self._starting:
+                return True, 0, 0.0
+            self._waiting[ticket] = now
+            self._advance(now)
+            if ticket in self._starting:
+                return True, 0, 0.0
+            position = list(self._waiting).index(ticket) + 1
+            return False, position, self._eta(position)
+
+    def release(self, ticket: str):
+        """The admitted student's first question is on screen; free the start slot."""
+        with self._lock:
+            admitted_at = self._starting.pop(ticket, None)
+            if admitted_at is not None:
+                self._start_sec = 0.8 * self._start_sec + 0.2 * (time.monotonic() - admitted_at)
+
+    def leave(self, ticket: str):
+        with self._lock:
+            self._waiting.pop(ticket, None)
+            self._starting.pop(ticket, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"waiting": len(self._waiting), "starting": len(self._starting),
+                    "tokens": round(self._tokens, 2), "start_sec": round(self._start_sec, 2)}
+
+    def _advance(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        for ticket, admitted_at in list(self._starting.items()):
+            if now - admitted_at > START_LEASE_SEC:
+                del self._starting[ticket]
+        for ticket, seen in list(self._waiting.items()):
+            if now - seen > WAITER_TIMEOUT_SEC:
+                del self._waiting[ticket]
+        while self._waiting and self._tokens >= 1 and len(self._starting) < self.concurrency:
+            ticket, _ = self._waiting.popitem(last=False)
+            self._starting[ticket] = now
+            self._tokens -= 1
+
+    def _eta(self, position: int) -> float:
+        by_rate = (position - min(self._tokens, position)) / self.rate
+        by_slots = position / self.concurrency * self._start_sec
+        return max(by_rate, by_slots)
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def controller() -> AdmissionController:
+    """The process-wide controller, configured from the environment."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(
+                concurrency=int(os.environ.get(CONCURRENCY_ENV, "20")),
+                rate_per_sec=float(os.environ.get(RATE_ENV, "5")),
+                burst=int(os.environ.get(BURST_ENV, "10")),
+            )
+        return _controller
@@ -0,0 +1,216 @@
+import dataclasses
+import hashlib
+import json
+import random
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from core import state_store
+from core.bank import Bank, get_bank
+from core.catalog import ExamEntry, get_entry, load_catalog
+from core.index import FORM_PREFIX, drill_label
+from core.questions import MODULE_MAPPING, MODULE_MINUTES
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Expected time for an item no student has answered yet.
+DEFAULT_ITEM_SEC = 60.0
+
+
+class AssemblyError(ValueError):
+    """The bank cannot satisfy a blueprint (too few unused items, or over the time budget)."""
+
+
+@dataclass
+class ModuleBlueprint:
+    """What one module must contain."""
+
+    counts: dict[tuple[str, str], int]  # (Domain, Difficulty) -> number of items
+    time_budget_sec: float | None = None  # expected total answering time must fit in this
+    filters: dict = field(default_factory=dict)  # extra index filters for the pool
+
+    @property
+    def size(self) -> int:
+        return sum(self.counts.values())
+
+
+@dataclass
+class History:
+    """What past attempts tell the assembler about a bank."""
+
+    item_sec: dict[int, float]  # median seconds per bank row
+    seen: dict[str, set[int]]  # bank rows each student has already been given
+    default_sec: float = DEFAULT_ITEM_SEC
+
+    def expected_sec(self, row: int) -> float:
+        return self.item_sec.get(row, self.default_sec)
+
+
+# ---------------------------
+# BLUEPRINTS
+# ---------------------------
+def blueprint_from_forms(bank: Bank, forms: dict[int, str] = MODULE_MAPPING) -> dict[int, ModuleBlueprint]:
+    """Blueprint that mirrors existing forms: same domain x difficulty counts, same timing."""
+    blueprint = {}
+    for module_step, label in forms.items():
+        df_form = bank.form(label)
+        if not {"Domain", "Difficulty"} <= set(df_form.columns):
+            raise AssemblyError("the bank needs Domain and Difficulty columns to assemble forms")
+        cells = df_form.groupby(["Domain", "Difficulty"]).size()
+        blueprint[module_step] = ModuleBlueprint(
+            counts={(str(d), str(diff)): int(n) for (d, diff), n in cells.items()},
+            time_budget_sec=MODULE_MINUTES.get(module_step, 32) * 60,
+        )
+    return blueprint
+
+
+def load_blueprint(path: str) -> dict[int, ModuleBlueprint]:
+    """Read a blueprint JSON file:
+
+        {"modules": {"1": {"counts": [{"domain": "Algebra", "difficulty": "Hard", "count": 4}, ...],
+                           "time_budget_min": 32, "filters": {"Question_Type": "MCQ"}}}}
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    blueprint = {}
+    for step, module in data.get("modules", {}).items():
+        budget = module.get("time_budget_min")
+        blueprint[int(step)] = ModuleBlueprint(
+            counts={(c["domain"], c["difficulty"]): int(c["count"]) for c in module.get("counts", [])},
+            time_budget_sec=float(budget) * 60 if budget else None,
+            filters=module.get("filters") or {},
+        )
+    return blueprint
+
+
+# ---------------------------
+# HISTORY
+# ---------------------------
+def collect_history(entry: ExamEntry, bank: Bank, attempts=None) -> History:
+    """Median item times and per-student exposure from stored attempts on this bank.
+
+    Forms already published to a student count as seen even before they
+    are started.
+    """
+    samples = defaultdict(list)
+    seen = defaultdict(set)
+    for user, _, state, _ in attempts if attempts is not None else state_store.iter_attempts():
+        exam_id = state.get("selected_exam")
+        if not exam_id or get_entry(exam_id).source != entry.source:
+            continue
+        times = state.get("question_times", {})
+        forms = state.get("module_forms") or get_entry(exam_id).forms or MODULE_MAPPING
+        for module_step, label in forms.items():
+            rows = bank.form_rows(label)
+            seen[user].update(rows)
+            for (m, q), sec in times.items():
+                if m == module_step and q < len(rows) and sec > 0:
+                    samples[rows[q]].append(sec)
+
+    for other in load_catalog().values():
+        if other.source == entry.source and other.students and other.forms:
+            rows = {r for label in other.forms.values() for r in bank.form_rows(label)}
+            for student in other.students:
+                seen[student].update(rows)
+
+    item_sec = {row: statistics.median(secs) for row, secs in samples.items()}
+    default_sec = statistics.median(item_sec.values()) if item_sec else DEFAULT_ITEM_SEC
+    return History(item_sec=item_sec, seen=dict(seen), default_sec=default_sec)
+
+
+# ---------------------------
+# ASSEMBLY
+# ---------------------------
+def assemble_module(bank: Bank, blueprint: ModuleBlueprint, history: History,
+                    exclude: set[int], rng: random.Random) -> list[int]:
+    """Bank rows for one module, in bank order.
+
+    Each (domain, difficulty) cell is filled at random from its unused pool;
+    then, while the expected time is over budget, the single swap inside a
+    cell that saves the most time is applied.
+    """
+    chosen, spare = {}, {}
+    for cell, n in blueprint.counts.items():
+        domain, difficulty = cell
+        pool = bank.index.search({**blueprint.filters, "Domain": domain, "Difficulty": difficulty}, exclude=exclude)
+        if len(pool) < n:
+            raise AssemblyError(f"{domain} / {difficulty}: need {n}, only {len(pool)} unused")
+        rng.shuffle(pool)
+        chosen[cell], spare[cell] = pool[:n], pool[n:]
+
+    if blueprint.time_budget_sec is not None:
+        t = history.expected_sec
+        total = sum(t(r) for rows in chosen.values() for r in rows)
+        while total > blueprint.time_budget_sec:
+            best = None
+            for cell, rows in chosen.items():
+                if not rows or not spare[cell]:
+                    continue
+                slow = max(rows, key=t)
+                fast = min(spare[cell], key=t)
+                gain = t(slow) - t(fast)
+                if gain > 0 and (best is None or gain > best[0]):
+                    best = (gain, cell, slow, fast)
+            if best is None:
+                raise AssemblyError(
+                    f"expected {total / 60:.1f} min, budget {blueprint.time_budget_sec / 60:.1f} min"
+                )
+            gain, cell, slow, fast = best
+            chosen[cell].remove(slow)
+            chosen[cell].append(fast)
+            spare[cell].remove(fast)
+            spare[cell].append(slow)
+            total -= gain
+
+    return sorted(r for rows in chosen.values() for r in rows)
+
+
+def assemble_exam(bank: Bank, blueprint: dict[int, ModuleBlueprint], history: History,
+                  student: str | None = None, seed=None) -> dict[int, str]:
+    """{module_step: form label} with no item the student has seen and no item twice."""
+    rng = random.Random(seed)
+    exclude = set(history.seen.get(student, ())) if student else set()
+    forms = {}
+    for module_step in sorted(blueprint):
+        rows = assemble_module(bank, blueprint[module_step], history, exclude, rng)
+        exclude.update(rows)
+        forms[module_step] = drill_label(bank.row_hashes[rows], FORM_PREFIX)
+    return forms
+
+
+def assemble_for_students(entry: ExamEntry, students: list[str], blueprint: dict[int, ModuleBlueprint] | None = None,
+                          seed: int = 0, history: History | None = None) -> tuple[list[ExamEntry], dict[str, str]]:
+    """One new catalog entry per student, built from ``entry``'s bank.
+
+    Returns (entries, errors by student). Nothing is published here; pass
+    the entries to ``core.catalog.publish``.
+    """
+    bank = get_bank(entry.id)
+    blueprint = blueprint or blueprint_from_forms(bank, entry.forms or MODULE_MAPPING)
+    history = history or collect_history(entry, bank)
+
+    entries, errors = [], {}
+    for student in students:
+        student = str(student).strip().lower()
+        try:
+            forms = assemble_exam(bank, blueprint, history, student, seed=f"{seed}:{student}")
+        except AssemblyError as e:
+            errors[student] = str(e)
+            continue
+        digest = hashlib.blake2b(json.dumps(forms, sort_keys=True).encode(), digest_size=4).hexdigest()
+        entries.append(
+            dataclasses.replace(
+                entry,
+                id=f"{entry.id}-{student}-{digest}",
+                title=f"{entry.title} • Form {digest[:4].upper()}",
+                tags=tuple(entry.tags) + ("Assembled",),
+                routing={},
+                forms=forms,
+                students=(student,),
+            )
+        )
+        # later students in this batch are independent; this one must not get these items again
+        history.seen.setdefault(student, set()).update(r for label in forms.values() for r in bank.form_rows(label))
+    return entries, errors
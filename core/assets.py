@@ -0,0 +1,64 @@
+import functools
+import json
+import os
+from urllib.parse import unquote, urlsplit
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# `python -m tools.build_assets` turns assets/images/ into right-sized,
+# content-hashed WebP + PNG/JPEG variants under assets/build/ and writes
+# manifest.json: {source file name: {"width", "height", "webp": [1x, 2x],
+# "fallback": [1x, 2x]}}. Question images that point at assets/images/
+# (GitHub blob/raw links or plain paths) are served from the build instead.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(ROOT, "assets", "images")
+BUILD_DIR = os.path.join(ROOT, "assets", "build")
+MANIFEST_PATH = os.path.join(BUILD_DIR, "manifest.json")
+ASSET_BASE_ENV = "SAT_ASSET_BASE_URL"  # where assets/build/ is served from
+DEFAULT_ASSET_BASE = "https://raw.githubusercontent.com/primeivy/SAT/main/assets/build"
+SOURCE_MARKER = "/assets/images/"
+RENDER_MAX_HEIGHT = 350  # CSS px; matches `.sat-image` in pages/exam.py
+
+
+@functools.lru_cache(maxsize=1)
+def load_manifest() -> dict[str, dict]:
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def source_name(url: str) -> str | None:
+    """File name under assets/images/ that ``url`` points at, if any."""
+    path = unquote(urlsplit(url).path if "://" in url else url.split("?")[0])
+    path = "/" + path.replace("\\", "/").lstrip("/")
+    if SOURCE_MARKER not in path:
+        return None
+    return path.split(SOURCE_MARKER, 1)[1]
+
+
+def variants(url: str | None) -> dict | None:
+    """{"src", "srcset", "webp_srcset", "width", "height"} for a built asset, else None."""
+    if not url:
+        return None
+    name = source_name(url)
+    entry = load_manifest().get(name) if name else None
+    if entry is None:
+        return None
+    base = os.environ.get(ASSET_BASE_ENV, DEFAULT_ASSET_BASE).rstrip("/")
+    webp = [f"{base}/{f}" for f in entry["webp"]]
+    fallback = [f"{base}/{f}" for f in entry["fallback"]]
+    return {
+        "src": fallback[0],
+        "srcset": ", ".join(f"{u} {i + 1}x" for i, u in enumerate(fallback)),
+        "webp_srcset": ", ".join(f"{u} {i + 1}x" for i, u in enumerate(webp)),
+        "width": entry["width"],
+        "height": entry["height"],
+    }
+
+
+def resolve(url: str | None) -> str | None:
+    """The built 1x fallback for an assets/images/ URL; any other URL unchanged."""
+    found = variants(url)
+    return found["src"] if found else url
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Everything workers share (engine state, proctor board, attempt history,
+# session revocations, bank snapshots) lives in one backend:
+#   sqlite:///path/to/state.sqlite3  (default; shared by processes on one host)
+#   redis://host:6379/0              (shared across hosts; needs `redis`)
+#   memory                           (this process only)
+# Each store module defines a Memory/SQLite/Redis class with the same
+# interface and exposes the configured one through a PerBackend getter.
+STATE_BACKEND_ENV = "SAT_STATE_BACKEND"
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".state", "state.sqlite3")
+
+
+def backend() -> tuple[str, str]:
+    """("memory", ""), ("redis", url) or ("sqlite", path) from ``SAT_STATE_BACKEND``."""
+    spec = os.environ.get(STATE_BACKEND_ENV, "").strip()
+    if spec == "memory":
+        return "memory", ""
+    if spec.startswith(("redis://", "rediss://")):
+        return "redis", spec
+    return "sqlite", spec[len("sqlite:///"):] if spec.startswith("sqlite:///") else DEFAULT_SQLITE_PATH
+
+
+class SQLiteBackend:
+    """Base of the SQLite stores: one WAL-mode connection per thread on the shared file.
+
+    Subclasses list their CREATE statements in ``SCHEMA``.
+    """
+
+    SCHEMA: tuple[str, ...] = ()
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction on this thread's connection, taken up front (no upgrade deadlocks)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class RedisBackend:
+    """Base of the Redis stores: a client for the configured URL."""
+
+    def __init__(self, url: str, client=None):
+        import redis  # optional dependency, only needed for this backend
+
+        self.r = client if client is not None else redis.Redis.from_url(url)
+        self.WatchError = redis.WatchError
+
+
+class PerBackend:
+    """Process-wide store: the memory, sqlite or redis class for ``SAT_STATE_BACKEND``, built on first call."""
+
+    def __init__(self, memory, sqlite, redis):
+        self.classes = {"memory": memory, "sqlite": sqlite, "redis": redis}
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if self._instance is None:
+                kind, arg = backend()
+                cls = self.classes[kind]
+                self._instance = cls() if kind == "memory" else cls(arg)
+            return self._instance
+
+    def reset(self, instance=None):
+        """Use ``instance`` from now on (or rebuild from the environment on the next call)."""
+        with self._lock:
+            self._instance = instance
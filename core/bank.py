@@ -0,0 +1,358 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.catalog import ExamEntry, get_entry, load_catalog
+from core.index import QuestionIndex, drill_ids, is_row_form
+from core.questions import MODULE_MAPPING, compile_question
+from core.scoring import answer_entry
+from core.sheets import connect
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Question banks stay in memory until this budget is exceeded, then the least
+# recently used ones are dropped and reloaded on their next use.
+BANK_BUDGET_ENV = "SAT_BANK_BUDGET_MB"
+DEFAULT_BUDGET_MB = 256
+BANK_TTL_SEC = 60  # same freshness as the old st.cache_data(ttl=60) loader
+VERSIONS_IN_MEMORY = 4  # superseded bank versions kept for the attempts pinned to them
+
+_log = logging.getLogger(__name__)
+
+
+def row_hashes(df: pd.DataFrame | None) -> np.ndarray:
+    """One 64-bit content hash per bank row (position independent)."""
+    if df is None or df.empty:
+        return np.zeros(0, dtype=np.uint64)
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+class Bank:
+    """One loaded question bank plus the data derived from it (built on first use).
+
+    Derived data is keyed by form: a Session label, or a drill label naming
+    bank rows directly, so routed modules and practice drills share the same
+    machinery as the fixed modules. Compiled payloads and answer-key entries
+    are also cached per row content hash, so a refreshed bank (see
+    :meth:`refreshed`) only recompiles the rows that changed.
+    """
+
+    def __init__(self, df: pd.DataFrame, hashes: np.ndarray | None = None):
+        self.df = df
+        self.loaded_at = time.time()
+        self.nbytes = int(df.memory_usage(deep=True).sum()) if df is not None else 0
+        self.forms = set(df["Session"].dropna().astype(str)) if df is not None and "Session" in df.columns else set()
+        self.columns = list(df.columns) if df is not None else []
+        self.row_hashes = row_hashes(df) if hashes is None else hashes
+        self.changed_rows: list[int] | None = None  # positions new or edited since the previous version
+        self.parent: str | None = None  # version this one was refreshed from
+        self._version: str | None = None
+        self._rows: dict[str, list[int]] = {}
+        self._frames: dict[str, pd.DataFrame] = {}
+        self._payloads: dict[str, list[dict]] = {}
+        self._answer_keys: dict[str, dict[int, dict]] = {}
+        self._row_payloads: dict[int, dict] = {}  # row hash -> compiled payload
+        self._row_keys: dict[int, dict] = {}  # row hash -> answer-key entry
+        self._index: QuestionIndex | None = None
+        self._by_hash: dict[int, list[int]] | None = None  # row hash -> positions, for Form:/Drill: labels
+        self.static = False  # packaged banks never go stale
+
+    @property
+    def version(self) -> str:
+        """Content id of this bank: its columns plus every row hash, in order."""
+        if self._version is None:
+            h = hashlib.blake2b(json.dumps(self.columns, default=str).encode(), digest_size=8)
+            h.update(self.row_hashes.tobytes())
+            self._version = h.hexdigest()
+        return self._version
+
+    def form_rows(self, label: str) -> list[int]:
+        """Bank row positions of a form, in q_index order."""
+        if label not in self._rows:
+            if is_row_form(label):
+                self._rows[label] = self._rows_by_id(drill_ids(label))
+            elif self.df is not None and "Session" in self.df.columns:
+                self._rows[label] = (self.df["Session"] == label).to_numpy().nonzero()[0].tolist()
+            else:
+                self._rows[label] = []
+        return self._rows[label]
+
+    def _rows_by_id(self, ids: list[int]) -> list[int]:
+        """Positions of the rows with these content hashes; rows no longer in the bank are skipped."""
+        if self._by_hash is None:
+            by_hash: dict[int, list[int]] = {}
+            for pos, h in enumerate(self.row_hashes.tolist()):
+                by_hash.setdefault(h, []).append(pos)
+            self._by_hash = by_hash
+        rows, used = [], {}
+        for h in ids:
+            n = used.get(h, 0)
+            positions = self._by_hash.get(h, ())
+            if n < len(positions):  # identical rows: each copy is used once
+                rows.append(positions[n])
+                used[h] = n + 1
+        return rows
+
+    def rows_with(self, hashes) -> set[int]:
+        """Positions of this bank's rows whose content hash is one of ``hashes``."""
+        return set(np.nonzero(np.isin(self.row_hashes, np.asarray(hashes, dtype=np.uint64)))[0].tolist())
+
+    def form(self, label: str) -> pd.DataFrame:
+        """Questions of one form, re-indexed so q_index == row position."""
+        if label not in self._frames:
+            self._frames[label] = self.df.iloc[self.form_rows(label)].reset_index(drop=True)
+        return self._frames[label]
+
+    def module(self, module_step: int) -> pd.DataFrame:
+        return self.form(MODULE_MAPPING[module_step])
+
+    def module_sizes(self, forms: dict[int, str] | None = None) -> dict[int, int]:
+        forms = forms or MODULE_MAPPING
+        return {m: len(self.form(label)) for m, label in forms.items()}
+
+    def payloads(self, label: str) -> list[dict]:
+        """Compiled render payload per q_index of a form."""
+        if label not in self._payloads:
+            self._payloads[label] = [self._per_row(self._row_payloads, r, compile_question) for r in self.form_rows(label)]
+        return self._payloads[label]
+
+    def form_answer_key(self, label: str) -> dict[int, dict]:
+        if label not in self._answer_keys:
+            self._answer_keys[label] = {
+                q: self._per_row(self._row_keys, r, answer_entry) for q, r in enumerate(self.form_rows(label))
+            }
+        return self._answer_keys[label]
+
+    def _per_row(self, cache: dict[int, dict], row: int, build) -> dict:
+        h = int(self.row_hashes[row])
+        if h not in cache:
+            cache[h] = build(self.df.iloc[row])
+        return cache[h]
+
+    def answer_key_for(self, forms: dict[int, str]) -> dict:
+        """{(module_step, q_index): entry} for the forms an attempt actually took."""
+        return {
+            (module_step, q): entry
+            for module_step, label in forms.items()
+            for q, entry in self.form_answer_key(label).items()
+        }
+
+    @property
+    def answer_key(self) -> dict:
+        return self.answer_key_for(MODULE_MAPPING)
+
+    @property
+    def index(self) -> QuestionIndex:
+        """Tag and full-text postings over this bank (built on first search)."""
+        if self._index is None:
+            self._index = QuestionIndex(self.df)
+        return self._index
+
+    def refreshed(self, df: pd.DataFrame) -> "Bank":
+        """This bank after a re-read of its sheet.
+
+        Returns ``self`` when no row changed. Otherwise a new bank that keeps
+        every derived entry of the unchanged rows: whole forms whose rows are
+        all unchanged, per-row payloads and answer-key entries, and the search
+        index (patched in place of a rebuild when no row was added or removed).
+        Sessions still holding this bank keep a consistent view of it.
+        """
+        hashes = row_hashes(df)
+        same_columns = list(df.columns) == self.columns
+        if same_columns and np.array_equal(hashes, self.row_hashes):
+            self.loaded_at = time.time()
+            self.changed_rows = []
+            return self
+
+        bank = Bank(df, hashes)
+        if not same_columns:  # a column edit can change any payload
+            return bank
+        bank.parent = self.version
+        if len(hashes) == len(self.row_hashes):
+            bank.changed_rows = np.nonzero(hashes != self.row_hashes)[0].tolist()
+        else:
+            bank.changed_rows = np.nonzero(~np.isin(hashes, self.row_hashes))[0].tolist()
+
+        bank.share_rows(self)
+        for label, rows in self._rows.items():
+            new_rows = bank.form_rows(label)
+            if len(new_rows) == len(rows) and np.array_equal(hashes[new_rows], self.row_hashes[rows]):
+                for mine, theirs in ((bank._frames, self._frames), (bank._payloads, self._payloads),
+                                     (bank._answer_keys, self._answer_keys)):
+                    if label in theirs:
+                        mine[label] = theirs[label]
+        if self._index is not None and len(hashes) == len(self.row_hashes):
+            bank._index = self._index.patched(self.df, df, bank.changed_rows)
+        return bank
+
+    def share_rows(self, other: "Bank"):
+        """Reuse ``other``'s compiled payloads and answer-key entries for the rows both banks have."""
+        if other.columns != self.columns:
+            return
+        live = set(self.row_hashes.tolist())
+        for mine, theirs in ((self._row_payloads, other._row_payloads), (self._row_keys, other._row_keys)):
+            mine.update((h, v) for h, v in theirs.items() if h in live and h not in mine)
+
+    def prefetch(self, labels) -> list[dict]:
+        """Build frames, payloads and answer keys for these forms; returns the payloads with images."""
+        with_images = []
+        for label in labels:
+            self.form_answer_key(label)
+            with_images += [p for p in self.payloads(label) if p["image_url"]]
+        return with_images
+
+
+class BankCache:
+    """LRU of question banks under a memory budget, with per-exam usage counters.
+
+    Besides the current bank per source it keeps the last few superseded
+    versions for attempts pinned to them (see core/snapshots.py).
+    """
+
+    def __init__(self, budget_bytes: int, ttl_sec: float = BANK_TTL_SEC):
+        self.budget_bytes = budget_bytes
+        self.ttl_sec = ttl_sec
+        self._banks: OrderedDict[tuple, Bank] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: dict[tuple, threading.Lock] = {}
+        self._versions: OrderedDict[tuple, Bank] = OrderedDict()  # (source, version) -> superseded bank
+        self.stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, exam_id: str, what: str, n: int = 1):
+        row = self.stats.setdefault(exam_id, {"hits": 0, "loads": 0, "refreshes": 0, "rows_changed": 0, "evictions": 0})
+        row[what] += n
+
+    def _fresh(self, bank: Bank | None) -> bool:
+        return bank is not None and (bank.static or time.time() - bank.loaded_at < self.ttl_sec)
+
+    def get(self, entry: ExamEntry, version: str | None = None) -> Bank:
+        """Current bank of the entry's source, or the given version of it (never refreshed)."""
+        if version is not None:
+            return self._get_version(entry, version)
+        key = entry.source
+        with self._lock:
+            bank = self._banks.get(key)
+            if self._fresh(bank):
+                self._banks.move_to_end(key)
+                self._count(entry.id, "hits")
+                return bank
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        # one loader per source; everyone else waits for its result
+        with key_lock:
+            with self._lock:
+                bank = self._banks.get(key)
+                if self._fresh(bank):
+                    self._banks.move_to_end(key)
+                    self._count(entry.id, "hits")
+                    return bank
+
+            from core import offline  # imports this module
+
+            if offline.enabled():
+                bank = offline.PackagedBank(offline.package_for(entry))
+            else:
+                df = connect().read(spreadsheet=entry.sheet_url, worksheet=entry.worksheet)
+                # a stale bank is diffed against the new rows, so only edited rows are rebuilt
+                bank = bank.refreshed(df) if bank is not None else Bank(df)
+
+            with self._lock:
+                old = self._banks.get(key)
+                if old is not None and old is not bank and not old.static:
+                    self._keep_version(key, old)
+                self._banks[key] = bank
+                self._banks.move_to_end(key)
+                if bank.changed_rows is None:
+                    self._count(entry.id, "loads")
+                else:
+                    self._count(entry.id, "refreshes")
+                    self._count(entry.id, "rows_changed", len(bank.changed_rows))
+                self._evict(keep=key)
+            return bank
+
+    def current_version(self, entry: ExamEntry) -> str | None:
+        """Version of the entry's bank this process serves now, if loaded."""
+        with self._lock:
+            bank = self._banks.get(entry.source)
+        return bank.version if bank is not None else None
+
+    def _keep_version(self, key: tuple, bank: Bank):
+        self._versions[(key, bank.version)] = bank
+        self._versions.move_to_end((key, bank.version))
+        while len(self._versions) > VERSIONS_IN_MEMORY:
+            self._versions.popitem(last=False)
+
+    def _get_version(self, entry: ExamEntry, version: str) -> Bank:
+        key = entry.source
+        with self._lock:
+            bank = self._banks.get(key)
+            if bank is not None and bank.version == version:
+                self._count(entry.id, "hits")
+                return bank
+            bank = self._versions.get((key, version))
+            if bank is not None:
+                self._versions.move_to_end((key, version))
+                self._count(entry.id, "hits")
+                return bank
+
+        current = self.get(entry)
+        if current.version == version or current.static:
+            return current
+        from core import snapshots  # imports this module
+
+        bank = snapshots.load(entry, version, base=current)
+        if bank is None:
+            _log.warning("bank version %s of %s is gone; using the current one", version, entry.id)
+            return current
+        with self._lock:
+            self._keep_version(key, bank)
+            self._evict(keep=key)
+        return bank
+
+    def _evict(self, keep: tuple):
+        # superseded versions go first: the snapshot store can rebuild them
+        while self.total_bytes() > self.budget_bytes and self._versions:
+            self._versions.popitem(last=False)
+        while self.total_bytes() > self.budget_bytes and len(self._banks) > 1:
+            old_key = next(k for k in self._banks if k != keep)
+            self._banks.pop(old_key)
+            for exam_id, entry in load_catalog().items():
+                if entry.source == old_key:
+                    self._count(exam_id, "evictions")
+
+    def total_bytes(self) -> int:
+        """Current banks plus the superseded versions kept beside them."""
+        return sum(b.nbytes for b in self._banks.values()) + sum(b.nbytes for b in self._versions.values())
+
+    def has_room_for_more(self) -> bool:
+        return self.total_bytes() < self.budget_bytes
+
+    def clear(self):
+        with self._lock:
+            self._banks.clear()
+            self._versions.clear()
+
+
+_cache = BankCache(int(float(os.environ.get(BANK_BUDGET_ENV, DEFAULT_BUDGET_MB)) * 1024 * 1024))
+
+
+def get_bank(exam_id: str | None, version: str | None = None) -> Bank:
+    """Question bank for a catalog exam, loaded on first use; ``version`` picks a pinned snapshot."""
+    return _cache.get(get_entry(exam_id), version)
+
+
+def bank_for(state) -> Bank:
+    """The bank an attempt (session_state or stored engine state) was pinned to when it started."""
+    return get_bank(state.get("selected_exam"), state.get("bank_version"))
+
+
+def bank_cache() -> BankCache:
+    return _cache
@@ -0,0 +1,193 @@
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+from core.sheets import URL, connect
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# The catalog of practice forms comes from the first source that has entries:
+#   1. the JSON manifest at SAT_CATALOG (default: exams.json next to "SAT app.py")
+#   2. an "Exams" worksheet in the main spreadsheet
+#   3. the built-in single mock exam
+CATALOG_ENV = "SAT_CATALOG"
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "exams.json")
+CATALOG_WORKSHEET = "Exams"
+
+
+@dataclass(frozen=True)
+class ExamEntry:
+    id: str
+    title: str
+    sheet_url: str = URL
+    worksheet: str | None = None  # None -> first worksheet of the spreadsheet
+    desc: str = ""
+    tags: tuple[str, ...] = field(default_factory=tuple)
+    # Adaptive second modules: {module_step: {"easier": label, "harder": label,
+    # "threshold": 0.6}}. The previous module's accuracy picks the form.
+    routing: dict = field(default_factory=dict, hash=False, compare=False)
+    # Form each module_step reads ({module_step: label}); empty -> MODULE_MAPPING.
+    forms: dict = field(default_factory=dict, hash=False, compare=False)
+    # Usernames this exam is assigned to; empty -> everyone.
+    students: tuple[str, ...] = field(default_factory=tuple)
+
+    def visible_to(self, user_name: str) -> bool:
+        return not self.students or str(user_name).strip().lower() in self.students
+
+    @property
+    def source(self) -> tuple[str, str | None]:
+        """What the question bank is loaded from; entries sharing a source share a bank."""
+        return (self.sheet_url, self.worksheet)
+
+
+DEFAULT_ENTRIES = [
+    ExamEntry(
+        id="sat_mock_v1",
+        title="SAT Mock Exam (Full)",
+        desc="Timed modules with break, review grid, and navigation popover.",
+        tags=("Math + Reading", "Timed", "Break"),
+    ),
+]
+
+
+def _entry_from_dict(d: dict) -> ExamEntry | None:
+    exam_id = str(d.get("id") or "").strip()
+    if not exam_id or d.get("active", True) in (False, "FALSE", "false", "0", 0):
+        return None
+    tags = _list_from(d.get("tags"))
+    worksheet = d.get("worksheet")
+    return ExamEntry(
+        id=exam_id,
+        title=str(d.get("title") or exam_id),
+        sheet_url=str(d.get("sheet_url") or URL),
+        worksheet=str(worksheet).strip() if isinstance(worksheet, str) and worksheet.strip() else None,
+        desc=str(d.get("desc") or ""),
+        tags=tuple(tags),
+        routing=_routing_from(d.get("routing")),
+        forms=_forms_from(d.get("forms")),
+        students=tuple(s.lower() for s in _list_from(d.get("students"))),
+    )
+
+
+def _list_from(raw) -> list[str]:
+    if isinstance(raw, str):
+        return [t.strip() for t in raw.split(",") if t.strip()]
+    return [str(t).strip() for t in (raw or ()) if str(t).strip()]
+
+
+def _forms_from(raw) -> dict:
+    if isinstance(raw, str) and raw.strip():
+        raw = json.loads(raw)
+    if not isinstance(raw, dict):
+        return {}
+    return {int(step): str(label) for step, label in raw.items() if label}
+
+
+def _routing_from(raw) -> dict:
+    if isinstance(raw, str) and raw.strip():
+        raw = json.loads(raw)
+    if not isinstance(raw, dict):
+        return {}
+    routing = {}
+    for step, rule in raw.items():
+        if isinstance(rule, dict) and rule.get("easier") and rule.get("harder"):
+            routing[int(step)] = {
+                "easier": str(rule["easier"]),
+                "harder": str(rule["harder"]),
+                "threshold": float(rule.get("threshold", 0.6)),
+            }
+    return routing
+
+
+def _read_manifest_file(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("exams", []) if isinstance(data, dict) else data
+
+
+def _read_manifest_sheet() -> list[dict]:
+    df = connect().read(spreadsheet=URL, worksheet=CATALOG_WORKSHEET, ttl=0)
+    if df is None or df.empty:
+        return []
+    cols = {c.strip().lower(): c for c in df.columns}
+    rename = {
+        "exam_id": "id", "title": "title", "description": "desc", "tags": "tags",
+        "sheet_url": "sheet_url", "worksheet": "worksheet", "active": "active", "routing": "routing",
+        "forms": "forms", "students": "students",
+    }
+    df = df.rename(columns={cols[k]: v for k, v in rename.items() if k in cols})
+    return df.where(df.notna(), None).to_dict("records")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_catalog() -> dict[str, ExamEntry]:
+    """{exam_id: ExamEntry} in manifest order."""
+    from core import offline  # imports this module
+
+    if offline.enabled():
+        return {exam_id: pkg.entry for exam_id, pkg in offline.packages().items()} or {
+            e.id: e for e in DEFAULT_ENTRIES
+        }
+    rows = _read_manifest_file(os.environ.get(CATALOG_ENV, DEFAULT_MANIFEST))
+    if not rows:
+        try:
+            rows = _read_manifest_sheet()
+        except Exception:
+            rows = []
+    entries = [e for e in (_entry_from_dict(r) for r in rows) if e is not None] or DEFAULT_ENTRIES
+    return {e.id: e for e in entries}
+
+
+def get_entry(exam_id: str | None) -> ExamEntry:
+    catalog = load_catalog()
+    return catalog.get(exam_id) or next(iter(catalog.values()))
+
+
+# ---------------------------
+# PUBLISHING
+# ---------------------------
+_publish_lock = threading.Lock()
+
+
+def entry_to_dict(entry: ExamEntry) -> dict:
+    d = {"id": entry.id, "title": entry.title, "sheet_url": entry.sheet_url}
+    if entry.worksheet:
+        d["worksheet"] = entry.worksheet
+    if entry.desc:
+        d["desc"] = entry.desc
+    if entry.tags:
+        d["tags"] = list(entry.tags)
+    if entry.routing:
+        d["routing"] = {str(k): v for k, v in entry.routing.items()}
+    if entry.forms:
+        d["forms"] = {str(k): v for k, v in entry.forms.items()}
+    if entry.students:
+        d["students"] = list(entry.students)
+    return d
+
+
+def publish(entries: list[ExamEntry], path: str | None = None) -> str:
+    """Add (or replace by id) entries in the JSON manifest and refresh the catalog.
+
+    A missing manifest is seeded with the current catalog first, so entries
+    that came from the sheet or the built-in default stay listed.
+    """
+    path = path or os.environ.get(CATALOG_ENV, DEFAULT_MANIFEST)
+    with _publish_lock:
+        rows = _read_manifest_file(path) or [entry_to_dict(e) for e in load_catalog().values()]
+        new_ids = {e.id for e in entries}
+        rows = [r for r in rows if r.get("id") not in new_ids] + [entry_to_dict(e) for e in entries]
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"exams": rows}, f, indent=2)
+        os.replace(tmp, path)
+    load_catalog.clear()
+    return path
@@ -0,0 +1,242 @@
+import json
+import logging
+import threading
+from bisect import insort
+from concurrent.futures import ThreadPoolExecutor
+
+from core.bank import bank_for
+from core.results import attempt_id, attempt_mapping, grade_state
+from core.scoring import estimate_section_range_harder
+from core.backends import PerBackend, RedisBackend, SQLiteBackend
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Every finished attempt is summarised once into a small history record
+# (score, per-module accuracy, pace), indexed by student and exam, and folded
+# into a per-(student, exam, kind) rollup. The engine state can then be
+# wiped by a retake without losing anything, and the dashboard reads one
+# rollup plus one page of records instead of regrading old attempts.
+# Stored next to the engine state (same SAT_STATE_BACKEND).
+TREND_POINTS = 20  # per-module accuracy points kept in a rollup
+
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+_log = logging.getLogger(__name__)
+
+
+def summarize(user_name: str, state, kind: str = "exam", title: str = "") -> dict:
+    """History record of one finished attempt."""
+    _, per_module = grade_state(bank_for(state), state, kind)
+    mapping = attempt_mapping(kind)
+    correct = sum(m["correct"] for m in per_module.values())
+    total = sum(m["total"] for m in per_module.values())
+    time_sec = sum(m["time_sec"] for m in per_module.values())
+    record = {
+        "attempt_id": attempt_id(user_name, state, kind),
+        "user": str(user_name).strip().lower(),
+        "exam_id": state.get("selected_exam"),
+        "kind": kind,
+        "title": title,
+        "finished_at": float(state.get("exam_finished_at") or 0),
+        "correct": correct,
+        "total": total,
+        "pct": round(correct / total * 100, 1) if total else 0.0,
+        "time_sec": round(time_sec, 1),
+        "sec_per_q": round(time_sec / total, 1) if total else 0.0,
+        "modules": {
+            mapping[m]: {"correct": row["correct"], "total": row["total"]} for m, row in per_module.items()
+        },
+        "score_lo": None,
+        "score_hi": None,
+    }
+    if kind != "drill":
+        rw_lo, rw_hi, _ = estimate_section_range_harder(
+            per_module[1]["correct"] + per_module[2]["correct"], per_module[1]["total"] + per_module[2]["total"]
+        )
+        m_lo, m_hi, _ = estimate_section_range_harder(
+            per_module[3]["correct"] + per_module[4]["correct"], per_module[3]["total"] + per_module[4]["total"]
+        )
+        record["score_lo"], record["score_hi"] = rw_lo + m_lo, rw_hi + m_hi
+    return record
+
+
+def _rank(record: dict) -> float:
+    """What "best" means: the score range midpoint for exams, accuracy for drills."""
+    if record.get("score_lo") is not None:
+        return (record["score_lo"] + record["score_hi"]) / 2
+    return record["pct"]
+
+
+def fold(rollup: dict | None, record: dict) -> dict:
+    """Rollup with one more attempt folded in; attempts may arrive out of order."""
+    rollup = rollup or {"attempts": 0, "best": None, "last": None, "avg_sec_per_q": 0.0, "trend": {}}
+    brief = {k: record[k] for k in ("attempt_id", "finished_at", "pct", "score_lo", "score_hi", "correct", "total")}
+    n = rollup["attempts"] + 1
+    rollup["attempts"] = n
+    rollup["avg_sec_per_q"] = round(rollup["avg_sec_per_q"] + (record["sec_per_q"] - rollup["avg_sec_per_q"]) / n, 2)
+    if rollup["best"] is None or _rank(record) > _rank(rollup["best"]):
+        rollup["best"] = brief
+    if rollup["last"] is None or record["finished_at"] >= rollup["last"]["finished_at"]:
+        rollup["last"] = brief
+    for name, m in record["modules"].items():
+        points = rollup["trend"].setdefault(name, [])
+        insort(points, [record["finished_at"], round(m["correct"] / m["total"] * 100, 1) if m["total"] else 0.0])
+        del points[:-TREND_POINTS]
+    return rollup
+
+
+# ---------------------------
+# STORES
+# ---------------------------
+class MemoryHistory:
+    """Process-local history: records per student, newest first."""
+
+    def __init__(self):
+        self._records: dict[str, dict] = {}
+        self._by_user: dict[str, list[tuple[float, str]]] = {}
+        self._rollups: dict[tuple[str, str, str], dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, record: dict) -> bool:
+        with self._lock:
+            if record["attempt_id"] in self._records:
+                return False
+            self._records[record["attempt_id"]] = record
+            insort(self._by_user.setdefault(record["user"], []), (-record["finished_at"], record["attempt_id"]))
+            key = (record["user"], record["exam_id"], record["kind"])
+            self._rollups[key] = fold(self._rollups.get(key), record)
+            return True
+
+    def page(self, user: str, exam_id: str | None = None, kind: str | None = None,
+             offset: int = 0, limit: int = 10) -> tuple[list[dict], int]:
+        with self._lock:
+            rows = [self._records[a] for _, a in self._by_user.get(user, [])]
+        rows = [r for r in rows if (exam_id is None or r["exam_id"] == exam_id) and (kind is None or r["kind"] == kind)]
+        return rows[offset:offset + limit], len(rows)
+
+    def rollups(self, user: str) -> dict[tuple[str, str], dict]:
+        with self._lock:
+            return {(e, k): r for (u, e, k), r in self._rollups.items() if u == user}
+
+
+class SQLiteHistory(SQLiteBackend):
+    """Shared by worker processes through the state store's SQLite file."""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS attempt_history ("
+        " attempt_id TEXT PRIMARY KEY, user TEXT NOT NULL, exam_id TEXT NOT NULL, kind TEXT NOT NULL,"
+        " finished_at REAL NOT NULL, record TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS attempt_history_user ON attempt_history (user, exam_id, kind, finished_at)",
+        "CREATE INDEX IF NOT EXISTS attempt_history_recent ON attempt_history (user, finished_at)",
+        "CREATE TABLE IF NOT EXISTS history_rollups ("
+        " user TEXT NOT NULL, exam_id TEXT NOT NULL, kind TEXT NOT NULL, rollup TEXT NOT NULL,"
+        " PRIMARY KEY (user, exam_id, kind))",
+    )
+
+    def record(self, record: dict) -> bool:
+        with self._transaction() as conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO attempt_history VALUES (?, ?, ?, ?, ?, ?)",
+                (record["attempt_id"], record["user"], record["exam_id"], record["kind"],
+                 record["finished_at"], json.dumps(record, separators=(",", ":"))),
+            ).rowcount
+            if inserted:
+                key = (record["user"], record["exam_id"], record["kind"])
+                row = conn.execute(
+                    "SELECT rollup FROM history_rollups WHERE user = ? AND exam_id = ? AND kind = ?", key
+                ).fetchone()
+                rollup = fold(json.loads(row[0]) if row else None, record)
+                conn.execute(
+                    "INSERT OR REPLACE INTO history_rollups VALUES (?, ?, ?, ?)",
+                    (*key, json.dumps(rollup, separators=(",", ":"))),
+                )
+        return bool(inserted)
+
+    def page(self, user: str, exam_id: str | None = None, kind: str | None = None,
+             offset: int = 0, limit: int = 10) -> tuple[list[dict], int]:
+        where, args = "user = ?", [user]
+        if exam_id is not None:
+            where, args = where + " AND exam_id = ?", args + [exam_id]
+        if kind is not None:
+            where, args = where + " AND kind = ?", args + [kind]
+        conn = self._conn()
+        rows = conn.execute(
+            f"SELECT record FROM attempt_history WHERE {where} ORDER BY finished_at DESC LIMIT ? OFFSET ?",
+            (*args, limit, offset),
+        ).fetchall()
+        total = conn.execute(f"SELECT COUNT(*) FROM attempt_history WHERE {where}", args).fetchone()[0]
+        return [json.loads(r[0]) for r in rows], total
+
+    def rollups(self, user: str) -> dict[tuple[str, str], dict]:
+        rows = self._conn().execute(
+            "SELECT exam_id, kind, rollup FROM history_rollups WHERE user = ?", (user,)
+        ).fetchall()
+        return {(e, k): json.loads(r) for e, k, r in rows}
+
+
+class RedisHistory(RedisBackend):
+    """Shared across hosts: a hash of records, sorted sets per student (and exam) by finish time."""
+
+    def record(self, record: dict) -> bool:
+        if not self.r.hsetnx("sat:history:rec", record["attempt_id"], json.dumps(record, separators=(",", ":"))):
+            return False
+        user, scope = record["user"], f"{record['exam_id']}|{record['kind']}"
+        pipe = self.r.pipeline()
+        pipe.zadd(f"sat:history:u:{user}", {record["attempt_id"]: record["finished_at"]})
+        pipe.zadd(f"sat:history:u:{user}:{scope}", {record["attempt_id"]: record["finished_at"]})
+        pipe.execute()
+        rollup_key = f"sat:history:rollup:{user}"
+        with self.r.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(rollup_key)
+                    raw = pipe.hget(rollup_key, scope)
+                    rollup = fold(json.loads(raw) if raw else None, record)
+                    pipe.multi()
+                    pipe.hset(rollup_key, scope, json.dumps(rollup, separators=(",", ":")))
+                    pipe.execute()
+                    return True
+                except self.WatchError:  # another attempt of this student finished meanwhile
+                    continue
+
+    def page(self, user: str, exam_id: str | None = None, kind: str | None = None,
+             offset: int = 0, limit: int = 10) -> tuple[list[dict], int]:
+        if exam_id is None:
+            zkey = f"sat:history:u:{user}"
+        else:
+            zkey = f"sat:history:u:{user}:{exam_id}|{kind or 'exam'}"
+        ids = self.r.zrevrange(zkey, offset, offset + limit - 1)
+        rows = self.r.hmget("sat:history:rec", ids) if ids else []
+        return [json.loads(r) for r in rows if r], int(self.r.zcard(zkey))
+
+    def rollups(self, user: str) -> dict[tuple[str, str], dict]:
+        out = {}
+        for scope, raw in self.r.hgetall(f"sat:history:rollup:{user}").items():
+            exam_id, _, kind = scope.decode().rpartition("|")
+            out[(exam_id, kind)] = json.loads(raw)
+        return out
+
+
+# The process-wide history store for the configured ``SAT_STATE_BACKEND``.
+get_history = PerBackend(MemoryHistory, SQLiteHistory, RedisHistory)
+
+
+# ---------------------------
+# SESSION HOOK
+# ---------------------------
+def submit(user_name: str, state, kind: str = "exam", title: str = ""):
+    """Record a finished attempt off the request path; repeated submits of one attempt are ignored.
+
+    ``state`` is copied, so the session can retake right away.
+    """
+    snapshot = {k: state[k] for k in ("selected_exam", "bank_version", "exam_finished_at", "responses",
+                                      "question_times", "module_forms") if k in state}
+    future = _pool.submit(lambda: get_history().record(summarize(user_name, snapshot, kind, title)))
+    future.add_done_callback(lambda f: _logged(attempt_id(user_name, snapshot, kind), f))
+    return future
+
+
+def _logged(attempt: str, future):
+    error = future.exception()
+    if error is not None:
+        _log.error("attempt %s was not recorded in history", attempt, exc_info=error)
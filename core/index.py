@@ -0,0 +1,190 @@
+import random
+import re
+from collections import defaultdict
+
+import pandas as pd
+
+from core.scoring import normalize_answer
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Tag columns with postings, when the sheet has them. Values match
+# case-insensitively; a list of values for one column means "any of these".
+TAG_COLUMNS = ("Domain", "Skill", "Difficulty", "Question_Type", "Session")
+TEXT_COLUMNS = ("Content", "Prompt")
+
+# A drill is a form that names its bank rows directly by content hash, e.g.
+# "Drill:#9f3c…,#04a1…", so any worker can rebuild it from the label alone
+# and rows inserted or moved in the sheet never change which questions it
+# holds. Assembled exam forms (core/assembly.py) use the same encoding under
+# "Form:".
+DRILL_PREFIX = "Drill:"
+FORM_PREFIX = "Form:"
+DRILL_TITLE = "Practice Drill"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text) -> set[str]:
+    if not isinstance(text, str):
+        return set()
+    return {t for t in _TOKEN.findall(text.lower()) if len(t) > 1}
+
+
+def _tag(value) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).strip().lower()
+
+
+class QuestionIndex:
+    """Inverted index over one question bank: row positions per tag value and per word."""
+
+    def __init__(self, df: pd.DataFrame | None):
+        self.size = 0 if df is None else len(df)
+        self.tags: dict[str, dict[str, frozenset[int]]] = {}
+        self.labels: dict[str, dict[str, str]] = {}  # normalized -> value as written in the sheet
+        self.text: dict[str, frozenset[int]] = {}
+        if df is None:
+            return
+
+        for col in TAG_COLUMNS:
+            if col not in df.columns:
+                continue
+            postings, labels = defaultdict(list), {}
+            for pos, value in enumerate(df[col].tolist()):
+                key = _tag(value)
+                if key:
+                    postings[key].append(pos)
+                    labels.setdefault(key, str(value).strip())
+            self.tags[col] = {k: frozenset(v) for k, v in postings.items()}
+            self.labels[col] = labels
+
+        words = defaultdict(list)
+        columns = [df[c].tolist() for c in TEXT_COLUMNS if c in df.columns]
+        for pos, cells in enumerate(zip(*columns)):
+            for token in set().union(*(tokenize(c) for c in cells)):
+                words[token].append(pos)
+        self.text = {k: frozenset(v) for k, v in words.items()}
+
+    def patched(self, old_df: pd.DataFrame, new_df: pd.DataFrame, positions) -> "QuestionIndex":
+        """Copy of this index with the rows at ``positions`` re-read from ``new_df``.
+
+        Both frames must have the same number of rows; only the postings those
+        rows appear in (before or after) are rebuilt.
+        """
+        out = QuestionIndex(None)
+        out.size = self.size
+        out.tags = {col: dict(postings) for col, postings in self.tags.items()}
+        out.labels = {col: dict(labels) for col, labels in self.labels.items()}
+        out.text = dict(self.text)
+        positions = list(positions)
+        if not positions:
+            return out
+
+        def move(postings: dict[str, frozenset[int]], pos: int, old_keys, new_keys):
+            for key in set(old_keys) - set(new_keys):
+                remaining = postings[key] - {pos}
+                if remaining:
+                    postings[key] = remaining
+                else:
+                    del postings[key]
+            for key in set(new_keys) - set(old_keys):
+                postings[key] = postings.get(key, frozenset()) | {pos}
+
+        for col in out.tags:
+            for pos in positions:
+                old_key, new_key = _tag(old_df[col].iat[pos]), _tag(new_df[col].iat[pos])
+                move(out.tags[col], pos, [old_key] if old_key else [], [new_key] if new_key else [])
+                if new_key:
+                    out.labels[col].setdefault(new_key, str(new_df[col].iat[pos]).strip())
+                if old_key and old_key not in out.tags[col]:
+                    out.labels[col].pop(old_key, None)
+        text_cols = [c for c in TEXT_COLUMNS if c in new_df.columns]
+        for pos in positions:
+            old_words = set().union(*(tokenize(old_df[c].iat[pos]) for c in text_cols))
+            new_words = set().union(*(tokenize(new_df[c].iat[pos]) for c in text_cols))
+            move(out.text, pos, old_words, new_words)
+        return out
+
+    def columns(self) -> list[str]:
+        return list(self.tags)
+
+    def values(self, column: str) -> list[str]:
+        return sorted(self.labels.get(column, {}).values())
+
+    def search(self, filters: dict | None = None, text: str = "", within=None, exclude=None) -> list[int]:
+        """Row positions matching every filter and every word of ``text``, in bank order.
+
+        ``within`` limits the result to those rows, ``exclude`` removes rows.
+        Postings are intersected smallest first.
+        """
+        sets = []
+        for col, wanted in (filters or {}).items():
+            if wanted in (None, "", [], ()):
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else wanted
+            postings = self.tags.get(col, {})
+            sets.append(frozenset().union(*(postings.get(_tag(w), frozenset()) for w in wanted)))
+        sets += [self.text.get(token, frozenset()) for token in tokenize(text)]
+        if within is not None:
+            sets.append(frozenset(within))
+
+        if not sets:
+            hits = set(range(self.size))
+        else:
+            sets.sort(key=len)
+            hits = set(sets[0])
+            for other in sets[1:]:
+                if not hits:
+                    break
+                hits &= other
+        if exclude:
+            hits -= set(exclude)
+        return sorted(hits)
+
+
+# ---------------------------
+# DRILLS
+# ---------------------------
+def is_drill(label: str) -> bool:
+    return isinstance(label, str) and label.startswith(DRILL_PREFIX)
+
+
+def is_row_form(label: str) -> bool:
+    """Drill or assembled form: the label itself lists the bank rows."""
+    return isinstance(label, str) and label.startswith((DRILL_PREFIX, FORM_PREFIX))
+
+
+def drill_label(hashes, prefix: str = DRILL_PREFIX) -> str:
+    """Label naming bank rows by their content hashes (see ``Bank.row_hashes``)."""
+    return prefix + ",".join(f"#{int(h):016x}" for h in hashes)
+
+
+def drill_ids(label: str) -> list[int]:
+    """Row content hashes named by a label, in q_index order."""
+    return [int(r.strip()[1:], 16) for r in label.split(":", 1)[1].split(",") if r.strip().startswith("#")]
+
+
+def missed_rows(bank, responses: dict, module_forms: dict[int, str]) -> set[int]:
+    """Bank rows of an attempt that were answered wrong or left blank."""
+    missed = set()
+    for module_step, label in module_forms.items():
+        rows = bank.form_rows(label)
+        for q_index, entry in bank.form_answer_key(label).items():
+            value = str((responses.get((module_step, q_index)) or {}).get("value", "")).strip()
+            if not value or normalize_answer(value) != entry["norm"]:
+                missed.add(rows[q_index])
+    return missed
+
+
+def assemble_drill(bank, count: int, filters: dict | None = None, text: str = "",
+                   within=None, seed: int | None = None) -> str | None:
+    """Drill label with up to ``count`` matching questions, or None when nothing matches."""
+    hits = bank.index.search(filters, text, within=within)
+    if not hits:
+        return None
+    if len(hits) > count:
+        hits = sorted(random.Random(seed).sample(hits, count))
+    return drill_label(bank.row_hashes[hits])
@@ -0,0 +1,37 @@
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# The whole question grid (footer popover and Review page) is one component
+# rendered in the browser from a compact status string, instead of one
+# st.button per question. A rerun sends a few dozen characters and gets back
+# only the clicked index.
+_component = components.declare_component(
+    "nav_grid", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "nav_grid")
+)
+
+
+def status_string(size: int, answered, flagged) -> str:
+    """One character per question: a(nswered), f(lagged), F (both) or "."."""
+    return "".join(
+        ("F" if i in answered else "f") if i in flagged else ("a" if i in answered else ".")
+        for i in range(size)
+    )
+
+
+def nav_grid(status: str, layout: str = "nav", current: int = -1, key: str = "nav_grid") -> int | None:
+    """Render the grid; returns the clicked q_index once per click, else None.
+
+    ``layout`` is "nav" (compact numbered squares) or "review" (labelled tiles).
+    A component keeps its last value across reruns, so each click carries a
+    nonce and is handled only the first time it is seen.
+    """
+    clicked = _component(status=status, layout=layout, current=current, key=key, default=None)
+    if not clicked or clicked.get("nonce") == st.session_state.get(f"_{key}_nonce"):
+        return None
+    st.session_state[f"_{key}_nonce"] = clicked.get("nonce")
+    return int(clicked["index"])
@@ -0,0 +1,252 @@
+import base64
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+import pandas as pd
+
+from core.bank import Bank
+from core.catalog import ExamEntry, _entry_from_dict, entry_to_dict
+from core.scoring import SCORE_BANDS
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# A package is one file per exam with everything exam.py and score.py need:
+# the question bank, answer keys, score conversion table, roster (optional)
+# and every question image. Built online by `python -m tools.offline build`;
+# a test center points SAT_OFFLINE_PACKAGES at a folder of them and the app
+# then serves catalog, banks and images from the memory-mapped files, with
+# no Sheets or image-host traffic. Finished attempts are appended to a local
+# outbox that `python -m tools.offline sync` replays into the central store.
+#
+# Layout: MAGIC | u32 format | u64 toc length | toc JSON | section bytes...
+# The toc names each section's (offset, length) from the start of the file.
+PACKAGES_ENV = "SAT_OFFLINE_PACKAGES"
+OUTBOX_ENV = "SAT_OFFLINE_OUTBOX"
+DEFAULT_OUTBOX = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".state", "outbox.jsonl")
+MAGIC = b"SATPKG\x00"
+FORMAT_VERSION = 1
+EXTENSION = ".satpkg"
+IMAGE_REF = "pkg:image/"  # Image_URL cells inside a package point at its image sections
+
+_log = logging.getLogger(__name__)
+_HEADER = struct.Struct("<IQ")
+
+
+def enabled() -> bool:
+    return bool(os.environ.get(PACKAGES_ENV))
+
+
+# ---------------------------
+# WRITING
+# ---------------------------
+def write_package(path: str, entry: ExamEntry, df: pd.DataFrame, answer_keys: dict[str, dict],
+                  images: dict[str, tuple[bytes, str]], roster: dict[str, str] | None = None) -> str:
+    """Write one package; ``images`` maps Image_URL cell values to (bytes, mime). Returns its version."""
+    df = df.copy()
+    refs = {url: f"{IMAGE_REF}{i}" for i, url in enumerate(images)}
+    if "Image_URL" in df.columns:
+        df["Image_URL"] = df["Image_URL"].map(lambda v: refs.get(v, v))
+
+    sections: dict[str, bytes] = {}
+    try:
+        buf = io.BytesIO()
+        df.to_parquet(buf, index=False)
+        sections["bank.parquet"] = buf.getvalue()
+    except ImportError:
+        sections["bank.csv"] = df.to_csv(index=False).encode("utf-8")
+    sections["answer_keys.json"] = json.dumps(
+        {label: {str(q): e for q, e in key.items()} for label, key in answer_keys.items()}, default=str
+    ).encode("utf-8")
+    sections["conversion.json"] = json.dumps(SCORE_BANDS).encode("utf-8")
+    if roster is not None:
+        sections["roster.json"] = json.dumps(roster).encode("utf-8")
+    mimes = {}
+    for url, (data, mime) in images.items():
+        sections[refs[url]] = data
+        mimes[refs[url]] = mime
+
+    version = hashlib.sha256(b"".join(sections[k] for k in sorted(sections))).hexdigest()[:12]
+    toc = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "built_at": time.time(),
+        "exam": entry_to_dict(entry),
+        "mimes": mimes,
+        "sections": {},
+    }
+    # offsets depend on the toc's own length, so lay out twice
+    for _ in range(2):
+        offset = len(MAGIC) + _HEADER.size + len(json.dumps(toc).encode("utf-8"))
+        for name, data in sections.items():
+            toc["sections"][name] = [offset, len(data)]
+            offset += len(data)
+    toc_bytes = json.dumps(toc).encode("utf-8")
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + _HEADER.pack(FORMAT_VERSION, len(toc_bytes)) + toc_bytes)
+        for data in sections.values():
+            f.write(data)
+    os.replace(tmp, path)
+    return version
+
+
+# ---------------------------
+# READING
+# ---------------------------
+class Package:
+    """A memory-mapped package; sections are sliced out of the mapping on demand."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an exam package")
+        fmt, toc_len = _HEADER.unpack_from(self._mm, len(MAGIC))
+        if fmt != FORMAT_VERSION:
+            raise ValueError(f"{path}: package format {fmt}, this app reads {FORMAT_VERSION}")
+        start = len(MAGIC) + _HEADER.size
+        self.toc = json.loads(self._mm[start:start + toc_len])
+        self.version = self.toc["version"]
+        self.entry = _entry_from_dict(self.toc["exam"])
+        if self.has("conversion.json") and json.loads(bytes(self.section("conversion.json"))) != json.loads(json.dumps(SCORE_BANDS)):
+            _log.warning("%s was built with a different score conversion table than this app uses", path)
+
+    def has(self, name: str) -> bool:
+        return name in self.toc["sections"]
+
+    def section(self, name: str) -> memoryview:
+        offset, length = self.toc["sections"][name]
+        return memoryview(self._mm)[offset:offset + length]
+
+    def bank_df(self) -> pd.DataFrame:
+        if self.has("bank.parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            return pq.read_table(pa.BufferReader(pa.py_buffer(self.section("bank.parquet")))).to_pandas()
+        return pd.read_csv(io.BytesIO(self.section("bank.csv")))
+
+    def answer_keys(self) -> dict[str, dict[int, dict]]:
+        raw = json.loads(bytes(self.section("answer_keys.json")))
+        return {label: {int(q): e for q, e in key.items()} for label, key in raw.items()}
+
+    def roster(self) -> dict[str, str]:
+        return json.loads(bytes(self.section("roster.json"))) if self.has("roster.json") else {}
+
+    def image_data_uri(self, ref: str) -> str | None:
+        if not self.has(ref):
+            return None
+        data = base64.b64encode(self.section(ref)).decode("ascii")
+        return f"data:{self.toc['mimes'].get(ref, 'image/png')};base64,{data}"
+
+
+class PackagedBank(Bank):
+    """A bank served from a package: answer keys come prebuilt, images inline."""
+
+    def __init__(self, package: Package):
+        super().__init__(package.bank_df())
+        self.package = package
+        self._answer_keys.update(package.answer_keys())
+        self.static = True
+
+    def payloads(self, label: str) -> list[dict]:
+        if label not in self._payloads:
+            payloads = super().payloads(label)
+            for p in payloads:
+                if str(p.get("image_url") or "").startswith(IMAGE_REF):
+                    p["image_url"] = self.package.image_data_uri(p["image_url"])
+                    p["image"] = None
+        return self._payloads[label]
+
+
+_packages: dict[str, Package] | None = None
+_packages_lock = threading.Lock()
+
+
+def package_paths(folder: str) -> list[str]:
+    """Package files in ``folder`` (or ``folder`` itself when it is a package)."""
+    if folder.endswith(EXTENSION):
+        return [folder]
+    if not os.path.isdir(folder):
+        return []
+    return [os.path.join(folder, n) for n in sorted(os.listdir(folder)) if n.endswith(EXTENSION)]
+
+
+def packages() -> dict[str, Package]:
+    """{exam_id: Package} for every package in ``SAT_OFFLINE_PACKAGES`` (newest build wins)."""
+    global _packages
+    with _packages_lock:
+        if _packages is None:
+            found: dict[str, Package] = {}
+            for path in package_paths(os.environ.get(PACKAGES_ENV, "")):
+                pkg = Package(path)
+                current = found.get(pkg.entry.id)
+                if current is None or pkg.toc["built_at"] > current.toc["built_at"]:
+                    found[pkg.entry.id] = pkg
+            _packages = found
+        return _packages
+
+
+def package_for(entry: ExamEntry) -> Package:
+    pkg = packages().get(entry.id)
+    if pkg is None:
+        raise LookupError(f"no offline package for exam {entry.id!r} in {os.environ.get(PACKAGES_ENV)}")
+    return pkg
+
+
+def roster() -> dict[str, str]:
+    """{normalized username: password} merged from every package that carries one."""
+    merged = {}
+    for pkg in packages().values():
+        merged.update(pkg.roster())
+    return merged
+
+
+# ---------------------------
+# OUTBOX
+# ---------------------------
+_outbox_lock = threading.Lock()
+
+
+def outbox_path() -> str:
+    return os.environ.get(OUTBOX_ENV, DEFAULT_OUTBOX)
+
+
+def queue_result(user_name: str, payload: dict, kind: str, title: str, exam_id: str):
+    """Append a finished attempt (encoded engine state) to the local outbox, durably."""
+    pkg = packages().get(exam_id)
+    line = json.dumps({
+        "user": str(user_name).strip().lower(),
+        "exam_id": exam_id,
+        "kind": kind,
+        "title": title,
+        "package_version": pkg.version if pkg else None,
+        "queued_at": time.time(),
+        "state": payload,
+    }, separators=(",", ":"))
+    path = outbox_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _outbox_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_outbox(path: str):
+    """Queued results in order; a torn last line (power loss mid-write) is skipped."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
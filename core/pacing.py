@@ -0,0 +1,118 @@
+import json
+import os
+import statistics
+import time
+from collections import defaultdict
+
+import streamlit as st
+
+from core.bank import bank_for
+from core.catalog import get_entry
+from core.index import is_drill
+from core.questions import MODULE_MAPPING, MODULE_MINUTES
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Cohort pacing, precomputed by `python -m tools.pacing` from finished
+# attempts: per bank form, the cumulative 25th/50th/75th-percentile time a
+# student has spent by the time they reach each question. The exam header
+# compares elapsed module time against one entry: no queries while testing.
+PACING_ENV = "SAT_PACING"
+DEFAULT_PACING_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".state", "pacing.json")
+QUANTILES = {"p25": 0.25, "p50": 0.5, "p75": 0.75}
+MIN_SAMPLES = 5  # fewer timings than this for a question -> even pacing for it
+
+
+def build_table(samples: dict[int, list[float]], size: int, module_sec: float) -> dict[str, list[float]]:
+    """{"p25"|"p50"|"p75": cumulative seconds at the start of each q_index (size + 1 entries)}."""
+    even = module_sec / max(1, size)
+    table = {}
+    for name, q in QUANTILES.items():
+        cum, total = [0.0], 0.0
+        for q_index in range(size):
+            secs = sorted(samples.get(q_index, ()))
+            if len(secs) >= MIN_SAMPLES:
+                total += statistics.quantiles(secs, n=100, method="inclusive")[int(q * 100) - 1]
+            else:
+                total += even
+            cum.append(round(total, 1))
+        table[name] = cum
+    return table
+
+
+def pacing_key(entry, label: str) -> str:
+    """Tables are per bank source and form, so entries sharing a bank share pacing."""
+    sheet_url, worksheet = entry.source
+    return f"{sheet_url}|{worksheet or ''}|{label}"
+
+
+def collect_samples(attempts) -> tuple[dict[str, dict[int, list[float]]], dict[str, tuple[int, float]]]:
+    """({pacing key: {q_index: [seconds, ...]}}, {pacing key: (form size, module seconds)})
+    from finished (user, kind, state, updated_at) attempts. Drills are one-off forms and skipped."""
+    samples = defaultdict(lambda: defaultdict(list))
+    sizes = {}
+    for _, _, state, _ in attempts:
+        if not state.get("finished_all") or not state.get("selected_exam"):
+            continue
+        entry = get_entry(state["selected_exam"])
+        bank = bank_for(state)  # the version the attempt was pinned to
+        forms = state.get("module_forms") or MODULE_MAPPING
+        for (module_step, q_index), sec in state.get("question_times", {}).items():
+            label = forms.get(module_step)
+            if label is None or is_drill(label) or sec <= 0:
+                continue
+            key = pacing_key(entry, label)
+            if key not in sizes:
+                sizes[key] = (len(bank.form_rows(label)), MODULE_MINUTES.get(module_step, 32) * 60)
+            if q_index < sizes[key][0]:
+                samples[key][q_index].append(float(sec))
+    return samples, sizes
+
+
+def build_pacing(attempts) -> dict[str, dict[str, list[float]]]:
+    """{pacing key: table} for every form with any timings."""
+    samples, sizes = collect_samples(attempts)
+    return {key: build_table(per_q, *sizes[key]) for key, per_q in samples.items()}
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_pacing() -> dict[str, dict[str, list[float]]]:
+    """{form label: table}; empty when no pacing file has been built yet."""
+    path = os.environ.get(PACING_ENV, DEFAULT_PACING_PATH)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("forms", {})
+
+
+def write_pacing(tables: dict, path: str | None = None) -> str:
+    """Atomically replace the pacing file; running pages pick it up when the loader's TTL expires."""
+    path = path or os.environ.get(PACING_ENV, DEFAULT_PACING_PATH)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"built_at": time.time(), "forms": tables}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    load_pacing.clear()
+    return path
+
+
+def pace_status(table: dict[str, list[float]] | None, q_index: int, elapsed_sec: float,
+                size: int, module_sec: float) -> tuple[str, float]:
+    """("ahead" | "on_track" | "behind", seconds from the typical time) at this question.
+
+    Forms without a table, or whose table was built for a different form
+    size (the form changed since ``tools.pacing`` ran), are paced evenly.
+    """
+    q_index = max(0, min(q_index, size))
+    if table and len(table["p50"]) == size + 1:
+        lo, mid, hi = table["p25"][q_index], table["p50"][q_index], table["p75"][q_index]
+    else:
+        mid = module_sec * q_index / max(1, size)
+        lo, hi = mid * 0.85, mid * 1.15
+    if elapsed_sec > hi:
+        return "behind", elapsed_sec - mid
+    if elapsed_sec < lo:
+        return "ahead", mid - elapsed_sec
+    return "on_track", abs(elapsed_sec - mid)
@@ -0,0 +1,57 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from core import history, state_store
+from core.bank import get_bank
+from core.catalog import load_catalog
+from core.routing import default_forms
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Right after login, while the student is still reading the dashboard, a
+# worker thread loads the banks of the exams they are most likely to open
+# and compiles those exams' first modules (payloads + answer keys). The
+# dashboard then has the browser fetch that module's images, so "Start
+# Exam" renders the first question from warm caches.
+PREFETCH_EXAMS = 2
+
+_log = logging.getLogger(__name__)
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+
+
+def likely_exams(user_name: str, limit: int = PREFETCH_EXAMS) -> list[str]:
+    """Exam ids in order: unfinished attempts, exams assigned to this student, then the last taken."""
+    user = str(user_name).strip().lower()
+    entries = [e for e in load_catalog().values() if e.visible_to(user)]
+    store = state_store.get_store()
+
+    ranked = []
+    for e in entries:
+        stored = store.get(state_store.attempt_key(user, e.id))
+        if stored and not stored[1].get("finished_all", False):
+            ranked.append(e.id)
+    ranked += [e.id for e in entries if user in e.students]
+    rollups = history.get_history().rollups(user)
+    ranked += [exam_id for (exam_id, kind), _ in sorted(rollups.items(), key=lambda kv: -kv[1]["last"]["finished_at"])
+               if kind == "exam"]
+    ranked += [e.id for e in entries[:1]]  # nothing known yet: the first exam on the dashboard
+
+    visible = {e.id for e in entries}
+    return [exam_id for exam_id in dict.fromkeys(ranked) if exam_id in visible][:limit]
+
+
+def _warm(user_name: str) -> list[dict]:
+    catalog = load_catalog()
+    with_images = []
+    for exam_id in likely_exams(user_name):
+        bank = get_bank(exam_id)
+        with_images += bank.prefetch([default_forms(catalog[exam_id])[1]])
+    return with_images
+
+
+def submit(user_name: str) -> Future:
+    """Warm the likely exams in the background; the future yields first-module payloads with images."""
+    future = _pool.submit(_warm, user_name)
+    future.add_done_callback(lambda f: f.exception() and _log.warning("login prefetch failed: %s", f.exception()))
+    return future
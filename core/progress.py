@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from core.backends import PerBackend, RedisBackend, SQLiteBackend
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# exam.py publishes one small progress row per attempt whenever it changes.
+# Every row carries a global sequence number, so a reader asks for "rows
+# changed since seq N" and pays only for what moved. The board lives next
+# to the engine state (same SAT_STATE_BACKEND), so every worker feeds the
+# same view. Each row also carries the session's last interaction (a full
+# rerun, see core/sessions.py), republished at most every HEARTBEAT_SEC while
+# nothing else changes, so "stalled" means the student stopped interacting,
+# not that the row happened to stay the same.
+PROCTORS_ENV = "SAT_PROCTORS"  # comma-separated usernames allowed on the proctor page
+STALLED_AFTER_SEC = 180  # no interaction for this long while testing -> stalled
+HEARTBEAT_SEC = 30
+
+
+def is_proctor(user_name: str) -> bool:
+    allowed = {u.strip().lower() for u in os.environ.get(PROCTORS_ENV, "").split(",") if u.strip()}
+    return str(user_name).strip().lower() in allowed
+
+
+# ---------------------------
+# BOARDS
+# ---------------------------
+class MemoryProgressBoard:
+    """Process-local board: latest row per attempt, ordered by last change."""
+
+    def __init__(self):
+        self._rows: OrderedDict[str, tuple[int, dict]] = OrderedDict()
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def publish(self, key: str, row: dict) -> int:
+        with self._lock:
+            self._seq += 1
+            self._rows[key] = (self._seq, row)
+            self._rows.move_to_end(key)
+            return self._seq
+
+    def changes_since(self, seq: int) -> tuple[int, dict[str, dict]]:
+        """(latest seq, {attempt key: row}) for rows changed after ``seq``; walks only those."""
+        changed = {}
+        with self._lock:
+            for key in reversed(self._rows):
+                row_seq, row = self._rows[key]
+                if row_seq <= seq:
+                    break
+                changed[key] = row
+            return self._seq, changed
+
+
+class SQLiteProgressBoard(SQLiteBackend):
+    """Shared by worker processes through the state store's SQLite file."""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS attempt_progress ("
+        " attempt_key TEXT PRIMARY KEY, seq INTEGER NOT NULL, row TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS attempt_progress_seq ON attempt_progress (seq)",
+    )
+
+    def publish(self, key: str, row: dict) -> int:
+        # the seq is taken inside the write itself, so concurrent writers never share one
+        return self._conn().execute(
+            "INSERT INTO attempt_progress (attempt_key, seq, row)"
+            " VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM attempt_progress), ?)"
+            " ON CONFLICT(attempt_key) DO UPDATE SET seq = excluded.seq, row = excluded.row"
+            " RETURNING seq",
+            (key, json.dumps(row, separators=(",", ":"))),
+        ).fetchone()[0]
+
+    def changes_since(self, seq: int) -> tuple[int, dict[str, dict]]:
+        rows = self._conn().execute(
+            "SELECT attempt_key, seq, row FROM attempt_progress WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+        latest = rows[-1][1] if rows else seq
+        return latest, {key: json.loads(row) for key, _, row in rows}
+
+
+class RedisProgressBoard(RedisBackend):
+    """Shared across hosts: a sorted set of keys by seq plus a hash of rows."""
+
+    def __init__(self, url: str, client=None):
+        super().__init__(url, client)
+        self._publish = self.r.register_script(
+            "local s = redis.call('INCR', 'sat:progress:seq') "
+            "redis.call('ZADD', 'sat:progress:order', s, ARGV[1]) "
+            "redis.call('HSET', 'sat:progress:rows', ARGV[1], ARGV[2]) return s"
+        )
+
+    def publish(self, key: str, row: dict) -> int:
+        return int(self._publish(args=[key, json.dumps(row, separators=(",", ":"))]))
+
+    def changes_since(self, seq: int) -> tuple[int, dict[str, dict]]:
+        pairs = self.r.zrangebyscore("sat:progress:order", f"({seq}", "+inf", withscores=True)
+        if not pairs:
+            return seq, {}
+        keys = [k.decode() for k, _ in pairs]
+        rows = self.r.hmget("sat:progress:rows", keys)
+        return int(pairs[-1][1]), {k: json.loads(v) for k, v in zip(keys, rows) if v}
+
+
+# The process-wide board for the configured ``SAT_STATE_BACKEND``.
+get_board = PerBackend(MemoryProgressBoard, SQLiteProgressBoard, RedisProgressBoard)
+
+
+# ---------------------------
+# SESSION HOOK
+# ---------------------------
+def publish(session_state, key: str, row: dict, seen_at: float | None = None):
+    """Publish ``row`` for this attempt unless it equals the last one this session sent.
+
+    ``seen_at`` is the session's last interaction; an unchanged row is
+    republished once that has moved on by ``HEARTBEAT_SEC``.
+    """
+    now = time.time()
+    seen_at = seen_at or now
+    if session_state.get("_progress_last") == row and seen_at - session_state.get("_progress_seen", 0) < HEARTBEAT_SEC:
+        return
+    get_board().publish(key, {**row, "updated_at": now, "last_seen": seen_at})
+    session_state["_progress_last"] = row
+    session_state["_progress_seen"] = seen_at
+
+
+def last_seen(row: dict, now: float | None = None) -> float:
+    """When the student last interacted (rows from before heartbeats: last change)."""
+    return row.get("last_seen", row.get("updated_at", now or time.time()))
+
+
+def status(row: dict, now: float | None = None) -> str:
+    """testing / review / break / finished / stalled."""
+    now = now or time.time()
+    if row.get("finished"):
+        return "finished"
+    if row.get("on_break"):
+        return "break"
+    if now - last_seen(row, now) > STALLED_AFTER_SEC:
+        return "stalled"
+    return "review" if row.get("viewing_review") else "testing"
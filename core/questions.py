@@ -0,0 +1,119 @@
+import pandas as pd
+
+from core import assets
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+MODULE_MAPPING = {
+    1: "Session 1 Module 1",
+    2: "Session 1 Module 2",
+    3: "Session 2 Module 1",
+    4: "Session 2 Module 2",
+}
+MODULE_MINUTES = {1: 32, 2: 32, 3: 35, 4: 35}
+
+
+# ---------------------------
+# HELPERS
+# ---------------------------
+def normalize_text(text: str) -> str:
+    if not isinstance(text, str):
+        return ""
+    return text.replace("\r\n", "\n").replace("\r", "\n").strip()
+
+
+def normalize_image_url(url: str | None) -> str | None:
+    if not isinstance(url, str):
+        return None
+    url = url.strip()
+    if not url:
+        return None
+
+    # Google Drive file link -> direct view link
+    if "drive.google.com/file/d/" in url:
+        file_id = url.split("/file/d/")[1].split("/")[0]
+        return f"https://drive.google.com/uc?export=view&id={file_id}"
+
+    # GitHub blob -> raw
+    if "github.com/" in url and "/blob/" in url:
+        parts = url.split("github.com/")[1].split("/blob/")
+        if len(parts) == 2:
+            repo_part = parts[0]
+            path_part = parts[1]
+            return f"https://raw.githubusercontent.com/{repo_part}/{path_part}".replace("?raw=true", "")
+
+    return url
+
+
+def source_image_url(row, col="Image_URL") -> str | None:
+    """The row's image link as authored (normalized), before any asset-build resolution."""
+    raw = row.get(col)
+    if raw is None or (isinstance(raw, float) and pd.isna(raw)):
+        return None
+    s = str(raw).strip()
+    if s == "" or s.lower() in ("nan", "none", "null", "0", "false"):
+        return None
+    return normalize_image_url(s)
+
+
+def get_image_url(row, col="Image_URL") -> str | None:
+    """Image URL for a row; assets/images/ files resolve to their optimized build."""
+    return assets.resolve(source_image_url(row, col))
+
+
+def get_question_type(row) -> str:
+    qt = row.get("Question_Type", "MCQ")
+    qt = str(qt).strip().upper() if qt is not None else "MCQ"
+    return qt if qt in ("MCQ", "SPR") else "MCQ"
+
+
+def table_html(table_data) -> str | None:
+    """Render a ``Table_Data`` cell ("h1,h2;v1,v2;...") as an HTML table."""
+    if table_data is None or pd.isna(table_data):
+        return None
+    try:
+        rows = [rr.split(",") for rr in str(table_data).split(";")]
+        html = "<table style='width:100%; border-collapse: collapse; margin-bottom: 10px;'>"
+        html += "<tr>" + "".join(
+            f"<th style='border:1px solid #e5e7eb; padding:6px; background:#f9fafb;'>{c.strip()}</th>"
+            for c in rows[0]
+        ) + "</tr>"
+        for row in rows[1:]:
+            html += "<tr>" + "".join(
+                f"<td style='border:1px solid #e5e7eb; padding:6px;'>{c.strip()}</td>" for c in row
+            ) + "</tr>"
+        html += "</table>"
+        return html
+    except Exception:
+        return None
+
+
+def module_frame(full_df: pd.DataFrame, session_label: str) -> pd.DataFrame:
+    """Questions of one module, re-indexed so q_index == row position."""
+    return full_df[full_df["Session"] == session_label].reset_index(drop=True)
+
+
+def image_html(image_url: str | None, image: dict | None = None, attrs: str = "") -> str:
+    """``<img>`` for a question image; a ``<picture>`` with WebP and 1x/2x sources when built."""
+    if image:
+        return (
+            f'<picture><source type="image/webp" srcset="{image["webp_srcset"]}" />'
+            f'<img src="{image["src"]}" srcset="{image["srcset"]}" '
+            f'width="{image["width"]}" height="{image["height"]}" {attrs}/></picture>'
+        )
+    return f'<img src="{image_url}" {attrs}/>' if image_url else ""
+
+
+def compile_question(row) -> dict:
+    """Everything the question page renders for one row, computed once per bank load."""
+    image = source_image_url(row, col="Image_URL")
+    return {
+        "type": get_question_type(row),
+        "content": normalize_text(row.get("Content", "")),
+        "prompt": row.get("Prompt", ""),
+        "options": [f"{row.get(f'Option_{letter}', '')}" for letter in "ABCD"],
+        "table_html": table_html(row.get("Table_Data")),
+        "image_url": assets.resolve(image),
+        "image": assets.variants(image),  # srcsets and intrinsic size, when built
+    }
@@ -0,0 +1,129 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Every Sheets call (core.sheets.connect) spends one token from a
+# process-wide bucket sized to the per-minute API quota. When the bucket is
+# short, callers queue by priority class, and lower classes cannot dip into
+# the last part of the bucket, which stays reserved for the classes above
+# them. A burst of logins therefore never starves a result write. Waiters
+# give up at their class deadline with QuotaTimeout; result writes wait as
+# long as it takes.
+QUOTA_ENV = "SAT_SHEETS_QUOTA_PER_MIN"
+DEFAULT_QUOTA_PER_MIN = 60
+
+RESULT_WRITE, SIGNUP, QUESTION_REFRESH, USER_INDEX_REFRESH = range(4)
+CLASS_NAMES = {
+    RESULT_WRITE: "result_write",
+    SIGNUP: "signup",
+    QUESTION_REFRESH: "question_refresh",
+    USER_INDEX_REFRESH: "user_index_refresh",
+}
+DEADLINE_SEC = {RESULT_WRITE: None, SIGNUP: 20.0, QUESTION_REFRESH: 30.0, USER_INDEX_REFRESH: 10.0}
+RESERVE = {RESULT_WRITE: 0.0, SIGNUP: 0.05, QUESTION_REFRESH: 0.15, USER_INDEX_REFRESH: 0.3}  # share of the bucket
+
+
+class QuotaTimeout(TimeoutError):
+    """A Sheets call waited past its class deadline without getting quota."""
+
+
+class QuotaScheduler:
+    """Token bucket with a priority queue of waiters in front of it."""
+
+    def __init__(self, per_minute: float = DEFAULT_QUOTA_PER_MIN, burst: float | None = None):
+        self.rate = max(1e-3, per_minute / 60.0)
+        self.burst = float(burst or per_minute)
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._waiters: list[tuple[int, int]] = []  # heap of (priority, arrival)
+        self._arrivals = itertools.count()
+        self._cond = threading.Condition()
+        self._metrics = {
+            name: {"granted": 0, "throttled": 0, "timed_out": 0, "wait_sec": 0.0, "max_wait_sec": 0.0}
+            for name in CLASS_NAMES.values()
+        }
+
+    def acquire(self, priority: int, deadline_sec: float | None = None) -> float:
+        """Block until this call may go out; returns seconds waited.
+
+        Raises QuotaTimeout once ``deadline_sec`` passes first.
+        """
+        t0 = time.monotonic()
+        expires = t0 + deadline_sec if deadline_sec is not None else None
+        floor = RESERVE[priority] * self.burst + 1
+        me = (priority, next(self._arrivals))
+        stats = self._metrics[CLASS_NAMES[priority]]
+        with self._cond:
+            heapq.heappush(self._waiters, me)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._waiters[0] == me and self._tokens >= floor:
+                    heapq.heappop(self._waiters)
+                    self._tokens -= 1
+                    self._cond.notify_all()  # the next waiter may be able to go too
+                    waited = now - t0
+                    stats["granted"] += 1
+                    stats["wait_sec"] += waited
+                    stats["max_wait_sec"] = max(stats["max_wait_sec"], waited)
+                    stats["throttled"] += waited > 0.001
+                    return waited
+                if expires is not None and now >= expires:
+                    self._waiters.remove(me)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                    stats["timed_out"] += 1
+                    raise QuotaTimeout(
+                        f"Sheets quota: {CLASS_NAMES[priority]} call waited {now - t0:.1f}s without a slot"
+                    )
+                wait = max(0.01, (floor - self._tokens) / self.rate)
+                if expires is not None:
+                    wait = min(wait, expires - now)
+                self._cond.wait(wait)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def metrics(self) -> dict:
+        """Per-class counters plus the current bucket level and queue depth."""
+        with self._cond:
+            self._refill(time.monotonic())
+            out = {name: dict(m) for name, m in self._metrics.items()}
+            out["tokens"] = round(self._tokens, 2)
+            out["queued"] = len(self._waiters)
+            return out
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def scheduler() -> QuotaScheduler:
+    """The process-wide scheduler, sized from ``SAT_SHEETS_QUOTA_PER_MIN``."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = QuotaScheduler(float(os.environ.get(QUOTA_ENV, DEFAULT_QUOTA_PER_MIN)))
+        return _scheduler
+
+
+class ScheduledConnection:
+    """Wraps a sheets connection so each read/update first takes quota for its class."""
+
+    def __init__(self, conn, priority: int):
+        self.conn = conn
+        self.priority = priority
+
+    def read(self, *args, **kwargs):
+        scheduler().acquire(self.priority, DEADLINE_SEC[self.priority])
+        return self.conn.read(*args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        scheduler().acquire(self.priority, DEADLINE_SEC[self.priority])
+        return self.conn.update(*args, **kwargs)
@@ -0,0 +1,196 @@
+import html
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from core.bank import bank_for
+from core.results import attempt_id, attempt_mapping, confidence_label, content_hash, grade_state
+from core.scoring import estimate_section_range_harder, fmt_time
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Finished attempts are rendered to a static document off the request path
+# and kept on disk as <attempt id>-<content hash>.html (and .pdf when
+# WeasyPrint is installed). A regrade changes the hash, so stale documents
+# are never served.
+REPORT_DIR_ENV = "SAT_REPORT_DIR"
+DEFAULT_REPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".reports")
+REPORT_WORKERS = 2
+
+_pool = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report")
+_pending: dict[str, Future] = {}
+_failed: dict[str, str] = {}  # report key -> error of its last render
+_pending_lock = threading.Lock()
+_log = logging.getLogger(__name__)
+
+
+def report_dir() -> str:
+    path = os.environ.get(REPORT_DIR_ENV, DEFAULT_REPORT_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def report_key(user_name: str, state, kind: str = "exam") -> str:
+    bank = bank_for(state)
+    safe_id = attempt_id(user_name, state, kind).replace(":", "_").replace("@", "_")
+    return f"{safe_id}-{content_hash(bank, state)}"
+
+
+def cached(key: str) -> dict[str, str]:
+    """{"html": path, "pdf": path} for whatever is already rendered."""
+    out = {}
+    for ext in ("html", "pdf"):
+        path = os.path.join(report_dir(), f"{key}.{ext}")
+        if os.path.exists(path):
+            out[ext] = path
+    return out
+
+
+def submit(user_name: str, state, kind: str = "exam", title: str = "") -> str:
+    """Queue rendering of a finished attempt (no-op if cached, in flight or failed); returns its report key.
+
+    ``state`` is copied, so the caller's session can move on immediately.
+    """
+    snapshot = {k: state[k] for k in ("selected_exam", "bank_version", "exam_finished_at", "responses",
+                                      "question_times", "module_forms") if k in state}
+    key = report_key(user_name, snapshot, kind)
+    with _pending_lock:
+        if "html" in cached(key) or key in _pending or key in _failed:
+            return key
+        future = _pool.submit(_render, key, user_name, snapshot, kind, title)
+        _pending[key] = future
+    future.add_done_callback(lambda f: _forget(key, f))  # runs here if already done: keep it outside the lock
+    return key
+
+
+def failed(key: str) -> str | None:
+    """Why the last render of this report failed, or None."""
+    with _pending_lock:
+        return _failed.get(key)
+
+
+def retry(key: str):
+    """Let the next :func:`submit` of this report try again."""
+    with _pending_lock:
+        _failed.pop(key, None)
+
+
+def _forget(key: str, future: Future):
+    error = future.exception()
+    if error is not None:
+        _log.error("report %s failed to render", key, exc_info=error)
+    with _pending_lock:
+        _pending.pop(key, None)
+        if error is not None:
+            _failed[key] = f"{type(error).__name__}: {error}"
+
+
+def _render(key: str, user_name: str, state: dict, kind: str, title: str):
+    doc = render_html(user_name, state, kind, title)
+    folder = report_dir()
+    _write_atomic(os.path.join(folder, f"{key}.html"), doc.encode("utf-8"))
+    try:
+        from weasyprint import HTML  # optional dependency for the PDF copy
+    except ImportError:
+        return
+    _write_atomic(os.path.join(folder, f"{key}.pdf"), HTML(string=doc).write_pdf())
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# ---------------------------
+# RENDERING
+# ---------------------------
+_CSS = """
+body { font-family: -apple-system, Segoe UI, Roboto, sans-serif; color: #111827; margin: 32px; }
+h1 { margin: 0 0 4px 0; } h2 { margin-top: 28px; }
+.muted { color: #6b7280; }
+.cards { display: flex; gap: 16px; margin-top: 16px; }
+.card { flex: 1; border: 1px solid #e5e7eb; border-radius: 12px; padding: 14px 16px; }
+.card .label { font-size: 12px; color: #6b7280; font-weight: 800; }
+.card .value { font-size: 28px; font-weight: 900; margin-top: 4px; }
+table { width: 100%; border-collapse: collapse; font-size: 12px; }
+th, td { border: 1px solid #e5e7eb; padding: 5px 7px; text-align: left; }
+th { background: #f9fafb; }
+tr { page-break-inside: avoid; }
+"""
+
+
+def _card(label: str, value: str, note: str = "") -> str:
+    note_html = f"<div class='muted'>{html.escape(note)}</div>" if note else ""
+    return (
+        f"<div class='card'><div class='label'>{html.escape(label)}</div>"
+        f"<div class='value'>{html.escape(value)}</div>{note_html}</div>"
+    )
+
+
+def render_html(user_name: str, state, kind: str = "exam", title: str = "") -> str:
+    """The score page's content as one static HTML document."""
+    bank = bank_for(state)
+    score_df, per_module = grade_state(bank, state, kind)
+    mapping = attempt_mapping(kind)
+
+    total_correct = sum(m["correct"] for m in per_module.values())
+    total_count = sum(m["total"] for m in per_module.values())
+    total_time = sum(m["time_sec"] for m in per_module.values())
+    pct = (total_correct / total_count * 100) if total_count else 0
+
+    cards = []
+    if kind != "drill":
+        rw_lo, rw_hi, _ = estimate_section_range_harder(
+            per_module[1]["correct"] + per_module[2]["correct"], per_module[1]["total"] + per_module[2]["total"]
+        )
+        m_lo, m_hi, _ = estimate_section_range_harder(
+            per_module[3]["correct"] + per_module[4]["correct"], per_module[3]["total"] + per_module[4]["total"]
+        )
+        answered = int(score_df["Answered?"].eq("Yes").sum())
+        conf = confidence_label(rw_lo + m_lo, rw_hi + m_hi, answered, total_count)
+        cards += [
+            _card("Estimated Total SAT", f"{rw_lo + m_lo}–{rw_hi + m_hi}", conf),
+            _card("Reading & Writing", f"{rw_lo}–{rw_hi}"),
+            _card("Math", f"{m_lo}–{m_hi}"),
+        ]
+    cards += [
+        _card("Total Correct", f"{total_correct} / {total_count}"),
+        _card("Overall Accuracy", f"{pct:.1f}%"),
+        _card("Total Time", fmt_time(total_time)),
+    ]
+
+    breakdown = "".join(
+        f"<tr><td>{html.escape(mapping[m])}</td><td>{row['correct']}/{row['total']}</td>"
+        f"<td>{(row['correct'] / row['total'] * 100) if row['total'] else 0:.1f}%</td>"
+        f"<td>{fmt_time(row['time_sec'])}</td></tr>"
+        for m, row in per_module.items()
+    )
+    slowest = score_df.sort_values("Time (sec)", ascending=False).head(10)[
+        ["Module", "Q#", "Time", "Answered?", "Result"]
+    ]
+    review = score_df[["Module", "Q#", "Type", "Time", "Answered?", "Student", "Correct", "Result"]]
+
+    finished = state.get("exam_finished_at")
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(float(finished))) if finished else ""
+    note = "Estimated score range based on historical SAT difficulty. This is not an official College Board score."
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Score Report</title><style>{_CSS}</style></head>
+<body>
+<h1>Score Report</h1>
+<div class="muted">{html.escape(title or str(state.get("selected_exam", "")))} • {html.escape(user_name)} • {when}</div>
+<div class="cards">{"".join(cards[:3])}</div>
+<div class="cards">{"".join(cards[3:])}</div>
+{"" if kind == "drill" else f'<p class="muted">{note}</p>'}
+<h2>Module Breakdown</h2>
+<table><tr><th>Module</th><th>Correct</th><th>Accuracy</th><th>Time</th></tr>{breakdown}</table>
+<h2>Slowest Questions</h2>
+{slowest.to_html(index=False, border=0)}
+<h2>Detailed Review</h2>
+{review.to_html(index=False, border=0)}
+</body></html>
+"""
@@ -0,0 +1,56 @@
+import hashlib
+import json
+
+import pandas as pd
+
+from core.bank import Bank
+from core.index import DRILL_TITLE
+from core.questions import MODULE_MAPPING
+from core import state_store
+from core.scoring import grade_attempt
+
+
+def attempt_mapping(kind: str = "exam") -> dict[int, str]:
+    """Module names an attempt is reported under."""
+    return {1: DRILL_TITLE} if kind == "drill" else MODULE_MAPPING
+
+
+def grade_state(bank: Bank, state, kind: str = "exam") -> tuple[pd.DataFrame, dict]:
+    """``grade_attempt`` for engine state (session_state or a stored attempt), against the forms it took."""
+    forms = state.get("module_forms") or MODULE_MAPPING
+    return grade_attempt(
+        None,
+        state.get("responses", {}),
+        state.get("question_times", {}),
+        attempt_mapping(kind),
+        answer_key=bank.answer_key_for(forms),
+    )
+
+
+def attempt_id(user_name: str, state, kind: str = "exam") -> str:
+    """Stable id of one finished attempt: its store key plus the finish time."""
+    key = state_store.attempt_key(user_name, state.get("selected_exam"), kind)
+    return f"{key}@{int(float(state.get('exam_finished_at') or 0))}"
+
+
+def content_hash(bank: Bank, state) -> str:
+    """Changes whenever the answers, timings, forms or their answer key change (a regrade)."""
+    forms = state.get("module_forms") or MODULE_MAPPING
+    payload = state_store.encode_state(
+        {k: state[k] for k in ("responses", "question_times", "module_forms") if k in state}
+    )
+    payload["key"] = sorted((f"{m}:{q}", e["norm"]) for (m, q), e in bank.answer_key_for(forms).items())
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=10).hexdigest()
+
+
+def confidence_label(lo: int, hi: int, answered: int, total: int) -> str:
+    width = hi - lo
+    answered_rate = (answered / total) if total else 0
+
+    if answered_rate < 0.75:
+        return "Low confidence"
+    if width <= 40 and answered_rate >= 0.95:
+        return "High confidence"
+    if width <= 80:
+        return "Medium confidence"
+    return "Low confidence"
@@ -0,0 +1,36 @@
+from core.catalog import ExamEntry
+from core.questions import MODULE_MAPPING
+
+# Module 2 of each section is routed from Module 1 of the same section.
+ROUTED_FROM = {1: 2, 3: 4}
+
+
+def default_forms(entry: ExamEntry | None = None) -> dict[int, str]:
+    """Starting forms: the label each module_step reads its questions from."""
+    return dict(entry.forms) if entry is not None and entry.forms else dict(MODULE_MAPPING)
+
+
+def candidate_forms(entry: ExamEntry, available: set[str], next_step: int) -> dict[str, str]:
+    """{"easier": label, "harder": label} for a routed step, or {} when not adaptive.
+
+    Forms missing from the bank are ignored so a half-built manifest never
+    routes a student into an empty module.
+    """
+    rule = entry.routing.get(next_step)
+    if not rule or rule["easier"] not in available or rule["harder"] not in available:
+        return {}
+    return {"easier": rule["easier"], "harder": rule["harder"]}
+
+
+def route(entry: ExamEntry, available: set[str], next_step: int, correct: int, total: int,
+          current: str | None = None) -> str:
+    """Label of the form the student gets for ``next_step``.
+
+    Without routing candidates the step keeps ``current`` (the form the
+    attempt already holds, e.g. an assembled one), else the entry's default.
+    """
+    forms = candidate_forms(entry, available, next_step)
+    if not forms:
+        return current or default_forms(entry).get(next_step, MODULE_MAPPING[next_step])
+    pct01 = (correct / total) if total else 0.0
+    return forms["harder"] if pct01 >= entry.routing[next_step]["threshold"] else forms["easier"]
@@ -0,0 +1,154 @@
+import re
+
+import pandas as pd
+
+from core.questions import MODULE_MAPPING, get_question_type, module_frame
+
+
+# -----------------------------
+# HELPERS
+# -----------------------------
+def normalize_answer(x: str) -> str:
+    """Normalize for comparison (works for MCQ + basic SPR)."""
+    if x is None:
+        return ""
+    s = str(x).strip()
+    s = s.replace("−", "-")          # minus sign variants
+    s = s.replace(" ", "")           # ignore spaces
+    s = s.replace("\u00a0", "")      # non-breaking spaces
+
+    # If it's like "A)" or "A." -> keep just A
+    if re.match(r"^[A-Da-d][\)\.\:]", s):
+        s = s[0]
+
+    return s.upper()
+
+def is_correct(student_val: str, correct_val: str, qtype: str) -> bool:
+    s = normalize_answer(student_val)
+    c = normalize_answer(correct_val)
+    if qtype == "MCQ":
+        return s == c
+    return s == c
+
+def fmt_time(seconds: float) -> str:
+    seconds = float(seconds or 0)
+    m = int(seconds // 60)
+    s = int(round(seconds % 60))
+    return f"{m:02d}:{s:02d}"
+
+# -----------------------------
+# SAT RANGE (Harder Approx.)
+# -----------------------------
+# (lo, hi, (score lo, score hi)) per accuracy band; offline packages carry a copy
+SCORE_BANDS = [
+    (0.00, 0.10, (200, 250)),
+    (0.10, 0.20, (250, 310)),
+    (0.20, 0.30, (310, 370)),
+    (0.30, 0.40, (370, 450)),
+    (0.40, 0.50, (450, 530)),
+    (0.50, 0.60, (530, 610)),
+    (0.60, 0.70, (610, 690)),
+    (0.70, 0.80, (690, 750)),
+    (0.80, 0.85, (750, 770)),
+    (0.85, 0.90, (770, 790)),
+    (0.90, 0.93, (790, 800)),
+    (0.93, 1.01, (800, 800)),  # include 100%
+]
+
+
+def score_range_from_pct_harder(pct01: float) -> tuple[int, int]:
+    # pct01 is 0.0 to 1.0
+    pct01 = max(0.0, min(1.0, float(pct01 or 0)))
+
+    for lo, hi, rng in SCORE_BANDS:
+        if lo <= pct01 < hi:
+            return rng
+    return (200, 800)
+
+
+def estimate_section_range_harder(correct: int, total: int) -> tuple[int, int, float]:
+    pct01 = (correct / total) if total else 0.0
+    lo, hi = score_range_from_pct_harder(pct01)
+    return lo, hi, pct01
+
+# -----------------------------
+# SCORE CALCULATION
+# -----------------------------
+def answer_entry(row) -> dict:
+    """{"type", "correct", "norm"} for one question row."""
+    correct = row.get("Correct_Answer", "")
+    return {
+        "type": get_question_type(row),
+        "correct": correct,
+        "norm": normalize_answer(correct),
+    }
+
+
+def form_answer_key(df_form: pd.DataFrame) -> dict[int, dict]:
+    """{q_index: {"type", "correct", "norm"}} for one form (rows in q_index order)."""
+    return {q_index: answer_entry(df_form.iloc[q_index]) for q_index in range(len(df_form))}
+
+
+def build_answer_key(full_df: pd.DataFrame, module_mapping: dict[int, str] = MODULE_MAPPING) -> dict:
+    """{(module_step, q_index): {"type", "correct", "norm"}} for every question."""
+    return {
+        (module_step, q_index): entry
+        for module_step, session_label in module_mapping.items()
+        for q_index, entry in form_answer_key(module_frame(full_df, session_label)).items()
+    }
+
+
+def grade_attempt(full_df: pd.DataFrame | None, responses: dict, question_times: dict,
+                  module_mapping: dict[int, str] = MODULE_MAPPING,
+                  answer_key: dict | None = None) -> tuple[pd.DataFrame, dict]:
+    """Grade every question of every module.
+
+    Pass a prebuilt ``answer_key`` to skip walking the question rows.
+    Returns the per-question ``score_df`` and ``per_module`` totals
+    ({module_step: {"correct", "total", "time_sec"}}).
+    """
+    if answer_key is None:
+        answer_key = build_answer_key(full_df, module_mapping)
+
+    rows = []
+    per_module = {m: {"correct": 0, "total": 0, "time_sec": 0.0} for m in module_mapping.keys()}
+
+    for (module_step, q_index), entry in answer_key.items():
+        if module_step not in per_module:
+            continue
+        qtype = entry["type"]
+        resp = responses.get((module_step, q_index), None)
+
+        student_val = ""
+        answered = False
+        if resp is not None:
+            student_val = resp.get("value", "")
+            answered = str(student_val).strip() != ""
+
+        correct_bool = False
+        if answered:
+            correct_bool = normalize_answer(student_val) == entry["norm"]
+
+        # time
+        t_sec = float(question_times.get((module_step, q_index), 0.0))
+        per_module[module_step]["time_sec"] += t_sec
+        per_module[module_step]["total"] += 1
+
+        if correct_bool:
+            per_module[module_step]["correct"] += 1
+
+        rows.append(
+            {
+                "Module": module_mapping[module_step],
+                "Q#": q_index + 1,
+                "Type": qtype,
+                "Time (sec)": round(t_sec, 2),
+                "Time": fmt_time(t_sec),
+                "Answered?": "Yes" if answered else "No",
+                "Student": student_val,
+                "Correct": entry["correct"],
+                "Result": "✅ Correct" if correct_bool else ("❌ Wrong" if answered else "— Unanswered"),
+            }
+        )
+
+    return pd.DataFrame(rows), per_module
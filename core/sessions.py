@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from core.state_store import ENGINE_KEYS, encode_state
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Every exam session reports its last interaction (a full rerun) and the
+# size of its engine state. A reaper thread marks sessions idle for longer
+# than SAT_IDLE_SEC; on its next timer tick such a session checkpoints its
+# attempt to the state store, drops its engine state and stops its timer
+# fragments, leaving a small "paused" page. Coming back reloads the attempt
+# from the store like any other resume. The module clock keeps running
+# meanwhile, exactly as it does for a closed tab.
+IDLE_ENV = "SAT_IDLE_SEC"
+DEFAULT_IDLE_SEC = 15 * 60
+REAP_EVERY_SEC = 30
+GONE_AFTER_SEC = 120  # no tick at all for this long: the tab is gone, forget the entry
+KEEP_KEYS = ("selected_exam", "selected_exam_title")  # enough to find the attempt again
+DERIVED_KEYS = ("live_correct", "_progress_last", "_progress_seen", "_score_memo",
+                "_state_key", "_state_version", "_state_digest")
+
+_log = logging.getLogger(__name__)
+_sessions: dict[str, dict] = {}
+_lock = threading.Lock()
+_reaper: threading.Thread | None = None
+
+
+def idle_sec() -> float:
+    return float(os.environ.get(IDLE_ENV, DEFAULT_IDLE_SEC))
+
+
+def session_id() -> str | None:
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def touch(session_state, attempt: str):
+    """Record an interaction; call from full reruns only (not timer ticks).
+
+    Memory is accounted as the size of the encoded engine state, which is
+    what grows with the attempt (responses, flags, question times).
+    """
+    sid = session_id()
+    if sid is None:
+        return
+    nbytes = len(json.dumps(encode_state(session_state), default=str))
+    now = time.time()
+    with _lock:
+        _sessions[sid] = {
+            "user": session_state.get("user_name", ""),
+            "attempt": attempt,
+            "bytes": nbytes,
+            "last_interaction": now,
+            "last_tick": now,
+            "reap": False,
+        }
+    start_reaper()
+
+
+def last_seen() -> float | None:
+    """When this session last had a full rerun (see :func:`touch`)."""
+    with _lock:
+        row = _sessions.get(session_id())
+        return row["last_interaction"] if row else None
+
+
+def should_park() -> bool:
+    """Called on every timer tick: keeps the entry alive and says whether to park now."""
+    sid = session_id()
+    with _lock:
+        row = _sessions.get(sid)
+        if row is None:
+            return False
+        row["last_tick"] = time.time()
+        return row["reap"]
+
+
+def park(session_state, attempt: str):
+    """Drop this session's engine state (already checkpointed) and mark it parked on ``attempt``."""
+    for k in ENGINE_KEYS + list(DERIVED_KEYS):
+        if k not in KEEP_KEYS:
+            session_state.pop(k, None)
+    for k in [k for k in session_state if str(k).endswith("_nonce")]:  # nav grid click ids
+        session_state.pop(k, None)
+    session_state["_parked"] = attempt
+    with _lock:
+        _sessions.pop(session_id(), None)
+
+
+def reap(now: float | None = None) -> list[str]:
+    """Mark idle sessions for parking and forget vanished ones; returns the newly marked ids."""
+    now = now or time.time()
+    limit = idle_sec()
+    marked = []
+    with _lock:
+        for sid, row in list(_sessions.items()):
+            if now - row["last_tick"] > GONE_AFTER_SEC:
+                del _sessions[sid]
+            elif not row["reap"] and now - row["last_interaction"] > limit:
+                row["reap"] = True
+                marked.append(sid)
+    return marked
+
+
+def stats() -> dict:
+    """Live exam sessions in this process and the engine state they hold."""
+    now = time.time()
+    with _lock:
+        rows = list(_sessions.values())
+    return {
+        "sessions": len(rows),
+        "idle": sum(1 for r in rows if now - r["last_interaction"] > idle_sec()),
+        "bytes": sum(r["bytes"] for r in rows),
+        "largest": sorted(
+            ({"user": r["user"], "attempt": r["attempt"], "bytes": r["bytes"],
+              "idle_sec": round(now - r["last_interaction"])} for r in rows),
+            key=lambda r: -r["bytes"],
+        )[:10],
+    }
+
+
+def start_reaper() -> threading.Thread:
+    """Run :func:`reap` every ``REAP_EVERY_SEC`` on a daemon thread, once per process."""
+    global _reaper
+    with _lock:
+        if _reaper is None:
+            def run():
+                while True:
+                    time.sleep(REAP_EVERY_SEC)
+                    try:
+                        marked = reap()
+                        if marked:
+                            _log.info("parking %d idle session(s)", len(marked))
+                    except Exception:
+                        _log.exception("session reaper failed")
+
+            _reaper = threading.Thread(target=run, name="sat-session-reaper", daemon=True)
+            _reaper.start()
+        return _reaper
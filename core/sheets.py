@@ -0,0 +1,73 @@
+import os
+import re
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from core.quota import QUESTION_REFRESH, ScheduledConnection
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+URL = "https://docs.google.com/spreadsheets/d/1XLiSWYDUagXCsNbLKs_HE-BsaQzgFMw-M8FMU500f0M/edit?usp=sharing"
+
+# Point this at a folder of CSV files to run every page without Google Sheets
+# (load tests, local development). One CSV per worksheet; the default
+# worksheet is "Sheet1". A sub-folder named after the spreadsheet id takes
+# precedence, so several spreadsheets can live side by side.
+LOCAL_SHEETS_ENV = "SAT_LOCAL_SHEETS_DIR"
+DEFAULT_WORKSHEET = "Sheet1"
+
+
+def spreadsheet_id(url: str | None) -> str | None:
+    if not isinstance(url, str):
+        return None
+    m = re.search(r"/spreadsheets/d/([A-Za-z0-9_-]+)", url)
+    return m.group(1) if m else None
+
+
+class LocalSheetsConnection:
+    """CSV-backed stand-in exposing the read/update calls we use on GSheetsConnection."""
+
+    _lock = threading.Lock()
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, spreadsheet: str | None, worksheet: str | None) -> str:
+        name = f"{worksheet or DEFAULT_WORKSHEET}.csv"
+        sid = spreadsheet_id(spreadsheet)
+        if sid and os.path.isdir(os.path.join(self.root, sid)):
+            return os.path.join(self.root, sid, name)
+        return os.path.join(self.root, name)
+
+    def read(self, spreadsheet: str | None = None, worksheet: str | None = None, ttl=None, **kwargs) -> pd.DataFrame:
+        path = self._path(spreadsheet, worksheet)
+        with self._lock:
+            if not os.path.exists(path):
+                return pd.DataFrame()
+            return pd.read_csv(path)
+
+    def update(self, spreadsheet: str | None = None, worksheet: str | None = None, data: pd.DataFrame | None = None, **kwargs):
+        path = self._path(spreadsheet, worksheet)
+        tmp = f"{path}.tmp"
+        with self._lock:
+            (data if data is not None else pd.DataFrame()).to_csv(tmp, index=False)
+            os.replace(tmp, path)
+        return data
+
+
+def connect(priority: int = QUESTION_REFRESH):
+    """Return the sheets connection for this process (local CSVs when configured).
+
+    Calls through it are scheduled under the Sheets quota as ``priority``
+    (a class from core.quota).
+    """
+    root = os.environ.get(LOCAL_SHEETS_ENV)
+    if root:
+        return ScheduledConnection(LocalSheetsConnection(root), priority)
+
+    from streamlit_gsheets import GSheetsConnection
+
+    return ScheduledConnection(st.connection("gsheets", type=GSheetsConnection), priority)
@@ -0,0 +1,300 @@
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.bank import Bank, bank_cache
+from core.catalog import ExamEntry, get_entry
+from core.backends import PerBackend, RedisBackend, SQLiteBackend
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# An attempt is pinned to the bank version it started on (engine state
+# "bank_version"), and exam.py, score.py, reports and history all grade it
+# against that version even if the sheet changes mid-exam. Pinned versions
+# are written next to the engine state (same SAT_STATE_BACKEND) so any
+# worker, or the same one after a restart, can rebuild them:
+#   rows      content-addressed by row hash, per bank source, stored once
+#             however many versions contain them;
+#   versions  columns + the ordered row hashes + a count of pinned attempts.
+# A version is dropped once no attempt pins it (retake/new start releases
+# the old one) and it has been unused for GRACE_SEC; rows no version uses
+# any more go with it.
+GRACE_SEC = 600  # other workers may still be serving a just-superseded version as current
+
+_log = logging.getLogger(__name__)
+
+
+def source_key(entry: ExamEntry) -> str:
+    sheet_url, worksheet = entry.source
+    return f"{sheet_url}|{worksheet or ''}"
+
+
+def _row_id(h) -> str:
+    return f"{int(h):016x}"
+
+
+# ---------------------------
+# STORES
+# ---------------------------
+class MemorySnapshots:
+    """Process-local snapshots; same interface as the shared backends."""
+
+    def __init__(self):
+        self._versions: dict[tuple[str, str], dict] = {}
+        self._rows: dict[str, dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def has(self, source: str, version: str) -> bool:
+        with self._lock:
+            return (source, version) in self._versions
+
+    def put(self, source: str, version: str, columns: list, hashes: bytes, rows: dict[str, str]):
+        with self._lock:
+            stored = self._rows.setdefault(source, {})
+            for rid, row in rows.items():
+                stored.setdefault(rid, row)
+            self._versions.setdefault((source, version), {
+                "columns": columns, "hashes": hashes, "refs": 0, "used_at": time.time(),
+            })
+
+    def get(self, source: str, version: str) -> tuple[list, bytes, dict[str, str]] | None:
+        with self._lock:
+            v = self._versions.get((source, version))
+            if v is None:
+                return None
+            stored = self._rows.get(source, {})
+            ids = {_row_id(h) for h in np.frombuffer(v["hashes"], dtype=np.uint64)}
+            return v["columns"], v["hashes"], {rid: stored[rid] for rid in ids if rid in stored}
+
+    def add_ref(self, source: str, version: str, delta: int) -> int:
+        with self._lock:
+            v = self._versions.get((source, version))
+            if v is None:
+                return 0
+            v["refs"] = max(0, v["refs"] + delta)
+            v["used_at"] = time.time()
+            return v["refs"]
+
+    def collect(self, source: str, keep: set[str], before: float) -> int:
+        with self._lock:
+            dead = [k for k, v in self._versions.items()
+                    if k[0] == source and k[1] not in keep and v["refs"] <= 0 and v["used_at"] < before]
+            for k in dead:
+                del self._versions[k]
+            if dead:
+                live = {_row_id(h) for (s, _), v in self._versions.items() if s == source
+                        for h in np.frombuffer(v["hashes"], dtype=np.uint64)}
+                rows = self._rows.get(source, {})
+                for rid in [rid for rid in rows if rid not in live]:
+                    del rows[rid]
+            return len(dead)
+
+
+class SQLiteSnapshots(SQLiteBackend):
+    """Shared by worker processes through the state store's SQLite file."""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS bank_rows ("
+        " source TEXT NOT NULL, row_id TEXT NOT NULL, row TEXT NOT NULL, PRIMARY KEY (source, row_id))",
+        "CREATE TABLE IF NOT EXISTS bank_versions ("
+        " source TEXT NOT NULL, version TEXT NOT NULL, columns TEXT NOT NULL, hashes BLOB NOT NULL,"
+        " refs INTEGER NOT NULL, used_at REAL NOT NULL, PRIMARY KEY (source, version))",
+    )
+
+    def has(self, source: str, version: str) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM bank_versions WHERE source = ? AND version = ?", (source, version)
+        ).fetchone() is not None
+
+    def put(self, source: str, version: str, columns: list, hashes: bytes, rows: dict[str, str]):
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO bank_rows VALUES (?, ?, ?)", [(source, rid, row) for rid, row in rows.items()]
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO bank_versions VALUES (?, ?, ?, ?, 0, ?)",
+                (source, version, json.dumps(columns, default=str), hashes, time.time()),
+            )
+
+    def get(self, source: str, version: str) -> tuple[list, bytes, dict[str, str]] | None:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT columns, hashes FROM bank_versions WHERE source = ? AND version = ?", (source, version)
+        ).fetchone()
+        if row is None:
+            return None
+        ids = sorted({_row_id(h) for h in np.frombuffer(row[1], dtype=np.uint64)})
+        rows = {}
+        for i in range(0, len(ids), 500):  # stay under SQLite's bound-parameter limit
+            chunk = ids[i:i + 500]
+            rows.update(conn.execute(
+                f"SELECT row_id, row FROM bank_rows WHERE source = ? AND row_id IN ({','.join('?' * len(chunk))})",
+                (source, *chunk),
+            ).fetchall())
+        return json.loads(row[0]), bytes(row[1]), rows
+
+    def add_ref(self, source: str, version: str, delta: int) -> int:
+        row = self._conn().execute(
+            "UPDATE bank_versions SET refs = MAX(0, refs + ?), used_at = ? WHERE source = ? AND version = ?"
+            " RETURNING refs",
+            (delta, time.time(), source, version),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def collect(self, source: str, keep: set[str], before: float) -> int:
+        with self._transaction() as conn:
+            dead = [v for (v,) in conn.execute(
+                "SELECT version FROM bank_versions WHERE source = ? AND refs <= 0 AND used_at < ?", (source, before)
+            ).fetchall() if v not in keep]
+            conn.executemany("DELETE FROM bank_versions WHERE source = ? AND version = ?",
+                             [(source, v) for v in dead])
+            if dead:
+                live = {_row_id(h) for (blob,) in conn.execute(
+                    "SELECT hashes FROM bank_versions WHERE source = ?", (source,)
+                ) for h in np.frombuffer(blob, dtype=np.uint64)}
+                stored = [rid for (rid,) in conn.execute("SELECT row_id FROM bank_rows WHERE source = ?", (source,))]
+                conn.executemany("DELETE FROM bank_rows WHERE source = ? AND row_id = ?",
+                                 [(source, rid) for rid in stored if rid not in live])
+        return len(dead)
+
+
+class RedisSnapshots(RedisBackend):
+    """Shared across hosts: one hash of rows per source, one hash per version."""
+
+    def _v(self, source: str, version: str) -> str:
+        return f"sat:snap:v:{source}:{version}"
+
+    def has(self, source: str, version: str) -> bool:
+        return bool(self.r.exists(self._v(source, version)))
+
+    def put(self, source: str, version: str, columns: list, hashes: bytes, rows: dict[str, str]):
+        pipe = self.r.pipeline()
+        for rid, row in rows.items():
+            pipe.hsetnx(f"sat:snap:rows:{source}", rid, row)
+        pipe.hsetnx(self._v(source, version), "columns", json.dumps(columns, default=str))
+        pipe.hsetnx(self._v(source, version), "hashes", hashes)
+        pipe.hsetnx(self._v(source, version), "refs", 0)
+        pipe.hset(self._v(source, version), "used_at", time.time())
+        pipe.sadd(f"sat:snap:versions:{source}", version)
+        pipe.execute()
+
+    def get(self, source: str, version: str) -> tuple[list, bytes, dict[str, str]] | None:
+        columns, hashes = self.r.hmget(self._v(source, version), "columns", "hashes")
+        if hashes is None:
+            return None
+        ids = sorted({_row_id(h) for h in np.frombuffer(hashes, dtype=np.uint64)})
+        values = self.r.hmget(f"sat:snap:rows:{source}", ids) if ids else []
+        return json.loads(columns), hashes, {rid: v.decode() for rid, v in zip(ids, values) if v is not None}
+
+    def add_ref(self, source: str, version: str, delta: int) -> int:
+        if not self.has(source, version):
+            return 0
+        pipe = self.r.pipeline()
+        pipe.hincrby(self._v(source, version), "refs", delta)
+        pipe.hset(self._v(source, version), "used_at", time.time())
+        return max(0, int(pipe.execute()[0]))
+
+    def collect(self, source: str, keep: set[str], before: float) -> int:
+        dead, live = [], set()
+        for raw in self.r.smembers(f"sat:snap:versions:{source}"):
+            version = raw.decode()
+            refs, used_at, hashes = self.r.hmget(self._v(source, version), "refs", "used_at", "hashes")
+            if version not in keep and int(refs or 0) <= 0 and float(used_at or 0) < before:
+                dead.append(version)
+            elif hashes is not None:
+                live.update(_row_id(h) for h in np.frombuffer(hashes, dtype=np.uint64))
+        if dead:
+            pipe = self.r.pipeline()
+            for version in dead:
+                pipe.delete(self._v(source, version))
+                pipe.srem(f"sat:snap:versions:{source}", version)
+            stale = [rid.decode() for rid in self.r.hkeys(f"sat:snap:rows:{source}") if rid.decode() not in live]
+            if stale:
+                pipe.hdel(f"sat:snap:rows:{source}", *stale)
+            pipe.execute()
+        return len(dead)
+
+
+# The process-wide snapshot store for the configured ``SAT_STATE_BACKEND``.
+get_snapshots = PerBackend(MemorySnapshots, SQLiteSnapshots, RedisSnapshots)
+_stored: set[tuple[str, str]] = set()  # versions this process knows are in the store
+
+
+# ---------------------------
+# VERSIONS
+# ---------------------------
+def record(entry: ExamEntry, bank: Bank):
+    """Make sure ``bank``'s version is in the store.
+
+    When the version it was refreshed from is already stored, only its
+    changed rows are written; every other row is shared.
+    """
+    source = source_key(entry)
+    if (source, bank.version) in _stored:
+        return
+    store = get_snapshots()
+    if not store.has(source, bank.version):
+        if bank.parent is not None and bank.changed_rows is not None and store.has(source, bank.parent):
+            positions = bank.changed_rows
+        else:
+            positions = list(range(len(bank.row_hashes)))
+        part = bank.df.iloc[positions]
+        values = part.astype(object).where(part.notna(), None).values.tolist()
+        rows = {_row_id(bank.row_hashes[p]): json.dumps(v, default=str) for p, v in zip(positions, values)}
+        store.put(source, bank.version, bank.columns, bank.row_hashes.tobytes(), rows)
+    _stored.add((source, bank.version))
+
+
+def pin(entry: ExamEntry, bank: Bank) -> str:
+    """Pin a starting attempt to ``bank``'s version; returns the version to keep in engine state."""
+    source = source_key(entry)
+    record(entry, bank)
+    if get_snapshots().add_ref(source, bank.version, +1) == 0:
+        # another worker collected it since this process recorded it: store it again
+        _stored.discard((source, bank.version))
+        record(entry, bank)
+        if get_snapshots().add_ref(source, bank.version, +1) == 0:
+            _log.warning("could not pin bank version %s of %s", bank.version, entry.id)
+    return bank.version
+
+
+def release(entry: ExamEntry, version: str):
+    """An attempt pinned to ``version`` is gone (retake, new start); drop versions nobody needs."""
+    source = source_key(entry)
+    store = get_snapshots()
+    if store.add_ref(source, version, -1) > 0:
+        return
+    current = bank_cache().current_version(entry)
+    keep = {current} if current else set()
+    if store.collect(source, keep, time.time() - GRACE_SEC):
+        # forget what this process knew about the source; record() checks the store again
+        _stored.difference_update({(s, v) for s, v in _stored if s == source and v not in keep})
+
+
+def release_attempt(state: dict):
+    """:func:`release` for a stored attempt's engine state, if it was pinned."""
+    if state.get("bank_version") and state.get("selected_exam"):
+        release(get_entry(state["selected_exam"]), state["bank_version"])
+
+
+def load(entry: ExamEntry, version: str, base: Bank | None = None) -> Bank | None:
+    """Rebuild a stored version, sharing compiled rows with ``base``; None if it is not stored."""
+    found = get_snapshots().get(source_key(entry), version)
+    if found is None:
+        return None
+    columns, blob, rows = found
+    hashes = np.frombuffer(blob, dtype=np.uint64).copy()
+    if any(_row_id(h) not in rows for h in hashes):
+        _log.warning("bank version %s of %s is missing rows in the snapshot store", version, entry.id)
+        return None
+    df = pd.DataFrame([json.loads(rows[_row_id(h)]) for h in hashes], columns=columns)
+    bank = Bank(df, hashes)
+    bank._version = version  # re-read cells may hash differently; the stored ids are the truth
+    if base is not None:
+        bank.share_rows(base)
+    return bank
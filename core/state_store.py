@@ -0,0 +1,323 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from core.backends import PerBackend, RedisBackend, SQLiteBackend
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Exam engine state lives between reruns in the shared backend (see
+# core.backends), so any worker process can pick up any student's attempt.
+
+# Everything exam.py needs to resume an attempt exactly where it was.
+ENGINE_KEYS = [
+    "selected_exam", "selected_exam_title",
+    "module_step", "q_index", "on_break", "break_end", "viewing_review",
+    "finished_all", "exam_finished_at", "end_time",
+    "flags", "responses", "question_times", "module_forms",
+    "current_question_key", "current_question_started_at",
+    "bank_version",
+    "trace",  # {"id", "t0"} of the session trace being recorded (core/trace.py), so it survives a hydrate
+]
+
+
+def attempt_key(user_name: str, exam_id: str, kind: str = "exam") -> str:
+    """Store key of one attempt; practice drills on an exam's bank get their own slot."""
+    key = f"{str(user_name).strip().lower()}:{exam_id}"
+    return key if kind == "exam" else f"{key}:{kind}"
+
+
+# ---------------------------
+# ENCODING (tuple keys -> JSON)
+# ---------------------------
+def _pair(key) -> str:
+    m, q = key
+    return f"{m}:{q}"
+
+
+def _unpair(s: str) -> tuple[int, int]:
+    m, q = s.split(":")
+    return int(m), int(q)
+
+
+def encode_state(state) -> dict:
+    out = {}
+    for k in ENGINE_KEYS:
+        if k not in state:
+            continue
+        v = state[k]
+        if k in ("responses", "question_times"):
+            v = {_pair(key): val for key, val in v.items()}
+        elif k == "module_forms":
+            v = {str(m): label for m, label in v.items()}
+        elif k == "flags":
+            v = {str(m): {str(i): bool(f) for i, f in qs.items()} for m, qs in v.items()}
+        elif k == "current_question_key" and v is not None:
+            v = list(v)
+        out[k] = v
+    return out
+
+
+def decode_state(data: dict) -> dict:
+    out = dict(data)
+    if "responses" in out:
+        out["responses"] = {_unpair(k): v for k, v in out["responses"].items()}
+    if "question_times" in out:
+        out["question_times"] = {_unpair(k): float(v) for k, v in out["question_times"].items()}
+    if "flags" in out:
+        out["flags"] = {int(m): {int(i): bool(f) for i, f in qs.items()} for m, qs in out["flags"].items()}
+    if "module_forms" in out:
+        out["module_forms"] = {int(m): label for m, label in out["module_forms"].items()}
+    if out.get("current_question_key") is not None:
+        out["current_question_key"] = tuple(out["current_question_key"])
+    return out
+
+
+# ---------------------------
+# BACKENDS
+# ---------------------------
+class MemoryStateStore:
+    """Process-local store; same interface as the shared backends."""
+
+    def __init__(self):
+        self._rows: dict[str, tuple[int, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def version(self, key: str) -> int:
+        with self._lock:
+            return self._rows.get(key, (0, "", 0.0))[0]
+
+    def get(self, key: str) -> tuple[int, dict] | None:
+        with self._lock:
+            row = self._rows.get(key)
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put(self, key: str, payload: dict, expected: int | None = None) -> int | None:
+        with self._lock:
+            current = self._rows.get(key, (0, "", 0.0))[0]
+            if expected is not None and current != expected:
+                return None
+            self._rows[key] = (current + 1, json.dumps(payload), time.time())
+            return current + 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._rows.pop(key, None)
+
+    def scan(self, since: float = 0.0):
+        with self._lock:
+            rows = sorted(self._rows.items(), key=lambda kv: kv[1][2])
+        for key, (_, payload, updated_at) in rows:
+            if updated_at > since:
+                yield key, updated_at, json.loads(payload)
+
+
+class SQLiteStateStore(SQLiteBackend):
+    """One row per attempt; WAL mode so many worker processes can share the file."""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS attempt_state ("
+        " attempt_key TEXT PRIMARY KEY, version INTEGER NOT NULL,"
+        " payload TEXT NOT NULL, updated_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS attempt_state_updated ON attempt_state (updated_at)",
+    )
+
+    def version(self, key: str) -> int:
+        row = self._conn().execute("SELECT version FROM attempt_state WHERE attempt_key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key: str) -> tuple[int, dict] | None:
+        row = self._conn().execute(
+            "SELECT version, payload FROM attempt_state WHERE attempt_key = ?", (key,)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put(self, key: str, payload: dict, expected: int | None = None) -> int | None:
+        data = json.dumps(payload, separators=(",", ":"))
+        if expected is None:
+            row = self._conn().execute(
+                "INSERT INTO attempt_state (attempt_key, version, payload, updated_at) VALUES (?, 1, ?, ?)"
+                " ON CONFLICT(attempt_key) DO UPDATE SET version = version + 1,"
+                " payload = excluded.payload, updated_at = excluded.updated_at"
+                " RETURNING version",
+                (key, data, time.time()),
+            ).fetchone()
+        elif expected == 0:
+            row = self._conn().execute(
+                "INSERT INTO attempt_state (attempt_key, version, payload, updated_at) VALUES (?, 1, ?, ?)"
+                " ON CONFLICT(attempt_key) DO NOTHING RETURNING version",
+                (key, data, time.time()),
+            ).fetchone()
+        else:
+            row = self._conn().execute(
+                "UPDATE attempt_state SET version = version + 1, payload = ?, updated_at = ?"
+                " WHERE attempt_key = ? AND version = ? RETURNING version",
+                (data, time.time(), key, expected),
+            ).fetchone()
+        return row[0] if row else None
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM attempt_state WHERE attempt_key = ?", (key,))
+
+    def scan(self, since: float = 0.0):
+        # a private connection, so a long export never holds this thread's cursor
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            rows = conn.execute(
+                "SELECT attempt_key, updated_at, payload FROM attempt_state"
+                " WHERE updated_at > ? ORDER BY updated_at",
+                (since,),
+            )
+            for key, updated_at, payload in rows:
+                yield key, updated_at, json.loads(payload)
+        finally:
+            conn.close()
+
+
+class RedisStateStore(RedisBackend):
+    """Shared across hosts. Version and payload live in one hash per attempt."""
+
+    def __init__(self, url: str, client=None):
+        super().__init__(url, client)
+        # ARGV[3]: expected version, or "" to write unconditionally
+        self._put = self.r.register_script(
+            "local cur = tonumber(redis.call('HGET', KEYS[1], 'version') or '0') "
+            "if ARGV[3] ~= '' and cur ~= tonumber(ARGV[3]) then return false end "
+            "local v = redis.call('HINCRBY', KEYS[1], 'version', 1) "
+            "redis.call('HSET', KEYS[1], 'payload', ARGV[1], 'updated_at', ARGV[2]) return v"
+        )
+
+    def _k(self, key: str) -> str:
+        return f"sat:attempt:{key}"
+
+    def version(self, key: str) -> int:
+        v = self.r.hget(self._k(key), "version")
+        return int(v) if v else 0
+
+    def get(self, key: str) -> tuple[int, dict] | None:
+        v, payload = self.r.hmget(self._k(key), "version", "payload")
+        return (int(v), json.loads(payload)) if payload else None
+
+    def put(self, key: str, payload: dict, expected: int | None = None) -> int | None:
+        v = self._put(
+            keys=[self._k(key)],
+            args=[json.dumps(payload, separators=(",", ":")), time.time(), "" if expected is None else expected],
+        )
+        return int(v) if v is not None else None
+
+    def delete(self, key: str):
+        self.r.delete(self._k(key))
+
+    def scan(self, since: float = 0.0):
+        # SCAN order is arbitrary; callers that need a watermark take the max updated_at
+        prefix = self._k("")
+        for k in self.r.scan_iter(match=prefix + "*"):
+            updated_at, payload = self.r.hmget(k, "updated_at", "payload")
+            if payload and float(updated_at or 0) > since:
+                yield k.decode()[len(prefix):], float(updated_at or 0), json.loads(payload)
+
+
+# The process-wide store selected by ``SAT_STATE_BACKEND``.
+get_store = PerBackend(MemoryStateStore, SQLiteStateStore, RedisStateStore)
+
+
+# ---------------------------
+# SESSION HOOKS
+# ---------------------------
+def hydrate(session_state, key: str) -> bool:
+    """Load the stored attempt into ``session_state`` if the store has a newer version.
+
+    Costs a single version lookup when this session is already current.
+    """
+    store = get_store()
+    local_version = session_state.get("_state_version", 0)
+    if session_state.get("_state_key") == key and store.version(key) <= local_version:
+        return False
+
+    row = store.get(key)
+    session_state["_state_key"] = key
+    if row is None:
+        session_state["_state_version"] = 0
+        return False
+
+    version, payload = row
+    for k, v in decode_state(payload).items():
+        session_state[k] = v
+    session_state["_state_version"] = version
+    session_state["_state_digest"] = _digest(payload)
+    return True
+
+
+def save(session_state, key: str) -> bool:
+    """Write the engine state back if anything changed since the last save.
+
+    The write only lands on the version this session last read or wrote.
+    When another worker moved the attempt on meanwhile, this session's
+    change is dropped, the newer state is loaded instead and False returned.
+    """
+    payload = encode_state(session_state)
+    digest = _digest(payload)
+    same_attempt = session_state.get("_state_key") == key
+    if same_attempt and session_state.get("_state_digest") == digest:
+        return True
+    version = get_store().put(key, payload, session_state.get("_state_version", 0) if same_attempt else None)
+    if version is None:
+        for k in ("_state_version", "_state_digest"):
+            session_state.pop(k, None)
+        hydrate(session_state, key)
+        return False
+    session_state["_state_version"] = version
+    session_state["_state_key"] = key
+    session_state["_state_digest"] = digest
+    return True
+
+
+def iter_attempts(since: float = 0.0):
+    """(user, kind, decoded engine state, updated_at) for stored attempts changed after ``since``.
+
+    Streams from the backend; for batch jobs, not page code.
+    """
+    for key, updated_at, payload in get_store().scan(since):
+        user, kind = split_key(key, payload.get("selected_exam"))
+        yield user, kind, decode_state(payload), updated_at
+
+
+def split_key(key: str, exam_id: str | None) -> tuple[str, str]:
+    """(user, kind) of an :func:`attempt_key`, given its exam id.
+
+    Usernames and exam ids may both contain ":", so the key is read from the
+    end: the exam id is known from the stored state and the kind never has one.
+    """
+    if exam_id and key.endswith(f":{exam_id}"):
+        return key[:-len(exam_id) - 1], "exam"
+    head, _, kind = key.rpartition(":")
+    if exam_id and head.endswith(f":{exam_id}"):
+        return head[:-len(exam_id) - 1], kind
+    return head, "exam"
+
+
+def reset_engine_state(session_state):
+    """Forget the previous attempt's engine state (new start or retake); the exam selection is kept."""
+    for k in ENGINE_KEYS + ["answers", "live_correct"]:
+        if k not in ("selected_exam", "selected_exam_title"):
+            session_state.pop(k, None)
+
+
+def discard(session_state, key: str):
+    """Forget a stored attempt (new start or retake) and unpin its bank version."""
+    row = get_store().get(key)
+    get_store().delete(key)
+    if row is not None:
+        from core import snapshots  # imports this module
+
+        snapshots.release_attempt(row[1])
+    session_state.pop("bank_version", None)
+    for k in ("_state_key", "_state_version", "_state_digest"):
+        session_state.pop(k, None)
+
+
+def _digest(payload: dict) -> str:
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=12).hexdigest()
@@ -0,0 +1,308 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+
+import streamlit as st
+
+from core.backends import DEFAULT_SQLITE_PATH, PerBackend, RedisBackend, SQLiteBackend
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# After a successful login the session gets a signed, expiring token that
+# the browser keeps in a first-party cookie (SameSite=Strict, Secure over
+# https), so a refresh, a reconnect or a server restart restores
+# authenticated/user_name and the selected attempt without another password
+# check or Users sheet read. It is never put in the URL, where it would end
+# up in history, shared links, Referer headers and proxy logs. Verification is one
+# HMAC over the token plus a dict lookup in this process's revocation set;
+# that set is kept in sync with the shared revocation list (same
+# SAT_STATE_BACKEND) by a background thread, never on the request path.
+#
+# SAT_SESSION_SECRET: comma-separated keys; the first signs, all verify (rotation).
+# Without it a random key is created under .state/ and shared by the workers
+# of this host. Changing the keys revokes every token.
+SECRET_ENV = "SAT_SESSION_SECRET"
+TTL_ENV = "SAT_SESSION_TTL_SEC"
+DEFAULT_TTL_SEC = 12 * 3600
+SECRET_PATH = os.path.join(os.path.dirname(DEFAULT_SQLITE_PATH), "session_secret")
+COOKIE = "sat_session"
+REVOCATION_SYNC_SEC = 10
+
+_log = logging.getLogger(__name__)
+
+
+def ttl_sec() -> float:
+    return float(os.environ.get(TTL_ENV, DEFAULT_TTL_SEC))
+
+
+_keys: list[bytes] | None = None
+_keys_lock = threading.Lock()
+
+
+def signing_keys() -> list[bytes]:
+    global _keys
+    with _keys_lock:
+        if _keys is None:
+            configured = [k.strip() for k in os.environ.get(SECRET_ENV, "").split(",") if k.strip()]
+            if configured:
+                _keys = [k.encode("utf-8") for k in configured]
+            else:
+                os.makedirs(os.path.dirname(SECRET_PATH), exist_ok=True)
+                try:
+                    fd = os.open(SECRET_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                    with os.fdopen(fd, "w") as f:
+                        f.write(secrets.token_hex(32))
+                except FileExistsError:  # another worker created it first
+                    pass
+                with open(SECRET_PATH) as f:
+                    _keys = [f.read().strip().encode("utf-8")]
+        return _keys
+
+
+# ---------------------------
+# TOKENS
+# ---------------------------
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(body: str, key: bytes) -> str:
+    return _b64(hmac.new(key, body.encode("ascii"), hashlib.sha256).digest()[:24])
+
+
+def issue(user_name: str, attempt: dict | None = None, now: float | None = None) -> str:
+    """A token for ``user_name``; ``attempt`` is the selected exam ({exam, kind, title}) to restore."""
+    now = now or time.time()
+    claims = {"u": str(user_name).strip().lower(), "iat": int(now), "exp": int(now + ttl_sec()),
+              "jti": secrets.token_urlsafe(9)}
+    if attempt:
+        claims["a"] = attempt
+    body = _b64(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{body}.{_sign(body, signing_keys()[0])}"
+
+
+def verify(token: str, now: float | None = None) -> dict | None:
+    """The token's claims, or None if it is malformed, forged, expired or revoked. No I/O."""
+    body, _, sig = str(token or "").partition(".")
+    if not body or not sig or not any(hmac.compare_digest(sig, _sign(body, k)) for k in signing_keys()):
+        return None
+    try:
+        claims = json.loads(_unb64(body))
+    except ValueError:
+        return None
+    if claims.get("exp", 0) <= (now or time.time()) or is_revoked(claims):
+        return None
+    return claims
+
+
+# ---------------------------
+# REVOCATION
+# ---------------------------
+# Entries are "t:<jti>" (one token) or "u:<user>" (every token of that user
+# issued before ``cutoff``: log out everywhere, password change). Each one
+# can be forgotten once every token it could match has expired.
+class MemoryRevocations:
+    def __init__(self):
+        self._rows: dict[str, tuple[float, float, float]] = {}  # key -> (cutoff, expires, at)
+        self._lock = threading.Lock()
+
+    def add(self, key: str, cutoff: float, expires: float):
+        with self._lock:
+            self._rows[key] = (cutoff, expires, time.time())
+
+    def since(self, at: float) -> list[tuple[str, float, float]]:
+        now = time.time()
+        with self._lock:
+            for k in [k for k, row in self._rows.items() if row[1] < now]:
+                del self._rows[k]
+            return [(k, cutoff, t) for k, (cutoff, _, t) in self._rows.items() if t > at]
+
+
+class SQLiteRevocations(SQLiteBackend):
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS session_revocations ("
+        " key TEXT PRIMARY KEY, cutoff REAL NOT NULL, expires REAL NOT NULL, at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS session_revocations_at ON session_revocations (at)",
+    )
+
+    def add(self, key: str, cutoff: float, expires: float):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO session_revocations VALUES (?, ?, ?, ?)", (key, cutoff, expires, time.time())
+        )
+
+    def since(self, at: float) -> list[tuple[str, float, float]]:
+        conn = self._conn()
+        conn.execute("DELETE FROM session_revocations WHERE expires < ?", (time.time(),))
+        return conn.execute(
+            "SELECT key, cutoff, at FROM session_revocations WHERE at > ? ORDER BY at", (at,)
+        ).fetchall()
+
+
+class RedisRevocations(RedisBackend):
+    """A sorted set by revocation time; each entry's value is its cutoff."""
+
+    def add(self, key: str, cutoff: float, expires: float):
+        pipe = self.r.pipeline()
+        pipe.zadd("sat:revoked", {f"{key}|{cutoff}|{expires}": time.time()})
+        pipe.zremrangebyscore("sat:revoked", 0, time.time() - ttl_sec() - 60)
+        pipe.execute()
+
+    def since(self, at: float) -> list[tuple[str, float, float]]:
+        out = []
+        for member, t in self.r.zrangebyscore("sat:revoked", f"({at}", "+inf", withscores=True):
+            key, cutoff, _ = member.decode().rsplit("|", 2)
+            out.append((key, float(cutoff), t))
+        return out
+
+
+_revoked: dict[str, float] = {}  # this process's view: key -> cutoff
+_synced_at = 0.0
+_sync_lock = threading.Lock()
+_syncer: threading.Thread | None = None
+
+
+# The process-wide revocation list for the configured ``SAT_STATE_BACKEND``.
+get_revocations = PerBackend(MemoryRevocations, SQLiteRevocations, RedisRevocations)
+
+
+def sync_revocations():
+    """Pull entries revoked (by any worker) since the last sync into this process's set."""
+    global _synced_at
+    rows = get_revocations().since(_synced_at)
+    with _sync_lock:
+        for key, cutoff, at in rows:
+            _revoked[key] = max(cutoff, _revoked.get(key, 0.0))
+            _synced_at = max(_synced_at, at)
+
+
+def start_sync() -> threading.Thread:
+    """Keep the local revocation set current every ``REVOCATION_SYNC_SEC``, once per process."""
+    global _syncer
+    with _sync_lock:
+        if _syncer is None:
+            def run():
+                while True:
+                    try:
+                        sync_revocations()
+                    except Exception:
+                        _log.exception("revocation sync failed")
+                    time.sleep(REVOCATION_SYNC_SEC)
+
+            _syncer = threading.Thread(target=run, name="sat-revocations", daemon=True)
+            _syncer.start()
+        return _syncer
+
+
+def is_revoked(claims: dict) -> bool:
+    return f"t:{claims.get('jti')}" in _revoked or claims.get("iat", 0) < _revoked.get(f"u:{claims.get('u')}", 0)
+
+
+def revoke(token: str):
+    """Revoke one token (log out)."""
+    body, _, _ = str(token or "").partition(".")
+    try:
+        claims = json.loads(_unb64(body))
+    except ValueError:
+        return
+    key = f"t:{claims.get('jti')}"
+    get_revocations().add(key, 0.0, float(claims.get("exp", time.time() + ttl_sec())))
+    with _sync_lock:
+        _revoked[key] = 0.0  # effective here right away, elsewhere within a sync period
+
+
+def revoke_user(user_name: str, now: float | None = None):
+    """Revoke every token issued to ``user_name`` so far (log out everywhere)."""
+    now = now or time.time()
+    key = f"u:{str(user_name).strip().lower()}"
+    get_revocations().add(key, now + 1, now + ttl_sec())  # +1: iat is whole seconds
+    with _sync_lock:
+        _revoked[key] = max(now + 1, _revoked.get(key, 0.0))
+
+
+# ---------------------------
+# SESSION HOOKS
+# ---------------------------
+def login(user_name: str):
+    """Mark this session logged in and hand it a token."""
+    st.session_state.authenticated = True
+    st.session_state.user_name = str(user_name).strip().lower()
+    _remember(issue(st.session_state.user_name))
+
+
+def select_attempt(exam_id: str, title: str, kind: str = "exam"):
+    """Select an exam for this session; the token is reissued so a refresh comes back to it."""
+    st.session_state.selected_exam = exam_id
+    st.session_state.selected_exam_title = title
+    st.session_state.selected_kind = kind
+    if st.session_state.get("authenticated"):
+        _remember(issue(st.session_state.user_name, {"exam": exam_id, "title": title, "kind": kind}))
+
+
+def logout(everywhere: bool = False):
+    """Revoke this session's token (or every token of the user) and clear auth and exam selection."""
+    token = st.session_state.pop("_session_token", None)
+    if everywhere and st.session_state.get("user_name"):
+        revoke_user(st.session_state.user_name)
+    elif token:
+        revoke(token)
+    st.session_state.authenticated = False
+    st.session_state.user_name = ""
+    for k in ("selected_exam", "selected_exam_title", "selected_kind"):
+        st.session_state.pop(k, None)
+
+
+def restore() -> bool:
+    """Page guard: True if this session is logged in, restoring it from the session cookie if needed."""
+    start_sync()
+    ss = st.session_state
+    if not ss.get("authenticated"):
+        claims = verify(st.context.cookies.get(COOKIE, ""))
+        if claims is not None:
+            ss.authenticated = True
+            ss.user_name = claims["u"]
+            attempt = claims.get("a")
+            if attempt and "selected_exam" not in ss:
+                ss.selected_exam = attempt["exam"]
+                ss.selected_exam_title = attempt["title"]
+                ss.selected_kind = attempt.get("kind", "exam")
+            # past half its life: slide the expiry forward
+            if claims["exp"] - time.time() < ttl_sec() / 2:
+                _remember(issue(claims["u"], attempt))
+            else:
+                ss._session_token = st.context.cookies[COOKIE]
+    _write_cookie()
+    return bool(ss.get("authenticated"))
+
+
+def _remember(token: str):
+    st.session_state._session_token = token
+
+
+def _write_cookie():
+    """Bring the browser's cookie in line with this session's token (cleared when logged out).
+
+    ``st.context.cookies`` is what the browser sent when the session opened,
+    so what this session wrote since is tracked in ``_cookie_token``.
+    """
+    ss = st.session_state
+    token = ss.get("_session_token") or ""
+    if ss.get("_cookie_token", st.context.cookies.get(COOKIE, "")) == token:
+        return
+    ss._cookie_token = token
+    max_age = int(ttl_sec()) if token else 0
+    st.html(
+        f"<script>document.cookie = {json.dumps(f'{COOKIE}={token}; Path=/; Max-Age={max_age}; SameSite=Strict')}"
+        " + (location.protocol === 'https:' ? '; Secure' : '');</script>",
+        unsafe_allow_javascript=True,
+    )
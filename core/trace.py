@@ -0,0 +1,68 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Recording is off unless this points at a writable folder. Each exam attempt
+# becomes one JSON-lines file: a header object, then one compact array per
+# transition: [ms_since_start, kind, *args]. No usernames are written. The
+# active trace is part of the engine state, so a rerun served by another
+# worker, or a parked session coming back, keeps appending to the same file.
+TRACE_DIR_ENV = "SAT_TRACE_DIR"
+TRACE_VERSION = 1
+
+_write_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return bool(os.environ.get(TRACE_DIR_ENV))
+
+
+def start_trace(exam_id: str, module_sizes: dict[int, int] | None = None):
+    """Begin a new trace for this session (called when an attempt starts)."""
+    if not enabled():
+        return
+    trace_id = uuid.uuid4().hex[:12]
+    st.session_state.trace = {"id": trace_id, "t0": time.time()}
+    header = {
+        "v": TRACE_VERSION,
+        "id": trace_id,
+        "exam": exam_id,
+        "started": round(time.time(), 3),
+        "sizes": {str(k): v for k, v in (module_sizes or {}).items()},
+    }
+    _append(trace_id, header)
+
+
+def record(kind: str, *args):
+    """Append one transition to the active trace (no-op when recording is off)."""
+    if not enabled():
+        return
+    trace = st.session_state.get("trace")
+    if trace is None:
+        return
+    dt_ms = int((time.time() - trace["t0"]) * 1000)
+    _append(trace["id"], [dt_ms, kind, *args])
+
+
+def _append(trace_id: str, item):
+    path = os.path.join(os.environ[TRACE_DIR_ENV], f"{trace_id}.jsonl")
+    line = json.dumps(item, separators=(",", ":"))
+    with _write_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def load_trace(path: str) -> tuple[dict, list[list]]:
+    """Read a trace file back as (header, events)."""
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or not isinstance(lines[0], dict):
+        raise ValueError(f"{path}: missing trace header")
+    return lines[0], lines[1:]
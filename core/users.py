@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from core.quota import USER_INDEX_REFRESH
+from core.sheets import URL, connect
+
+USERS_WORKSHEET = "Users"
+# A login with a username the cached index doesn't know (maybe a signup on
+# another worker) re-reads the Users sheet, at most this often per process.
+UNKNOWN_USER_REFRESH_SEC = 30
+
+_refreshed_at = float("-inf")
+_refresh_lock = threading.Lock()
+
+
+# --- SHEETS HELPERS ---
+def read_users(conn) -> pd.DataFrame:
+    df = conn.read(spreadsheet=URL, worksheet=USERS_WORKSHEET, ttl=0)
+    if df is None or df.empty:
+        return pd.DataFrame(columns=["Username", "Password"])
+
+    # normalize colnames
+    col_map = {c.strip().lower(): c for c in df.columns}
+    ucol = col_map.get("username")
+    pcol = col_map.get("password")
+
+    if not ucol or not pcol:
+        # force expected shape so error messages are clearer
+        return pd.DataFrame(columns=["Username", "Password"])
+
+    # rename to canonical
+    df = df.rename(columns={ucol: "Username", pcol: "Password"})
+
+    # drop blank rows
+    df = df.dropna(subset=["Username", "Password"])
+    df["Username"] = df["Username"].astype(str)
+    df["Password"] = df["Password"].astype(str)
+    return df
+
+
+def write_users(conn, users_df: pd.DataFrame):
+    # MUST write back full sheet
+    conn.update(spreadsheet=URL, worksheet=USERS_WORKSHEET, data=users_df)
+    load_users_index.clear()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_users_index() -> dict[str, str]:
+    """{normalized username: normalized password}, so a login is a dict lookup."""
+    from core import offline
+
+    if offline.enabled():
+        return offline.roster()
+    users_df = read_users(connect(USER_INDEX_REFRESH))
+    return dict(
+        zip(
+            users_df["Username"].astype(str).str.strip().str.lower(),
+            users_df["Password"].astype(str).str.strip(),
+        )
+    )
+
+
+def user_password(user_name: str) -> str | None:
+    """Stored password of a normalized username, or None if there is no such user.
+
+    Wrong passwords of known users never touch the sheet; unknown names
+    refresh the index only every ``UNKNOWN_USER_REFRESH_SEC``.
+    """
+    global _refreshed_at
+    users_index = load_users_index()
+    if user_name in users_index:
+        return users_index[user_name]
+    with _refresh_lock:
+        now = time.monotonic()
+        if now - _refreshed_at < UNKNOWN_USER_REFRESH_SEC:
+            return None
+        _refreshed_at = now
+        load_users_index.clear()
+    return load_users_index().get(user_name)
@@ -0,0 +1,81 @@
+import logging
+import os
+import threading
+import time
+
+from core import offline
+from core.bank import bank_cache, get_bank
+from core.catalog import load_catalog
+from core.pacing import load_pacing
+from core.sheets import connect
+from core.users import load_users_index
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+# Touched once the catalog's exam banks (as many as fit the bank budget),
+# compiled questions, answer keys, the users index and the pacing table are cached. Proctors
+# (or a deploy script) wait for this file before letting students in.
+# Removed again when a new warm-up starts.
+READY_FILE_ENV = "SAT_READY_FILE"
+
+_log = logging.getLogger(__name__)
+_ready = threading.Event()
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+timings: dict[str, float] = {}
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def wait_until_ready(timeout: float | None = None) -> bool:
+    return _ready.wait(timeout)
+
+
+def warm_start() -> dict[str, float]:
+    """Load everything the first student would otherwise pay for; returns seconds per step."""
+    ready_file = os.environ.get(READY_FILE_ENV)
+    if ready_file and os.path.exists(ready_file):
+        os.remove(ready_file)
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        fn()
+        timings[name] = round(time.perf_counter() - t0, 3)
+
+    if not offline.enabled():
+        step("connection", connect)
+    step("catalog", load_catalog)
+    for exam_id in load_catalog():
+        # stop before warming would start evicting banks we just loaded
+        if not bank_cache().has_room_for_more():
+            break
+        step(f"{exam_id}:bank", lambda: get_bank(exam_id))
+        step(f"{exam_id}:forms", lambda: get_bank(exam_id).prefetch(sorted(get_bank(exam_id).forms)))
+    step("users_index", load_users_index)
+    step("pacing", load_pacing)
+
+    _ready.set()
+    if ready_file:
+        with open(ready_file, "w", encoding="utf-8") as f:
+            f.write(f"ready {time.strftime('%Y-%m-%dT%H:%M:%S')}\n")
+    _log.info("warm start finished: %s", timings)
+    return dict(timings)
+
+
+def start_in_background() -> threading.Thread:
+    """Run :func:`warm_start` once per process on a worker thread."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            def run():
+                try:
+                    warm_start()
+                except Exception:
+                    _log.exception("warm start failed; pages will load lazily")
+
+            _thread = threading.Thread(target=run, name="sat-warmup", daemon=True)
+            _thread.start()
+        return _thread
@@ -1,10 +1,20 @@
+import time
+
+import pandas as pd
 import streamlit as st
 
+from core import history, progress, state_store, tokens
+from core.bank import bank_for, get_bank
+from core.catalog import load_catalog
+from core.index import DRILL_TITLE, assemble_drill, missed_rows
+from core.questions import image_html
+from core.scoring import fmt_time
+
 st.set_page_config(page_title="Dashboard • Prime Ivy", layout="wide")
 
 # --------- AUTH GUARD ----------
 # If user isn't authenticated, send them back to the login app
-if not st.session_state.get("authenticated", False):
+if not tokens.restore():
     st.warning("Please log in to continue.")
     st.switch_page("SAT app.py")
 
@@ -44,35 +54,57 @@ c1, c2 = st.columns([3, 1])
 with c1:
     st.title("Prime Ivy Portal")
     st.caption(f"Welcome, **{user}**")
+    if progress.is_proctor(user):
+        st.page_link("pages/proctor.py", label="Live Proctor View", icon="🛰️")
 
 with c2:
     st.write("")  # spacer
     if st.button("Log out", use_container_width=True):
-        # Clear auth + any exam selection
-        st.session_state.authenticated = False
-        st.session_state.user_name = ""
-        st.session_state.pop("selected_exam", None)
-        st.session_state.pop("selected_exam_title", None)
+        # Clear auth + any exam selection, and revoke the session token
+        tokens.logout()
+        st.switch_page("SAT app.py")
+    if st.button("Log out everywhere", use_container_width=True, help="Also ends your sessions on other devices"):
+        tokens.logout(everywhere=True)
         st.switch_page("SAT app.py")
 
 st.divider()
 
+
+# --------- WARM START ----------
+# Login started loading the likely exams on a worker thread; once it is done,
+# have the browser fetch their first-module images while the student reads.
+warming = st.session_state.get("_prefetch")
+warming_up = warming is not None and not warming.done()
+
+
+@st.fragment(run_every=1.0 if warming_up else None)
+def prefetch_images():
+    if warming_up:
+        if warming.done():
+            st.rerun()  # full rerun: renders the images and stops this poll
+        return
+    if warming is None or warming.exception() is not None:
+        return
+    images = {p["image_url"]: p.get("image") for p in warming.result() if not p["image_url"].startswith("data:")}
+    if images:
+        st.markdown(
+            '<div style="display:none">'
+            + "".join(image_html(u, image, 'loading="eager" alt=""') for u, image in images.items())
+            + "</div>",
+            unsafe_allow_html=True,
+        )
+
+
+prefetch_images()
+
+
 # --------- EXAM LIST ----------
-# You can add more exams later. The "id" is what exam.py will use.
+# Exams come from the catalog manifest (exams.json or the "Exams" sheet).
+# The "id" is what exam.py will use; banks load on first use.
 EXAMS = [
-    {
-        "id": "sat_mock_v1",
-        "title": "SAT Mock Exam (Full)",
-        "desc": "Timed modules with break, review grid, and navigation popover.",
-        "tags": ["Math + Reading", "Timed", "Break"],
-    },
-    # Example future option:
-    # {
-    #     "id": "sat_math_only",
-    #     "title": "SAT Math Only",
-    #     "desc": "Practice Math modules only (timed).",
-    #     "tags": ["Math", "Timed"],
-    # },
+    {"id": e.id, "title": e.title, "desc": e.desc, "tags": list(e.tags)}
+    for e in load_catalog().values()
+    if e.visible_to(user)
 ]
 
 st.subheader("Choose a Mock Exam")
@@ -90,19 +122,21 @@ for idx, exam in enumerate(EXAMS):
 
         st.write("")  # spacer
 
+        # Unfinished attempt in the shared state store -> offer to resume it
+        stored = state_store.get_store().get(state_store.attempt_key(user, exam["id"]))
+        if stored and not stored[1].get("finished_all", False):
+            if st.button("Resume Exam", key=f"resume_{exam['id']}", use_container_width=True):
+                tokens.select_attempt(exam["id"], exam["title"])
+                st.switch_page("pages/exam.py")
+
         if st.button("Start Exam", key=f"start_{exam['id']}", use_container_width=True):
-            # Store selection for exam.py to use
-            st.session_state.selected_exam = exam["id"]
-            st.session_state.selected_exam_title = exam["title"]
+            # Store selection for exam.py to use (and in the session token)
+            tokens.select_attempt(exam["id"], exam["title"])
 
             # OPTIONAL: reset test state when starting a new exam
             # (prevents student from resuming an old run unintentionally)
-            for k in [
-                "module_step", "on_break", "break_end", "viewing_review",
-                "finished_all", "q_index", "flags", "responses", "answers",
-                "end_time",
-            ]:
-                st.session_state.pop(k, None)
+            state_store.reset_engine_state(st.session_state)
+            state_store.discard(st.session_state, state_store.attempt_key(user, exam["id"]))
 
             st.switch_page("pages/exam.py")
 
@@ -110,11 +144,151 @@ for idx, exam in enumerate(EXAMS):
 
 st.divider()
 
+# --------- MY PROGRESS ----------
+# Rollups are kept up to date as attempts finish, and the attempt list is
+# read one page at a time from the history index.
+HISTORY_PAGE_SIZE = 10
+
+st.subheader("My Progress")
+store = history.get_history()
+rollups = store.rollups(str(user).strip().lower())
+if not rollups:
+    st.caption("Finished exams and drills will show up here.")
+else:
+    titles = {e.id: e.title for e in load_catalog().values()}
+    scopes = sorted(rollups, key=lambda s: -rollups[s]["last"]["finished_at"])
+    scope = st.selectbox(
+        "Exam",
+        scopes,
+        format_func=lambda s: f"{DRILL_TITLE} • {titles.get(s[0], s[0])}" if s[1] == "drill" else titles.get(s[0], s[0]),
+        key="history_scope",
+        on_change=lambda: st.session_state.pop("history_page", None),
+    )
+    rollup = rollups[scope]
+
+    def score_text(brief: dict) -> str:
+        if brief.get("score_lo") is not None:
+            return f"{brief['score_lo']}–{brief['score_hi']}"
+        return f"{brief['pct']:.0f}%"
+
+    h1, h2, h3, h4 = st.columns(4)
+    h1.metric("Attempts", rollup["attempts"])
+    h2.metric("Best", score_text(rollup["best"]))
+    h3.metric("Last", score_text(rollup["last"]))
+    h4.metric("Avg. pace", f"{fmt_time(rollup['avg_sec_per_q'])} / question")
+
+    if rollup["attempts"] > 1:
+        trend = pd.DataFrame(
+            {name: pd.Series({pd.Timestamp(t, unit="s"): pct for t, pct in points})
+             for name, points in rollup["trend"].items()}
+        ).sort_index()
+        st.caption("Accuracy by module (%)")
+        st.line_chart(trend, height=220)
+
+    page_no = st.session_state.get("history_page", 0)
+    records, total = store.page(
+        str(user).strip().lower(), scope[0], scope[1], offset=page_no * HISTORY_PAGE_SIZE, limit=HISTORY_PAGE_SIZE
+    )
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Finished": time.strftime("%Y-%m-%d %H:%M", time.localtime(r["finished_at"])),
+                    "Score": score_text(r),
+                    "Correct": f"{r['correct']} / {r['total']}",
+                    "Accuracy": f"{r['pct']:.1f}%",
+                    "Pace": f"{fmt_time(r['sec_per_q'])} / q",
+                    "Total time": fmt_time(r["time_sec"]),
+                }
+                for r in records
+            ]
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+    pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+    p1, p2, p3 = st.columns([1, 2, 1])
+    with p1:
+        if st.button("← Newer", key="history_newer", disabled=page_no == 0, use_container_width=True):
+            st.session_state.history_page = page_no - 1
+            st.rerun()
+    with p2:
+        st.caption(f"Page {page_no + 1} of {pages} • {total} attempt(s)")
+    with p3:
+        if st.button("Older →", key="history_older", disabled=page_no + 1 >= pages, use_container_width=True):
+            st.session_state.history_page = page_no + 1
+            st.rerun()
+
+st.divider()
+
+# --------- PRACTICE DRILLS ----------
+# Built from the bank's inverted index (tags + passage words), then served
+# through exam.py as a single-module attempt of its own. The bank and its
+# index are only loaded once the student opens the builder.
+def drill_builder():
+    banks = {}
+    for e in load_catalog().values():
+        if e.visible_to(user):
+            banks.setdefault(e.source, e)  # one choice per question bank
+    drill_exam = st.selectbox("Question bank", list(banks.values()), format_func=lambda e: e.title, key="drill_exam")
+    bank = get_bank(drill_exam.id)
+    index = bank.index
+
+    filters = {}
+    tag_cols = [c for c in ("Domain", "Skill", "Difficulty", "Question_Type") if c in index.columns()]
+    if tag_cols:
+        for col, box in zip(tag_cols, st.columns(len(tag_cols))):
+            with box:
+                filters[col] = st.multiselect(col.replace("_", " "), index.values(col), key=f"drill_{col}")
+
+    d1, d2, d3 = st.columns([2, 1, 1])
+    with d1:
+        keywords = st.text_input("Passage keywords", key="drill_text", placeholder="e.g. linear equation")
+    with d2:
+        count = st.number_input("Questions", min_value=1, max_value=100, value=20, key="drill_count")
+    with d3:
+        st.write("")
+        only_missed = st.checkbox("Only ones I missed", key="drill_missed")
+
+    within = None
+    if only_missed:
+        stored = state_store.get_store().get(state_store.attempt_key(user, drill_exam.id))
+        if stored and stored[1].get("finished_all", False):
+            past = state_store.decode_state(stored[1])
+            # graded against the version the attempt was pinned to, then found in today's bank by content
+            pinned = bank_for(past)
+            missed = missed_rows(pinned, past.get("responses", {}), past.get("module_forms", {}))
+            within = bank.rows_with(pinned.row_hashes[sorted(missed)])
+        else:
+            within = set()
+            st.caption("No finished attempt on this exam yet.")
+
+    t0 = time.perf_counter()
+    matches = index.search(filters, keywords, within=within)
+    st.caption(f"{len(matches)} matching questions ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+
+    if st.button("Start Drill", key="start_drill", use_container_width=True, disabled=not matches):
+        label = assemble_drill(bank, int(count), filters, keywords, within=within)
+        tokens.select_attempt(drill_exam.id, f"{DRILL_TITLE} • {drill_exam.title}", "drill")
+        state_store.reset_engine_state(st.session_state)
+        st.session_state.module_forms = {1: label}
+        state_store.discard(st.session_state, state_store.attempt_key(user, drill_exam.id, "drill"))
+        st.switch_page("pages/exam.py")
+
+
+st.subheader("Practice Drills")
+drills = st.expander("Build a drill", key="drill_panel", on_change="rerun")
+with drills:
+    if drills.open:
+        drill_builder()
+
+st.divider()
+
 # --------- OPTIONAL: QUICK LINKS ----------
 with st.expander("Troubleshooting"):
     st.write(
         """
 - If the exam page says no exam is selected, return here and click **Start Exam** again.
-- If you want “Resume Exam” behavior, we can store an active attempt flag and show a Resume button.
+- If you left an exam midway (closed the tab, lost connection), click **Resume Exam** to continue where you stopped.
 """
     )
\ No newline at end of file
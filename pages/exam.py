@@ -1,7 +1,14 @@
 import time
-import pandas as pd
 import streamlit as st
-from streamlit_gsheets import GSheetsConnection
+
+from core import admission, history, offline, pacing, progress, reports, sessions, snapshots, state_store, tokens, trace
+from core.bank import get_bank
+from core.catalog import get_entry
+from core.index import DRILL_TITLE, is_drill
+from core.nav_grid import nav_grid, status_string
+from core.questions import MODULE_MAPPING, MODULE_MINUTES, image_html
+from core.routing import ROUTED_FROM, candidate_forms, default_forms, route
+from core.scoring import normalize_answer
 
 
 # ---------------------------
@@ -9,7 +16,7 @@ from streamlit_gsheets import GSheetsConnection
 # ---------------------------
 st.set_page_config(page_title="Exam • Prime Ivy", layout="wide")
 
-if not st.session_state.get("authenticated", False):
+if not tokens.restore():
     st.warning("Please log in to continue.")
     st.switch_page("SAT app.py")
 
@@ -21,59 +28,67 @@ if "selected_exam" not in st.session_state:
 # ---------------------------
 # CONFIG
 # ---------------------------
-URL = "https://docs.google.com/spreadsheets/d/1XLiSWYDUagXCsNbLKs_HE-BsaQzgFMw-M8FMU500f0M/edit?usp=sharing"
-
-EXAM_CONFIG = {
-    "sat_mock_v1": {
-        "sheet_url": URL,
-    }
-}
 exam_id = st.session_state.selected_exam
 exam_title = st.session_state.get("selected_exam_title", "SAT Mock Exam")
+exam_kind = st.session_state.get("selected_kind", "exam")  # "exam" or "drill"
+DRILL_MINUTES_PER_QUESTION = 1.5
+
+# Engine state is kept in a shared store so any worker can serve the next
+# rerun; pull it in when another process (or a previous session) moved it on.
+attempt = state_store.attempt_key(st.session_state.get("user_name", ""), exam_id, exam_kind)
 
 
 # ---------------------------
-# HELPERS
+# PAUSED (idle session)
 # ---------------------------
-def normalize_text(text: str) -> str:
-    if not isinstance(text, str):
-        return ""
-    return text.replace("\r\n", "\n").replace("\r", "\n").strip()
-
-
-def normalize_image_url(url: str | None) -> str | None:
-    if not isinstance(url, str):
-        return None
-    url = url.strip()
-    if not url:
-        return None
-
-    # Google Drive file link -> direct view link
-    if "drive.google.com/file/d/" in url:
-        file_id = url.split("/file/d/")[1].split("/")[0]
-        return f"https://drive.google.com/uc?export=view&id={file_id}"
+# The idle reaper checkpointed this attempt and dropped its state; nothing
+# runs (no timer fragments) until the student is back. The module clock
+# keeps counting, as it would with the tab closed.
+if st.session_state.get("_parked") == attempt:
+    st.title("Exam paused")
+    st.caption(f"{exam_title} • paused after {round(sessions.idle_sec() / 60)} min without activity. "
+               "Your answers are saved; the module timer kept running.")
+    if st.button("Continue", type="primary"):
+        st.session_state.pop("_parked")
+        st.rerun()
+    st.stop()
+st.session_state.pop("_parked", None)
 
-    # GitHub blob -> raw
-    if "github.com/" in url and "/blob/" in url:
-        parts = url.split("github.com/")[1].split("/blob/")
-        if len(parts) == 2:
-            repo_part = parts[0]
-            path_part = parts[1]
-            return f"https://raw.githubusercontent.com/{repo_part}/{path_part}".replace("?raw=true", "")
+if state_store.hydrate(st.session_state, attempt):
+    st.session_state.pop("live_correct", None)  # responses may have moved on elsewhere
 
-    return url
 
+# ---------------------------
+# WAITING ROOM
+# ---------------------------
+# Attempts whose module timer has not started yet go through admission
+# control first; nothing below (bank load, timers, first question) runs
+# until this session is let in.
+if "end_time" not in st.session_state:
+    admitted, position, eta = admission.controller().poll(attempt)
+    if not admitted:
+        st.title("Waiting Room")
+        st.caption(f"{exam_title} • your timer will start when the exam opens for you.")
+
+        @st.fragment(run_every=2.0)
+        def waiting_room():
+            admitted, position, eta = admission.controller().poll(attempt)
+            if admitted:
+                st.rerun()
+            st.info(f"You are **#{position}** in line. Estimated wait: about **{max(1, round(eta))} s**.")
+            st.progress(1 / position)
 
-def get_image_url(row, col="Image_URL") -> str | None:
-    raw = row.get(col)
-    if raw is None or (isinstance(raw, float) and pd.isna(raw)):
-        return None
-    s = str(raw).strip()
-    if s == "" or s.lower() in ("nan", "none", "null", "0", "false"):
-        return None
-    return normalize_image_url(s)
+        waiting_room()
+        if st.button("← Back to Dashboard"):
+            admission.controller().leave(attempt)
+            st.switch_page("pages/dashboard.py")
+        st.stop()
+    st.session_state._admission_ticket = attempt
 
 
+# ---------------------------
+# HELPERS
+# ---------------------------
 def stop_question_timer():
     """Finalize time for the currently open question (if any)."""
     key = st.session_state.get("current_question_key")
@@ -102,21 +117,54 @@ def finalize_active_timer_safeguard():
         stop_question_timer()
 
 
-def get_question_type(row) -> str:
-    qt = row.get("Question_Type", "MCQ")
-    qt = str(qt).strip().upper() if qt is not None else "MCQ"
-    return qt if qt in ("MCQ", "SPR") else "MCQ"
+def module_seconds(module_step: int) -> float:
+    label = st.session_state.get("module_forms", {}).get(module_step)
+    if is_drill(label):
+        return DRILL_MINUTES_PER_QUESTION * len(bank.form_rows(label)) * 60
+    return MODULE_MINUTES[module_step] * 60
 
 
 def set_module_timer(module_step: int):
-    module_times = {1: 32, 2: 32, 3: 35, 4: 35}
-    st.session_state.end_time = time.time() + (module_times[module_step] * 60)
+    st.session_state.end_time = time.time() + module_seconds(module_step)
 
 
-@st.cache_data(ttl=60)
-def load_data(sheet_url: str):
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    return conn.read(spreadsheet=sheet_url)
+def answered_indices(module_step: int) -> set[int]:
+    return {
+        q for (m, q), r in st.session_state.get("responses", {}).items()
+        if m == module_step and str(r.get("value", "")).strip()
+    }
+
+
+def progress_row() -> dict:
+    """What the proctor view shows for this attempt; remaining time is derived from end_time there."""
+    ss = st.session_state
+    module_step = ss.get("module_step", 1)
+    label = ss.get("module_forms", {}).get(module_step, module_mapping.get(module_step))
+    return {
+        "user": ss.get("user_name", ""),
+        "exam": exam_title,
+        "module_step": module_step,
+        "module": DRILL_TITLE if is_drill(label) else module_mapping.get(module_step, ""),
+        "q_index": ss.get("q_index", 0),
+        "answered": len(answered_indices(module_step)),
+        "total": len(bank.form_rows(label)),
+        "end_time": ss.get("end_time"),
+        "break_end": ss.get("break_end"),
+        "on_break": ss.get("on_break", False),
+        "viewing_review": ss.get("viewing_review", False),
+        "finished": ss.get("finished_all", False),
+    }
+
+
+def save_engine_state():
+    state_store.save(st.session_state, attempt)
+    progress.publish(st.session_state, attempt, progress_row(), sessions.last_seen())
+
+
+def rerun():
+    """Persist engine state, then rerun. Every transition goes through here."""
+    save_engine_state()
+    st.rerun()
 
 
 # ---------------------------
@@ -239,34 +287,6 @@ div[data-testid="stPopoverBody"] {
     font-size: 13px;
     font-weight: 600;
 }
-.pop-grid-wrap { display:flex; justify-content:center; padding: 10px 0; }
-.pop-grid-inner { width: 350px; max-width: 100%; margin: 0 auto; }
-.pop-grid-inner div.stButton > button {
-    background: #ffffff !important;
-    border-radius: 4px !important;
-    font-weight: 600 !important;
-    font-size: 10px !important;
-    width: 32px !important;
-    height: 32px !important;
-    padding: 0px !important;
-    margin: 0px !important;
-    border: 1.5px dotted #9ca3af !important;
-    color: #1d4ed8 !important;
-}
-div[data-testid="stPopoverBody"] [data-testid="column"] {
-    padding-left: 1px !important;
-    padding-right: 1px !important;
-}
-div[data-testid="stPopoverBody"] button[aria-label^="📍"] {
-    border: 2.5px solid #111827 !important;
-    color: #111827 !important;
-}
-div[data-testid="stPopoverBody"] button[aria-label^="🚩"] {
-    background: #ef4444 !important;
-    border: 2px solid #ef4444 !important;
-    color: #ffffff !important;
-}
-.answered-outline div.stButton > button { border: 2px solid #2563eb !important; }
 .pop-footer { display:flex; justify-content:center; width:100%; padding-top: 12px; }
 .pop-footer .footer-wrap { width:100%; max-width: 300px; margin: 0 auto; }
 .pop-footer .footer-wrap div.stButton > button {
@@ -288,22 +308,24 @@ div[data-testid="stPopoverBody"] button[aria-label^="🚩"] {
 # ---------------------------
 # LOAD QUESTIONS
 # ---------------------------
-sheet_url = EXAM_CONFIG.get(exam_id, {}).get("sheet_url", URL)
-full_df = load_data(sheet_url)
+entry = get_entry(exam_id)
+bank = get_bank(exam_id, st.session_state.get("bank_version"))  # the version this attempt started on
+full_df = bank.df
 
-module_mapping = {
-    1: "Session 1 Module 1",
-    2: "Session 1 Module 2",
-    3: "Session 2 Module 1",
-    4: "Session 2 Module 2",
-}
+module_mapping = MODULE_MAPPING
 
 
 # ---------------------------
 # SESSION STATE (exam engine)
 # ---------------------------
+if "bank_version" not in st.session_state:
+    # pin the attempt: a sheet edit from here on does not change its questions or key
+    st.session_state.bank_version = snapshots.pin(entry, bank)
+if "module_forms" not in st.session_state:
+    st.session_state.module_forms = default_forms(entry)
 if "module_step" not in st.session_state:
     st.session_state.module_step = 1
+    trace.start_trace(exam_id, bank.module_sizes(st.session_state.module_forms))
 if "on_break" not in st.session_state:
     st.session_state.on_break = False
 if "break_end" not in st.session_state:
@@ -324,6 +346,18 @@ if "end_time" not in st.session_state:
 # init timing AFTER engine state is ready
 init_timing()
 
+# this full rerun is an interaction: reset the idle clock, re-measure the state
+sessions.touch(st.session_state, attempt)
+
+
+def park_if_idle():
+    """From a timer tick: checkpoint and free an idle session, leaving the paused page."""
+    if sessions.should_park():
+        stop_question_timer()
+        save_engine_state()
+        sessions.park(st.session_state, attempt)
+        st.rerun()
+
 
 # ---------------------------
 # TOP BAR: back + exam title
@@ -333,6 +367,8 @@ top_l, top_r = st.columns([1, 1])
 with top_l:
     if st.button("← Back to Dashboard"):
         finalize_active_timer_safeguard()
+        trace.record("leave")
+        save_engine_state()
         st.switch_page("pages/dashboard.py")
 
 with top_r:
@@ -346,6 +382,7 @@ st.divider()
 # ---------------------------
 if st.session_state.finished_all:
     stop_question_timer()
+    save_engine_state()
     st.success("Test completed!")
     if st.button("Go to Score Page", use_container_width=True):
         st.switch_page("pages/score.py")
@@ -370,6 +407,7 @@ if st.session_state.on_break:
 
         @st.fragment(run_every=1.0)
         def break_timer():
+            park_if_idle()
             rem = int((st.session_state.break_end or time.time()) - time.time())
             mins, secs = divmod(max(0, rem), 60)
             st.markdown(
@@ -386,13 +424,14 @@ if st.session_state.on_break:
 
         if st.button("Resume Testing Now", use_container_width=True):
             finalize_active_timer_safeguard()   # 🔐 finalize timing before state change
+            trace.record("resume")
 
             st.session_state.on_break = False
             st.session_state.module_step = 3
             st.session_state.q_index = 0
             st.session_state.viewing_review = False
             set_module_timer(3)
-            st.rerun()
+            rerun()
 
     with col_right:
         st.markdown(
@@ -411,6 +450,7 @@ if st.session_state.on_break:
             unsafe_allow_html=True,
         )
 
+    save_engine_state()
     st.stop()
 
 
@@ -418,8 +458,61 @@ if st.session_state.on_break:
 # FILTER CURRENT MODULE
 # ---------------------------
 module = st.session_state.module_step
-current_label = module_mapping[module]
-df = full_df[full_df["Session"] == current_label].reset_index(drop=True)
+last_module = max(st.session_state.module_forms)
+form_label = st.session_state.module_forms.get(module, module_mapping.get(module))  # which questions they get
+current_label = DRILL_TITLE if is_drill(form_label) else module_mapping[module]  # what the student sees
+df = bank.form(form_label)
+payloads = bank.payloads(form_label)
+pace_table = pacing.load_pacing().get(pacing.pacing_key(entry, form_label))
+
+
+# ---------------------------
+# ADAPTIVE ROUTING
+# ---------------------------
+# Only steps with both candidate forms in the bank are routed; any other
+# step (e.g. an assembled form) keeps the form the attempt started with.
+next_candidates = candidate_forms(entry, bank.forms, ROUTED_FROM[module]) if module in ROUTED_FROM else {}
+routes_next = bool(next_candidates) and ROUTED_FROM[module] in st.session_state.module_forms
+
+
+def live_tally(module_step: int) -> dict[int, bool]:
+    """Per-question correctness of a routing module, rebuilt from responses after a hydration."""
+    tallies = st.session_state.setdefault("live_correct", {})
+    if module_step not in tallies:
+        key = bank.form_answer_key(st.session_state.module_forms.get(module_step, module_mapping[module_step]))
+        tallies[module_step] = {
+            q: normalize_answer(resp.get("value", "")) == key[q]["norm"]
+            for (m, q), resp in st.session_state.responses.items()
+            if m == module_step and q in key
+        }
+    return tallies[module_step]
+
+
+def live_grade(q_index: int, value):
+    """Keep the routing score current as answers arrive, so Submit needs no grading pass."""
+    if not routes_next:
+        return
+    key = bank.form_answer_key(form_label).get(q_index)
+    live_tally(module)[q_index] = bool(value) and key is not None and normalize_answer(value) == key["norm"]
+
+
+def routing_score(module_step: int) -> tuple[int, int]:
+    """(correct, total) for a routing module."""
+    return sum(live_tally(module_step).values()), len(df)
+
+
+# Both candidate forms for the next module are compiled now and their images
+# fetched by the browser in the background, so "Submit Module" switches
+# forms with nothing left to load.
+if routes_next:
+    prefetch_images = {p["image_url"]: p.get("image") for p in bank.prefetch(next_candidates.values())}
+    if prefetch_images:
+        st.markdown(
+            '<div style="display:none">'
+            + "".join(image_html(u, image, 'loading="eager" alt=""') for u, image in prefetch_images.items())
+            + "</div>",
+            unsafe_allow_html=True,
+        )
 
 
 # ---------------------------
@@ -427,13 +520,15 @@ df = full_df[full_df["Session"] == current_label].reset_index(drop=True)
 # ---------------------------
 @st.fragment(run_every=1.0)
 def test_header():
+    park_if_idle()
     rem = int(st.session_state.end_time - time.time())
     mins, secs = divmod(max(0, rem), 60)
 
     if rem <= 0 and not st.session_state.viewing_review:
         stop_question_timer()
         st.session_state.viewing_review = True
-        st.rerun()
+        trace.record("timeout", module)
+        rerun()
 
     c1, c2, c3 = st.columns([1.5, 1, 1.5])
     with c1:
@@ -445,11 +540,28 @@ def test_header():
             unsafe_allow_html=True,
         )
     with c3:
-        st.write("")
+        if st.session_state.viewing_review:
+            st.write("")
+        else:
+            # elapsed vs. cohort time-to-reach-this-question: one list lookup per tick
+            module_sec = module_seconds(module)
+            pace, off = pacing.pace_status(
+                pace_table, st.session_state.q_index, module_sec - max(0, rem), len(df), module_sec
+            )
+            text = {
+                "ahead": f"🔵 Ahead (~{max(1, round(off / 60))} min)",
+                "on_track": "🟢 On track",
+                "behind": f"🟠 Behind (~{max(1, round(off / 60))} min)",
+            }[pace]
+            st.markdown(f"<div style='text-align:right; font-weight:700;'>{text}</div>", unsafe_allow_html=True)
 
 test_header()
 st.divider()
 
+if "_admission_ticket" in st.session_state:
+    # first question is on screen: this start no longer counts against the budget
+    admission.controller().release(st.session_state.pop("_admission_ticket"))
+
 
 # ---------------------------
 # REVIEW PAGE
@@ -459,48 +571,54 @@ if st.session_state.viewing_review:
 
     st.subheader(f"Review: {current_label}")
 
-    grid = st.columns(6)
-    for i in range(len(df)):
-        with grid[i % 6]:
-            is_flg = st.session_state.flags.get(module, {}).get(i, False)
-            resp = st.session_state.responses.get((module, i))
-            is_ans = resp is not None and str(resp.get("value", "")).strip() != ""
-
-            if is_flg and is_ans:
-                label = f"🚩 Q{i+1} ▣"
-            elif is_flg:
-                label = f"🚩 Q{i+1}"
-            elif is_ans:
-                label = f"Q{i+1} ▣"
-            else:
-                label = f"Q{i+1} ▢"
-
-            if st.button(label, key=f"rev_{module}_{i}", use_container_width=True):
-                stop_question_timer()
-                st.session_state.q_index = i
-                st.session_state.viewing_review = False
-                st.rerun()
+    module_flags = st.session_state.flags.get(module, {})
+    clicked = nav_grid(
+        status_string(len(df), answered_indices(module), {i for i, on in module_flags.items() if on}),
+        layout="review",
+        key=f"revgrid_{module}",
+    )
+    if clicked is not None:
+        stop_question_timer()
+        st.session_state.q_index = clicked
+        st.session_state.viewing_review = False
+        trace.record("goto", clicked, "review")
+        rerun()
 
     st.divider()
 
     if st.button("Submit Module", type="primary", use_container_width=True):
         finalize_active_timer_safeguard()
+        trace.record("submit", module)
 
-        if module == 2:
+        if module == 2 and last_module > 2:
             st.session_state.on_break = True
             st.session_state.break_end = time.time() + (10 * 60)
-            st.rerun()
-        elif module < 4:
+            rerun()
+        elif module < last_module:
+            if routes_next:
+                correct, total = routing_score(module)
+                next_step = ROUTED_FROM[module]
+                st.session_state.module_forms[next_step] = route(
+                    entry, bank.forms, next_step, correct, total, st.session_state.module_forms.get(next_step)
+                )
             st.session_state.module_step += 1
             st.session_state.q_index = 0
             st.session_state.viewing_review = False
             set_module_timer(st.session_state.module_step)
-            st.rerun()
+            rerun()
         else:
             st.session_state.finished_all = True
             st.session_state.viewing_review = False
             st.session_state.on_break = False
             st.session_state.exam_finished_at = time.time()
+            save_engine_state()
+            reports.submit(st.session_state.get("user_name", ""), st.session_state, exam_kind, exam_title)
+            history.submit(st.session_state.get("user_name", ""), st.session_state, exam_kind, exam_title)
+            if offline.enabled():
+                offline.queue_result(
+                    st.session_state.get("user_name", ""), state_store.encode_state(st.session_state),
+                    exam_kind, exam_title, exam_id,
+                )
             st.switch_page("pages/score.py")
 
 
@@ -511,37 +629,25 @@ else:
     # start timing for current question (only in question view)
     start_question_timer(module, st.session_state.q_index)
 
-    q_data = df.iloc[st.session_state.q_index]
+    q_data = payloads[st.session_state.q_index]
     l, r = st.columns([1, 1], gap="large")
 
     with l:
         has_table = False
 
-        if "Table_Data" in q_data and pd.notna(q_data.get("Table_Data")):
-            try:
-                rows = [rr.split(",") for rr in str(q_data["Table_Data"]).split(";")]
-                table_html = "<table style='width:100%; border-collapse: collapse; margin-bottom: 10px;'>"
-                table_html += "<tr>" + "".join(
-                    f"<th style='border:1px solid #e5e7eb; padding:6px; background:#f9fafb;'>{c.strip()}</th>"
-                    for c in rows[0]
-                ) + "</tr>"
-                for row in rows[1:]:
-                    table_html += "<tr>" + "".join(
-                        f"<td style='border:1px solid #e5e7eb; padding:6px;'>{c.strip()}</td>" for c in row
-                    ) + "</tr>"
-                table_html += "</table>"
-                st.markdown(table_html, unsafe_allow_html=True)
-                has_table = True
-            except Exception:
-                pass
-
-        img_url = get_image_url(q_data, col="Image_URL")
+        table = q_data["table_html"]
+        if table:
+            st.markdown(table, unsafe_allow_html=True)
+            has_table = True
+
+        img_url = q_data["image_url"]
         has_img = bool(img_url)
         if img_url:
+            # WebP where the browser supports it, right-sized for 1x/2x screens
             st.markdown(
                 f"""
                 <div class="sat-image">
-                    <img src="{img_url}" />
+                    {image_html(img_url, q_data.get("image"))}
                 </div>
                 """,
                 unsafe_allow_html=True,
@@ -554,7 +660,7 @@ else:
             passage_height -= 110
         passage_height = max(240, passage_height)
 
-        clean_content = normalize_text(q_data.get("Content", ""))
+        clean_content = q_data["content"]
         st.markdown(
             f'<div class="passage-box" style="height:{passage_height}px;">{clean_content}</div>',
             unsafe_allow_html=True,
@@ -567,26 +673,23 @@ else:
             value=curr_flags.get(st.session_state.q_index, False),
             key=f"flag_{module}_{st.session_state.q_index}",
         )
+        if is_flagged != curr_flags.get(st.session_state.q_index, False):
+            trace.record("flag", st.session_state.q_index, is_flagged)
         curr_flags[st.session_state.q_index] = is_flagged
 
         st.markdown(f"### Question {st.session_state.q_index + 1}")
-        st.write(f"*{q_data.get('Prompt','')}*")
+        st.write(f"*{q_data['prompt']}*")
 
         q_index = st.session_state.q_index
         resp_key = (module, q_index)
 
-        qtype = get_question_type(q_data)
+        qtype = q_data["type"]
         saved = st.session_state.responses.get(resp_key, {})
         saved_val = saved.get("value")
 
         if qtype == "MCQ":
             letters = ["A", "B", "C", "D"]
-            labels = [
-                f"A) {q_data.get('Option_A','')}",
-                f"B) {q_data.get('Option_B','')}",
-                f"C) {q_data.get('Option_C','')}",
-                f"D) {q_data.get('Option_D','')}",
-            ]
+            labels = [f"{letter}) {option}" for letter, option in zip(letters, q_data["options"])]
             saved_index = letters.index(saved_val) if saved_val in letters else None
 
             selected_label = st.radio(
@@ -599,7 +702,10 @@ else:
 
             if selected_label is not None:
                 selected_letter = selected_label.split(")")[0]
+                if selected_letter != saved_val:
+                    trace.record("answer", q_index, selected_letter)
                 st.session_state.responses[resp_key] = {"type": "MCQ", "value": selected_letter}
+                live_grade(q_index, selected_letter)
             else:
                 st.session_state.responses.pop(resp_key, None)
 
@@ -612,10 +718,13 @@ else:
                 label_visibility="collapsed",
             ).strip()
 
+            if val != (saved_val or ""):
+                trace.record("answer", q_index, val or None)
             if val != "":
                 st.session_state.responses[resp_key] = {"type": "SPR", "value": val}
             else:
                 st.session_state.responses.pop(resp_key, None)
+            live_grade(q_index, val)
 
         st.write("---")
         b1, b2 = st.columns(2)
@@ -624,7 +733,8 @@ else:
             if st.session_state.q_index > 0 and st.button("⬅️ Back", use_container_width=True):
                 stop_question_timer()
                 st.session_state.q_index -= 1
-                st.rerun()
+                trace.record("goto", st.session_state.q_index, "back")
+                rerun()
 
         with b2:
             label = "Review Module ➡️" if st.session_state.q_index == len(df) - 1 else "Next ➡️"
@@ -632,9 +742,11 @@ else:
                 stop_question_timer()
                 if st.session_state.q_index == len(df) - 1:
                     st.session_state.viewing_review = True
+                    trace.record("review", "next")
                 else:
                     st.session_state.q_index += 1
-                st.rerun()
+                    trace.record("goto", st.session_state.q_index, "next")
+                rerun()
 
 
 # ---------------------------
@@ -668,41 +780,25 @@ with f_mid:
             unsafe_allow_html=True,
         )
 
-        st.markdown('<div class="pop-grid-wrap"><div class="pop-grid-inner">', unsafe_allow_html=True)
-
-        cols = st.columns(10, gap="small")
-        for i in range(len(df)):
-            with cols[i % 10]:
-                is_curr = (i == st.session_state.q_index)
-                is_flg = current_mod_flags.get(i, False)
-                resp = st.session_state.responses.get((module, i))
-                is_ans = resp is not None and str(resp.get("value", "")).strip() != ""
-
-                if is_curr:
-                    label = f"📍{i+1}"
-                elif is_flg:
-                    label = f"🚩{i+1}"
-                else:
-                    label = str(i + 1)
-
-                add_answered_outline = (is_ans and (not is_curr) and (not is_flg))
-                if add_answered_outline:
-                    st.markdown('<div class="answered-outline">', unsafe_allow_html=True)
-
-                if st.button(label, key=f"nav_{module}_{i}"):
-                    stop_question_timer()
-                    st.session_state.q_index = i
-                    st.session_state.viewing_review = False
-                    st.rerun()
-
-                if add_answered_outline:
-                    st.markdown("</div>", unsafe_allow_html=True)
-
-        st.markdown("</div></div>", unsafe_allow_html=True)
+        clicked = nav_grid(
+            status_string(len(df), answered_indices(module), {i for i, on in current_mod_flags.items() if on}),
+            layout="nav",
+            current=st.session_state.q_index,
+            key=f"navgrid_{module}",
+        )
+        if clicked is not None:
+            stop_question_timer()
+            st.session_state.q_index = clicked
+            st.session_state.viewing_review = False
+            trace.record("goto", clicked, "nav")
+            rerun()
 
         st.markdown('<div class="pop-footer"><div class="footer-wrap">', unsafe_allow_html=True)
         if st.button("Go to Review Page", key="goto_rev", use_container_width=True):
             stop_question_timer()
             st.session_state.viewing_review = True
-            st.rerun()
-        st.markdown("</div></div></div>", unsafe_allow_html=True)
\ No newline at end of file
+            trace.record("review", "nav")
+            rerun()
+        st.markdown("</div></div></div>", unsafe_allow_html=True)
+
+save_engine_state()
@@ -0,0 +1,104 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+from core import progress, quota, sessions, tokens
+from core.scoring import fmt_time
+
+st.set_page_config(page_title="Proctor • Prime Ivy", layout="wide")
+
+# --------- AUTH GUARD ----------
+if not tokens.restore():
+    st.warning("Please log in to continue.")
+    st.switch_page("SAT app.py")
+
+if not progress.is_proctor(st.session_state.get("user_name", "")):
+    st.error("This page is for proctors only.")
+    if st.button("← Back to Dashboard"):
+        st.switch_page("pages/dashboard.py")
+    st.stop()
+
+# Attempts idle longer than this are left off the board entirely (yesterday's sessions).
+MAX_ROW_AGE_SEC = 12 * 60 * 60
+STATUS_ORDER = {"stalled": 0, "testing": 1, "review": 2, "break": 3, "finished": 4}
+
+# --------- HEADER ----------
+c1, c2 = st.columns([3, 1])
+with c1:
+    st.title("Live Proctor View")
+    st.caption("Every active attempt, updated every few seconds.")
+with c2:
+    st.write("")
+    if st.button("← Back to Dashboard", use_container_width=True):
+        st.switch_page("pages/dashboard.py")
+
+hide_finished = st.checkbox("Hide finished attempts", value=True)
+st.divider()
+
+
+# --------- LIVE BOARD ----------
+# The session keeps its own copy of the board and merges only the rows that
+# changed since the last poll, so the fetch costs the number of changes, not
+# the number of students. Rendering is still one pass over every row per
+# tick: Remaining, Last activity and stalled status move with the clock.
+@st.fragment(run_every=2.0)
+def live_board():
+    view = st.session_state.setdefault("_proctor_view", {"seq": 0, "rows": {}})
+    view["seq"], changed = progress.get_board().changes_since(view["seq"])
+    view["rows"].update(changed)
+
+    now = time.time()
+    counts = {s: 0 for s in STATUS_ORDER}
+    table = []
+    for row in view["rows"].values():
+        if now - row.get("updated_at", now) > MAX_ROW_AGE_SEC:
+            continue
+        status = progress.status(row, now)
+        counts[status] += 1
+        if hide_finished and status == "finished":
+            continue
+        deadline = row.get("break_end") if row.get("on_break") else row.get("end_time")
+        table.append(
+            {
+                "Student": row.get("user", ""),
+                "Exam": row.get("exam", ""),
+                "Module": "Break" if row.get("on_break") else row.get("module", ""),
+                "Question": f"{row.get('q_index', 0) + 1} / {row.get('total', 0)}",
+                "Answered": f"{row.get('answered', 0)} / {row.get('total', 0)}",
+                "Remaining": fmt_time(max(0, (deadline or now) - now)) if status != "finished" else "—",
+                "Status": status,
+                "Last activity": f"{int(now - progress.last_seen(row, now))}s ago",
+            }
+        )
+
+    m1, m2, m3, m4, m5 = st.columns(5)
+    m1.metric("Testing", counts["testing"])
+    m2.metric("Reviewing", counts["review"])
+    m3.metric("On break", counts["break"])
+    m4.metric("Stalled", counts["stalled"])
+    m5.metric("Finished", counts["finished"])
+
+    if not table:
+        st.info("No active attempts right now.")
+        return
+    df = pd.DataFrame(table)
+    df = df.sort_values(["Status", "Student"], key=lambda c: c.map(STATUS_ORDER) if c.name == "Status" else c)
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+
+live_board()
+
+with st.expander("Sheets quota (this worker)"):
+    metrics = quota.scheduler().metrics()
+    st.caption(f"{metrics.pop('tokens')} call(s) available now • {metrics.pop('queued')} waiting")
+    st.dataframe(pd.DataFrame(metrics).T, use_container_width=True)
+
+with st.expander("Exam sessions (this worker)"):
+    usage = sessions.stats()
+    st.caption(
+        f"{usage['sessions']} live session(s) • {usage['idle']} idle • "
+        f"{usage['bytes'] / 1024:.1f} KiB of engine state"
+    )
+    if usage["largest"]:
+        st.dataframe(pd.DataFrame(usage["largest"]), use_container_width=True, hide_index=True)
@@ -1,70 +1,22 @@
 import streamlit as st
-from streamlit_gsheets import GSheetsConnection
-import pandas as pd
-import re
+
+from core import reports, state_store, tokens
+from core.bank import bank_for
+from core.results import attempt_mapping, confidence_label, content_hash, grade_state
+from core.scoring import estimate_section_range_harder, fmt_time
 
 # -----------------------------
 # CONFIG
 # -----------------------------
-URL = "https://docs.google.com/spreadsheets/d/1XLiSWYDUagXCsNbLKs_HE-BsaQzgFMw-M8FMU500f0M/edit?usp=sharing"
-
 st.set_page_config(page_title="Score Report", layout="wide")
 
 # -----------------------------
 # HELPERS
 # -----------------------------
-def load_data():
-    conn = st.connection("gsheets", type=GSheetsConnection)
-    return conn.read(spreadsheet=URL)
-
-def normalize_answer(x: str) -> str:
-    """Normalize for comparison (works for MCQ + basic SPR)."""
-    if x is None:
-        return ""
-    s = str(x).strip()
-    s = s.replace("−", "-")          # minus sign variants
-    s = s.replace(" ", "")           # ignore spaces
-    s = s.replace("\u00a0", "")      # non-breaking spaces
-
-    # If it's like "A)" or "A." -> keep just A
-    if re.match(r"^[A-Da-d][\)\.\:]", s):
-        s = s[0]
-
-    return s.upper()
-
-def is_correct(student_val: str, correct_val: str, qtype: str) -> bool:
-    s = normalize_answer(student_val)
-    c = normalize_answer(correct_val)
-    if qtype == "MCQ":
-        return s == c
-    return s == c
-
-def get_question_type(row) -> str:
-    qt = row.get("Question_Type", "MCQ")
-    qt = str(qt).strip().upper() if qt is not None else "MCQ"
-    return qt if qt in ("MCQ", "SPR") else "MCQ"
-
-def fmt_time(seconds: float) -> str:
-    seconds = float(seconds or 0)
-    m = int(seconds // 60)
-    s = int(round(seconds % 60))
-    return f"{m:02d}:{s:02d}"
-
 # ---- helpers (put once in your HELPERS section; leaving here for clarity) ----
 def clamp(x, lo, hi):
     return max(lo, min(hi, x))
 
-def confidence_label(lo: int, hi: int, answered: int, total: int) -> str:
-    width = hi - lo
-    answered_rate = (answered / total) if total else 0
-
-    if answered_rate < 0.75:
-        return "Low confidence"
-    if width <= 40 and answered_rate >= 0.95:
-        return "High confidence"
-    if width <= 80:
-        return "Medium confidence"
-    return "Low confidence"
 
 def render_score_gauge(label: str, lo: int, hi: int, min_score=400, max_score=1600):
     lo_c = clamp(lo, min_score, max_score)
@@ -95,42 +47,22 @@ def render_score_gauge(label: str, lo: int, hi: int, min_score=400, max_score=16
         unsafe_allow_html=True,
     )
 
-# -----------------------------
-# SAT RANGE (Harder Approx.)
-# -----------------------------
-def score_range_from_pct_harder(pct01: float) -> tuple[int, int]:
-    # pct01 is 0.0 to 1.0
-    pct01 = max(0.0, min(1.0, float(pct01 or 0)))
-
-    bands = [
-        (0.00, 0.10, (200, 250)),
-        (0.10, 0.20, (250, 310)),
-        (0.20, 0.30, (310, 370)),
-        (0.30, 0.40, (370, 450)),
-        (0.40, 0.50, (450, 530)),
-        (0.50, 0.60, (530, 610)),
-        (0.60, 0.70, (610, 690)),
-        (0.70, 0.80, (690, 750)),
-        (0.80, 0.85, (750, 770)),
-        (0.85, 0.90, (770, 790)),
-        (0.90, 0.93, (790, 800)),
-        (0.93, 1.01, (800, 800)),  # include 100%
-    ]
-
-    for lo, hi, rng in bands:
-        if lo <= pct01 < hi:
-            return rng
-    return (200, 800)
-
-
-def estimate_section_range_harder(correct: int, total: int) -> tuple[int, int, float]:
-    pct01 = (correct / total) if total else 0.0
-    lo, hi = score_range_from_pct_harder(pct01)
-    return lo, hi, pct01
-
 # -----------------------------
 # REQUIRE EXAM DATA
 # -----------------------------
+tokens.restore()  # a refreshed page gets user and selected exam back from the session token
+is_drill_attempt = st.session_state.get("selected_kind", "exam") == "drill"
+
+# A fresh session (reconnect, other worker) can pick the attempt up from the store
+if "responses" not in st.session_state and "selected_exam" in st.session_state:
+    state_store.hydrate(
+        st.session_state,
+        state_store.attempt_key(
+            st.session_state.get("user_name", ""), st.session_state.selected_exam,
+            st.session_state.get("selected_kind", "exam"),
+        ),
+    )
+
 if "responses" not in st.session_state:
     st.error("No exam responses found. Please start the exam first.")
     st.stop()
@@ -139,14 +71,12 @@ if "authenticated" in st.session_state and not st.session_state.authenticated:
     st.error("Please log in first.")
     st.stop()
 
-# read timing dict from exam.py (safe default)
-question_times = st.session_state.get("question_times", {})  # {(module, q_index): seconds}
-
 # -----------------------------
 # LOAD QUESTIONS
 # -----------------------------
 try:
-    full_df = load_data()
+    bank = bank_for(st.session_state)  # the version this attempt was taken on
+    full_df = bank.df
 except Exception as e:
     st.error(f"Could not load exam data: {e}")
     st.stop()
@@ -158,67 +88,21 @@ if "Correct_Answer" not in full_df.columns:
 # -----------------------------
 # SCORE CALCULATION
 # -----------------------------
-module_mapping = {
-    1: "Session 1 Module 1",
-    2: "Session 1 Module 2",
-    3: "Session 2 Module 1",
-    4: "Session 2 Module 2",
-}
-
-rows = []
-total_correct = 0
-total_count = 0
-
-per_module = {m: {"correct": 0, "total": 0, "time_sec": 0.0} for m in module_mapping.keys()}
-total_time_sec = 0.0
-
-for module_step, session_label in module_mapping.items():
-    df_mod = full_df[full_df["Session"] == session_label].reset_index(drop=True)
-
-    for q_index in range(len(df_mod)):
-        row = df_mod.iloc[q_index]
-        qtype = get_question_type(row)
-
-        correct = row.get("Correct_Answer", "")
-        resp = st.session_state.responses.get((module_step, q_index), None)
-
-        student_val = ""
-        answered = False
-        if resp is not None:
-            student_val = resp.get("value", "")
-            answered = str(student_val).strip() != ""
-
-        correct_bool = False
-        if answered:
-            correct_bool = is_correct(student_val, correct, qtype)
-
-        # time
-        t_sec = float(question_times.get((module_step, q_index), 0.0))
-        per_module[module_step]["time_sec"] += t_sec
-        total_time_sec += t_sec
-
-        total_count += 1
-        per_module[module_step]["total"] += 1
-
-        if correct_bool:
-            total_correct += 1
-            per_module[module_step]["correct"] += 1
-
-        rows.append(
-            {
-                "Module": session_label,
-                "Q#": q_index + 1,
-                "Type": qtype,
-                "Time (sec)": round(t_sec, 2),
-                "Time": fmt_time(t_sec),
-                "Answered?": "Yes" if answered else "No",
-                "Student": student_val,
-                "Correct": correct,
-                "Result": "✅ Correct" if correct_bool else ("❌ Wrong" if answered else "— Unanswered"),
-            }
-        )
-
-score_df = pd.DataFrame(rows)
+module_mapping = attempt_mapping(st.session_state.get("selected_kind", "exam"))
+
+# Graded once per attempt content; widget reruns reuse it. The lowercase
+# search column is built here so the review filter is a plain mask.
+attempt_hash = content_hash(bank, st.session_state)
+memo = st.session_state.get("_score_memo")
+if memo is None or memo["hash"] != attempt_hash:
+    score_df, per_module = grade_state(bank, st.session_state, st.session_state.get("selected_kind", "exam"))
+    score_df["_search"] = (score_df["Student"].astype(str) + "\n" + score_df["Correct"].astype(str)).str.lower()
+    memo = st.session_state._score_memo = {"hash": attempt_hash, "score_df": score_df, "per_module": per_module}
+score_df, per_module = memo["score_df"], memo["per_module"]
+
+total_correct = sum(m["correct"] for m in per_module.values())
+total_count = sum(m["total"] for m in per_module.values())
+total_time_sec = sum(m["time_sec"] for m in per_module.values())
 
 # -----------------------------
 # UI
@@ -228,63 +112,65 @@ st.markdown("## 📊 Score Report")
 # -----------------------------
 # TOP SUMMARY — SAT SCORE RANGE
 # -----------------------------
-rw_correct = per_module[1]["correct"] + per_module[2]["correct"]
-rw_total   = per_module[1]["total"]   + per_module[2]["total"]
+# Drills have no SAT scale; they get the plain stats below.
+if not is_drill_attempt:
+    rw_correct = per_module[1]["correct"] + per_module[2]["correct"]
+    rw_total   = per_module[1]["total"]   + per_module[2]["total"]
+
+    m_correct  = per_module[3]["correct"] + per_module[4]["correct"]
+    m_total    = per_module[3]["total"]   + per_module[4]["total"]
+
+    rw_lo, rw_hi, rw_pct01 = estimate_section_range_harder(rw_correct, rw_total)
+    m_lo,  m_hi,  m_pct01  = estimate_section_range_harder(m_correct, m_total)
+
+    total_lo = rw_lo + m_lo
+    total_hi = rw_hi + m_hi
+
+    # Answered count for confidence (uses your score_df from earlier)
+    answered_total = int(score_df["Answered?"].eq("Yes").sum()) if "Answered?" in score_df.columns else total_correct
+    conf = confidence_label(total_lo, total_hi, answered_total, total_count)
+
+    t1, t2, t3 = st.columns([1, 1, 1])
+
+    with t1:
+        # Big "Likely" card + confidence label
+        st.markdown(
+            f"""
+            <div style="padding:14px 16px; margin-right:42px; border:1px solid #e5e7eb; border-radius:14px; background:#ffffff;">
+              <div style="font-size:12px; color:#6b7280; font-weight:800;">Estimated Total SAT</div>
+              <div style="font-size:34px; font-weight:900; color:#111827; line-height:1.0; margin-top:4px;">
+                {total_lo}–{total_hi}
+              </div>
+              <div style="margin-top:6px; font-size:13px; color:#374151;">
+                <b>Confidence:</b> {conf}
+              </div>
+              <div style="margin-top:6px; font-size:13px; color:#374151;">
+                <b>Likely</b> {total_lo}–{total_hi}
+              </div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
 
-m_correct  = per_module[3]["correct"] + per_module[4]["correct"]
-m_total    = per_module[3]["total"]   + per_module[4]["total"]
+        # Gauge bar under the card
+        render_score_gauge("Score gauge", total_lo, total_hi, min_score=400, max_score=1600)
 
-rw_lo, rw_hi, rw_pct01 = estimate_section_range_harder(rw_correct, rw_total)
-m_lo,  m_hi,  m_pct01  = estimate_section_range_harder(m_correct, m_total)
 
-total_lo = rw_lo + m_lo
-total_hi = rw_hi + m_hi
+    with t2:
+        st.metric("Reading & Writing", f"{rw_lo}–{rw_hi}")
+        st.caption(f"Accuracy: **{rw_pct01*100:.1f}%**")
 
-# Answered count for confidence (uses your score_df from earlier)
-answered_total = int(score_df["Answered?"].eq("Yes").sum()) if "Answered?" in score_df.columns else total_correct
-conf = confidence_label(total_lo, total_hi, answered_total, total_count)
+    with t3:
+        st.metric("Math", f"{m_lo}–{m_hi}")
+        st.caption(f"Accuracy: **{m_pct01*100:.1f}%**")
 
-t1, t2, t3 = st.columns([1, 1, 1])
 
-with t1:
-    # Big "Likely" card + confidence label
-    st.markdown(
-        f"""
-        <div style="padding:14px 16px; margin-right:42px; border:1px solid #e5e7eb; border-radius:14px; background:#ffffff;">
-          <div style="font-size:12px; color:#6b7280; font-weight:800;">Estimated Total SAT</div>
-          <div style="font-size:34px; font-weight:900; color:#111827; line-height:1.0; margin-top:4px;">
-            {total_lo}–{total_hi}
-          </div>
-          <div style="margin-top:6px; font-size:13px; color:#374151;">
-            <b>Confidence:</b> {conf}
-          </div>
-          <div style="margin-top:6px; font-size:13px; color:#374151;">
-            <b>Likely</b> {total_lo}–{total_hi}
-          </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
+    st.caption(
+        "Estimated score range based on historical SAT difficulty. "
+        "This is not an official College Board score."
     )
 
-    # Gauge bar under the card
-    render_score_gauge("Score gauge", total_lo, total_hi, min_score=400, max_score=1600)
-
-
-with t2:
-    st.metric("Reading & Writing", f"{rw_lo}–{rw_hi}")
-    st.caption(f"Accuracy: **{rw_pct01*100:.1f}%**")
-
-with t3:
-    st.metric("Math", f"{m_lo}–{m_hi}")
-    st.caption(f"Accuracy: **{m_pct01*100:.1f}%**")
-
-
-st.caption(
-    "Estimated score range based on historical SAT difficulty. "
-    "This is not an official College Board score."
-)
-
-st.divider()
+    st.divider()
 
 # Keep your secondary stats row (correct + accuracy + time)
 s1, s2, s3 = st.columns(3)
@@ -327,51 +213,87 @@ st.dataframe(slow_df, use_container_width=True, hide_index=True)
 
 st.divider()
 
-# Detailed review
-st.markdown("### Detailed Review")
-
-f1, f2, f3 = st.columns([1, 1, 2])
-with f1:
-    mod_filter = st.selectbox("Module", ["All"] + list(module_mapping.values()), index=0)
-with f2:
-    res_filter = st.selectbox("Result", ["All", "✅ Correct", "❌ Wrong", "— Unanswered"], index=0)
-with f3:
-    search = st.text_input("Search student/correct answer", value="")
-
-filtered = score_df.copy()
-if mod_filter != "All":
-    filtered = filtered[filtered["Module"] == mod_filter]
-if res_filter != "All":
-    filtered = filtered[filtered["Result"] == res_filter]
-if search.strip():
-    s = search.strip().lower()
-    filtered = filtered[
-        filtered["Student"].astype(str).str.lower().str.contains(s) |
-        filtered["Correct"].astype(str).str.lower().str.contains(s)
-    ]
-
-# show time + result clearly
-show_cols = ["Module", "Q#", "Type", "Time", "Answered?", "Student", "Correct", "Result"]
-st.dataframe(filtered[show_cols], use_container_width=True, hide_index=True)
+# Detailed review (a fragment: filtering reruns only this block)
+@st.fragment
+def detailed_review():
+    st.markdown("### Detailed Review")
+
+    f1, f2, f3 = st.columns([1, 1, 2])
+    with f1:
+        mod_filter = st.selectbox("Module", ["All"] + list(module_mapping.values()), index=0)
+    with f2:
+        res_filter = st.selectbox("Result", ["All", "✅ Correct", "❌ Wrong", "— Unanswered"], index=0)
+    with f3:
+        search = st.text_input("Search student/correct answer", value="")
+
+    mask = None
+    if mod_filter != "All":
+        mask = score_df["Module"] == mod_filter
+    if res_filter != "All":
+        m = score_df["Result"] == res_filter
+        mask = m if mask is None else mask & m
+    if search.strip():
+        m = score_df["_search"].str.contains(search.strip().lower(), regex=False)
+        mask = m if mask is None else mask & m
+
+    # show time + result clearly
+    show_cols = ["Module", "Q#", "Type", "Time", "Answered?", "Student", "Correct", "Result"]
+    shown = score_df if mask is None else score_df[mask]
+    st.dataframe(shown[show_cols], use_container_width=True, hide_index=True)
+
+
+detailed_review()
 
 st.divider()
 
+# Downloadable report, rendered on the report worker pool when the attempt finished
+if st.session_state.get("finished_all"):
+    report_key = reports.submit(
+        st.session_state.get("user_name", ""), st.session_state,
+        st.session_state.get("selected_kind", "exam"), st.session_state.get("selected_exam_title", ""),
+    )
+    files = reports.cached(report_key)
+    error = reports.failed(report_key)
+    if error:
+        st.error("The downloadable report could not be prepared.")
+        if st.button("Try again", key="report_retry"):
+            reports.retry(report_key)
+            st.rerun()
+    elif files:
+        for ext, mime, label in (("pdf", "application/pdf", "📄 Download PDF report"),
+                                 ("html", "text/html", "📄 Download report (HTML)")):
+            if ext in files:
+                with open(files[ext], "rb") as f:
+                    st.download_button(label, f.read(), file_name=f"score-report.{ext}", mime=mime,
+                                       use_container_width=True)
+                break
+    else:
+        @st.fragment(run_every=2.0)
+        def report_status():
+            if reports.cached(report_key) or reports.failed(report_key):
+                st.rerun()  # full rerun swaps this for the download button (or the error) and stops polling
+            st.caption("Preparing your downloadable report…")
+
+        report_status()
+
 a1, a2 = st.columns([1, 1])
 with a1:
     if st.button("⬅ Back to Dashboard", use_container_width=True):
         st.switch_page("pages/dashboard.py")
 with a2:
     if st.button("🔁 Retake Exam (Clear Answers)", use_container_width=True):
-        st.session_state.responses = {}
-        st.session_state.flags = {}
-        st.session_state.module_step = 1
-        st.session_state.q_index = 0
-        st.session_state.viewing_review = False
-        st.session_state.finished_all = False
-
-        # also clear timing (important)
-        st.session_state.question_times = {}
-        st.session_state.current_question_key = None
-        st.session_state.current_question_started_at = None
+        if "selected_exam" in st.session_state:
+            state_store.discard(
+                st.session_state,
+                state_store.attempt_key(
+                    st.session_state.get("user_name", ""), st.session_state.selected_exam,
+                    st.session_state.get("selected_kind", "exam"),
+                ),
+            )
+        forms = st.session_state.get("module_forms")
+        # timers, break and finish time too, so the retake waits for admission like a new start
+        state_store.reset_engine_state(st.session_state)
+        if is_drill_attempt and forms:  # a drill retakes the same questions
+            st.session_state.module_forms = forms
 
         st.switch_page("pages/exam.py")
\ No newline at end of file
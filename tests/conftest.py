@@ -0,0 +1,53 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Process-local stores unless a test picks its own backend.
+os.environ.setdefault("SAT_STATE_BACKEND", "memory")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    """``install(getter)``: a fresh store of each backend kind, installed as that PerBackend's instance."""
+    client = pytest.importorskip("fakeredis").FakeRedis() if request.param == "redis" else None
+    installed = []
+
+    def install(getter):
+        cls = getter.classes[request.param]
+        if request.param == "memory":
+            store = cls()
+        elif request.param == "sqlite":
+            store = cls(str(tmp_path / "state.sqlite3"))
+        else:
+            store = cls("redis://", client)
+        getter.reset(store)
+        installed.append(getter)
+        return store
+
+    install.kind = request.param
+    yield install
+    for getter in installed:
+        getter.reset()
+
+
+@pytest.fixture(scope="session")
+def local_sheets(tmp_path_factory):
+    """A small synthetic question bank and users sheet served from local CSVs."""
+    from core.bank import bank_cache
+    from core.sheets import LOCAL_SHEETS_ENV
+    from tools.synthetic import make_question_bank, make_users, write_local_sheets
+
+    root = write_local_sheets(str(tmp_path_factory.mktemp("sheets")), make_question_bank(scale=0.2), make_users(3))
+    previous = os.environ.get(LOCAL_SHEETS_ENV)
+    os.environ[LOCAL_SHEETS_ENV] = root
+    bank_cache().clear()
+    yield root
+    bank_cache().clear()
+    if previous is None:
+        os.environ.pop(LOCAL_SHEETS_ENV, None)
+    else:
+        os.environ[LOCAL_SHEETS_ENV] = previous
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from core.assembly import AssemblyError, History, ModuleBlueprint, assemble_exam, blueprint_from_forms
+from core.bank import Bank
+from core.catalog import ExamEntry
+from core.index import assemble_drill, drill_label, is_row_form
+from core.routing import route
+from tools.synthetic import make_question_bank
+
+
+@pytest.fixture(scope="module")
+def bank():
+    return Bank(make_question_bank(scale=0.5))
+
+
+def test_assembled_forms_follow_the_blueprint_without_repeats(bank):
+    blueprint = blueprint_from_forms(bank)
+    forms = assemble_exam(bank, blueprint, History(item_sec={}, seen={}), "student0", seed=1)
+    assert all(is_row_form(label) for label in forms.values())
+
+    used = [r for label in forms.values() for r in bank.form_rows(label)]
+    assert len(used) == len(set(used))
+    for module_step, label in forms.items():
+        got = bank.form(label).groupby(["Domain", "Difficulty"]).size().to_dict()
+        assert got == {cell: n for cell, n in blueprint[module_step].counts.items()}
+
+
+def test_assembly_skips_seen_rows_and_reports_shortfalls(bank):
+    blueprint = {1: ModuleBlueprint(counts={("Algebra", "Hard"): 2})}
+    pool = set(bank.index.search({"Domain": "Algebra", "Difficulty": "Hard"}))
+    seen = set(sorted(pool)[:-2])
+    forms = assemble_exam(bank, blueprint, History(item_sec={}, seen={"s": seen}), "s", seed=0)
+    assert set(bank.form_rows(forms[1])) == pool - seen
+    with pytest.raises(AssemblyError):
+        assemble_exam(bank, blueprint, History(item_sec={}, seen={"s": pool}), "s", seed=0)
+
+
+def test_row_labels_survive_inserted_rows(bank):
+    label = assemble_drill(bank, 5, {"Domain": "Algebra"}, seed=3)
+    questions = bank.form(label)
+
+    moved = pd.concat([bank.df.iloc[[0, 1]], bank.df], ignore_index=True)  # two rows inserted on top
+    after = Bank(moved)
+    assert after.form(label).equals(questions)
+
+
+def test_identical_rows_in_a_label_are_each_used_once():
+    bank = Bank(pd.DataFrame({"Content": ["same", "same", "other"]}))
+    label = drill_label(bank.row_hashes[[0, 1]])
+    assert bank.form_rows(label) == [0, 1]
+
+
+def test_unrouted_step_keeps_the_assembled_form():
+    entry = ExamEntry(id="s:assembled", title="Assembled", forms={2: "Form:#00000000000000aa"})
+    assert route(entry, {"Session 1 Module 2"}, 2, 10, 10, current="Form:#00000000000000bb") == "Form:#00000000000000bb"
+    assert route(entry, {"Session 1 Module 2"}, 2, 10, 10) == "Form:#00000000000000aa"
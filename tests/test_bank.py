@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from core.bank import Bank
+from core.index import QuestionIndex
+from core.questions import MODULE_MAPPING
+from tools.synthetic import make_question_bank
+
+
+@pytest.fixture
+def bank():
+    bank = Bank(make_question_bank(scale=0.2))
+    for label in MODULE_MAPPING.values():
+        bank.payloads(label)
+        bank.form_answer_key(label)
+    bank.index.search({"Domain": "Algebra"})
+    return bank
+
+
+def edited(bank: Bank, row: int, **cells) -> pd.DataFrame:
+    df = bank.df.copy()
+    for col, value in cells.items():
+        df.loc[row, col] = value
+    return df
+
+
+def test_unchanged_sheet_keeps_the_bank(bank):
+    assert bank.refreshed(bank.df.copy()) is bank
+    assert bank.changed_rows == []
+
+
+def test_edited_row_is_the_only_change(bank):
+    row = bank.form_rows(MODULE_MAPPING[1])[2]
+    after = bank.refreshed(edited(bank, row, Correct_Answer="D", Content="An edited question"))
+
+    assert after is not bank
+    assert after.changed_rows == [row]
+    assert after.parent == bank.version
+    assert after.version != bank.version
+    assert after.form_answer_key(MODULE_MAPPING[1])[2]["norm"] == "D"
+
+    # untouched forms are shared outright, the edited one reuses every other row
+    for label in list(MODULE_MAPPING.values())[1:]:
+        assert after.payloads(label) is bank.payloads(label)
+    old, new = bank.payloads(MODULE_MAPPING[1]), after.payloads(MODULE_MAPPING[1])
+    assert new is not old
+    assert [a is b for a, b in zip(old, new)] == [q != 2 for q in range(len(old))]
+
+
+def test_inserted_rows_are_new_not_moved(bank):
+    df = pd.concat([bank.df.iloc[[0]].assign(Content="A brand new question"), bank.df], ignore_index=True)
+    after = bank.refreshed(df)
+    assert after.changed_rows == [0]
+    assert after.parent == bank.version
+    assert after.index.search({"Domain": "Algebra"}) == QuestionIndex(df).search({"Domain": "Algebra"})
+
+
+def test_column_edit_rebuilds_everything(bank):
+    after = bank.refreshed(bank.df.assign(Notes=""))
+    assert after.changed_rows is None and after.parent is None
+    assert after.payloads(MODULE_MAPPING[2]) is not bank.payloads(MODULE_MAPPING[2])
+
+
+def test_patched_index_matches_a_rebuild(bank):
+    row = bank.index.search({"Domain": "Algebra"})[0]
+    other = next(iter(set(bank.index.tags["Domain"]) - {"algebra"}))
+    df = edited(bank, row, Domain=bank.index.labels["Domain"][other], Prompt="Solve for zebra")
+    after = bank.refreshed(df)
+
+    rebuilt = QuestionIndex(df)
+    assert after.index.tags == rebuilt.tags
+    assert after.index.text == rebuilt.text
+    assert after.index.labels == rebuilt.labels
+    assert row in after.index.search({"Domain": other}, text="zebra")
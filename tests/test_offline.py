@@ -0,0 +1,99 @@
+import json
+import time
+
+import pytest
+
+from core import history, offline, snapshots, state_store
+from core.bank import get_bank
+from core.catalog import get_entry
+from core.questions import MODULE_MAPPING
+from tools.offline import sync
+
+EXAM = "sat_mock_v1"
+
+
+def write(path, df, roster=None) -> str:
+    keys = {MODULE_MAPPING[1]: {0: {"type": "MCQ", "correct": "B", "norm": "B"}}}
+    images = {"https://example.com/a.png": (b"\x89PNG fake", "image/png")}
+    return offline.write_package(str(path), get_entry(EXAM), df, keys, images, roster)
+
+
+def test_package_round_trip(local_sheets, tmp_path):
+    df = get_bank(EXAM).df.copy()
+    df.loc[0, "Image_URL"] = "https://example.com/a.png"
+    version = write(tmp_path / f"x{offline.EXTENSION}", df, roster={"student0": "pw"})
+    assert write(tmp_path / f"y{offline.EXTENSION}", df, roster={"student0": "pw"}) == version  # deterministic
+
+    pkg = offline.Package(str(tmp_path / f"x{offline.EXTENSION}"))
+    assert pkg.version == version
+    assert pkg.entry.id == EXAM
+    assert pkg.roster() == {"student0": "pw"}
+    assert pkg.answer_keys() == {MODULE_MAPPING[1]: {0: {"type": "MCQ", "correct": "B", "norm": "B"}}}
+
+    back = pkg.bank_df()
+    ref = back.loc[0, "Image_URL"]
+    assert ref.startswith(offline.IMAGE_REF)
+    assert pkg.image_data_uri(ref).startswith("data:image/png;base64,")
+    assert back.drop(columns="Image_URL").astype(str).equals(df.drop(columns="Image_URL").astype(str))
+
+    with open(tmp_path / f"bad{offline.EXTENSION}", "wb") as f:
+        f.write(b"not a package")
+    with pytest.raises(ValueError):
+        offline.Package(str(tmp_path / f"bad{offline.EXTENSION}"))
+
+
+def test_outbox_skips_a_torn_last_line(tmp_path, monkeypatch):
+    path = tmp_path / "outbox.jsonl"
+    monkeypatch.setenv(offline.OUTBOX_ENV, str(path))
+    monkeypatch.setattr(offline, "_packages", {})
+    offline.queue_result("Student0", {"responses": []}, "exam", "Mock", EXAM)
+    offline.queue_result("student1", {"responses": []}, "exam", "Mock", EXAM)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"user": "student2", "exam_id": "sat_')  # power loss mid-write
+
+    items = list(offline.read_outbox(str(path)))
+    assert [i["user"] for i in items] == ["student0", "student1"]
+    assert items[0]["package_version"] is None
+
+
+def test_sync_grades_against_the_package_bank(backend, local_sheets, tmp_path, monkeypatch):
+    store = backend(state_store.get_store)
+    records = backend(history.get_history)
+    backend(snapshots.get_snapshots)
+    monkeypatch.setattr(snapshots, "_stored", set())
+
+    live = get_bank(EXAM)
+    first = live.form_rows(MODULE_MAPPING[1])[0]
+    df = live.df.copy()
+    df.loc[first, "Correct_Answer"] = "D" if live.df.loc[first, "Correct_Answer"] != "D" else "C"
+    folder = tmp_path / "packages"
+    folder.mkdir()
+    write(folder / f"{EXAM}{offline.EXTENSION}", df)
+    pkg = offline.Package(str(folder / f"{EXAM}{offline.EXTENSION}"))
+    bank = offline.PackagedBank(pkg)
+
+    outbox = tmp_path / "outbox.jsonl"
+    state = {
+        "selected_exam": EXAM, "bank_version": bank.version, "module_forms": dict(MODULE_MAPPING),
+        "responses": {(1, 0): {"value": df.loc[first, "Correct_Answer"]}}, "finished_all": True,
+        "exam_finished_at": time.time(),
+    }
+    with open(outbox, "w", encoding="utf-8") as f:
+        for user, version in (("student0", pkg.version), ("student1", "000000000000")):
+            item = {"user": user, "exam_id": EXAM, "kind": "exam", "title": "Mock",
+                    "package_version": version, "state": state_store.encode_state(state)}
+            f.write(json.dumps(item) + "\n")
+
+    assert sync([str(outbox)], str(folder)) == 1  # student1's package is missing
+    rows, total = records.page("student0")
+    assert total == 1 and rows[0]["correct"] == 1  # the live bank would mark it wrong
+    assert records.page("student1") == ([], 0)
+    assert store.get(state_store.attempt_key("student1", EXAM)) is None
+
+    stored = store.get(state_store.attempt_key("student0", EXAM))[1]
+    assert stored["bank_version"] == bank.version
+    assert snapshots.get_snapshots().add_ref(snapshots.source_key(get_entry(EXAM)), bank.version, 0) == 1
+
+    sync([str(outbox)], str(folder))  # replaying is idempotent
+    assert records.page("student0")[1] == 1
+    assert snapshots.get_snapshots().add_ref(snapshots.source_key(get_entry(EXAM)), bank.version, 0) == 1
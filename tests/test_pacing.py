@@ -0,0 +1,31 @@
+from core import pacing, snapshots
+from core.bank import Bank, get_bank
+from core.catalog import get_entry
+from core.questions import MODULE_MAPPING
+
+EXAM = "sat_mock_v1"
+
+
+def test_table_for_another_form_size_falls_back_to_even_pacing():
+    table = pacing.build_table({}, size=3, module_sec=300)
+    assert pacing.pace_status(table, 2, 150, size=3, module_sec=300) == ("ahead", 50)
+    # the form grew to 5 questions since the table was built
+    assert pacing.pace_status(table, 5, 300, size=5, module_sec=300) == ("on_track", 0)
+    assert pacing.pace_status(table, 4, 100, size=5, module_sec=300) == ("ahead", 140)
+
+
+def test_samples_use_the_pinned_bank(backend, local_sheets, monkeypatch):
+    backend(snapshots.get_snapshots)
+    monkeypatch.setattr(snapshots, "_stored", set())
+    live = get_bank(EXAM)
+    df = live.df.copy()
+    df.loc[live.form_rows(MODULE_MAPPING[1])[-1], "Session"] = "Retired"
+    pinned = Bank(df)
+    snapshots.pin(get_entry(EXAM), pinned)
+
+    state = {"selected_exam": EXAM, "bank_version": pinned.version, "finished_all": True,
+             "question_times": {(1, 0): 40.0}}
+    samples, sizes = pacing.collect_samples([("u", "exam", state, 0.0)])
+    key = pacing.pacing_key(get_entry(EXAM), MODULE_MAPPING[1])
+    assert samples[key] == {0: [40.0]}
+    assert sizes[key][0] == len(live.form_rows(MODULE_MAPPING[1])) - 1
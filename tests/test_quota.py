@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from core import users
+from core.quota import (QUESTION_REFRESH, RESERVE, RESULT_WRITE, USER_INDEX_REFRESH, QuotaScheduler,
+                        QuotaTimeout)
+
+
+def test_lower_classes_leave_their_reserve_untouched():
+    quota = QuotaScheduler(per_minute=0.001, burst=10)  # effectively no refill
+    floor = RESERVE[USER_INDEX_REFRESH] * 10 + 1
+    granted = 0
+    with pytest.raises(QuotaTimeout):
+        while True:
+            quota.acquire(USER_INDEX_REFRESH, deadline_sec=0.05)
+            granted += 1
+    assert granted == int(10 - floor) + 1
+    quota.acquire(RESULT_WRITE, deadline_sec=0.05)  # the reserve is still there for result writes
+    assert quota.metrics()["user_index_refresh"]["timed_out"] == 1
+
+
+def test_higher_priority_waiter_goes_first():
+    quota = QuotaScheduler(per_minute=600, burst=10)  # 10 tokens/sec
+    for _ in range(10):
+        quota.acquire(RESULT_WRITE)
+    order = []
+
+    def call(priority):
+        quota.acquire(priority, deadline_sec=5)
+        order.append(priority)
+
+    low = threading.Thread(target=call, args=(QUESTION_REFRESH,))
+    low.start()
+    while quota.metrics()["queued"] < 1:
+        time.sleep(0.001)
+    high = threading.Thread(target=call, args=(RESULT_WRITE,))
+    high.start()
+    low.join()
+    high.join()
+    assert order == [RESULT_WRITE, QUESTION_REFRESH]
+
+
+class FakeIndex:
+    """Stands in for the cached ``load_users_index``; counts sheet reads."""
+
+    def __init__(self, rows: dict[str, str]):
+        self.rows, self.reads, self.cached = rows, 0, None
+
+    def __call__(self):
+        if self.cached is None:
+            self.reads += 1
+            self.cached = dict(self.rows)
+        return self.cached
+
+    def clear(self):
+        self.cached = None
+
+
+def test_unknown_user_refresh_is_rate_limited(monkeypatch):
+    index = FakeIndex({"student0": "pw0"})
+    monkeypatch.setattr(users, "load_users_index", index)
+    monkeypatch.setattr(users, "_refreshed_at", float("-inf"))
+
+    assert users.user_password("student0") == "pw0"
+    users.user_password("student0")
+    assert index.reads == 1  # known users (right or wrong password) never re-read
+
+    index.rows["newbie"] = "pw"  # signed up on another worker
+    assert users.user_password("newbie") == "pw"
+    assert index.reads == 2
+    for _ in range(5):
+        assert users.user_password("nobody") is None
+    assert index.reads == 2  # within UNKNOWN_USER_REFRESH_SEC of the last refresh
+
+    monkeypatch.setattr(users, "_refreshed_at", time.monotonic() - users.UNKNOWN_USER_REFRESH_SEC - 1)
+    users.user_password("nobody")
+    assert index.reads == 3
@@ -0,0 +1,44 @@
+import time
+
+from core import reports
+from core.questions import MODULE_MAPPING
+
+
+def finished_state() -> dict:
+    return {
+        "selected_exam": "sat_mock_v1",
+        "module_forms": dict(MODULE_MAPPING),
+        "responses": {(1, 0): {"value": "A"}},
+        "question_times": {(1, 0): 10.0},
+        "exam_finished_at": time.time(),
+    }
+
+
+def wait_for(predicate, timeout: float = 10.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_failed_render_is_recorded_and_retried(local_sheets, tmp_path, monkeypatch, caplog):
+    monkeypatch.setenv(reports.REPORT_DIR_ENV, str(tmp_path))
+    state = finished_state()
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("template exploded")
+
+    monkeypatch.setattr(reports, "render_html", broken)
+    key = reports.submit("student0", state)
+    assert wait_for(lambda: reports.failed(key))
+    assert "template exploded" in reports.failed(key)
+    assert "failed to render" in caplog.text
+    assert reports.submit("student0", state) == key  # not requeued until retried
+    assert key not in reports._pending
+
+    monkeypatch.undo()
+    monkeypatch.setenv(reports.REPORT_DIR_ENV, str(tmp_path))
+    reports.retry(key)
+    reports.submit("student0", state)
+    assert wait_for(lambda: "html" in reports.cached(key))
+    assert reports.failed(key) is None
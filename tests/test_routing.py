@@ -0,0 +1,39 @@
+from core.catalog import ExamEntry, _entry_from_dict
+from core.questions import MODULE_MAPPING
+from core.routing import ROUTED_FROM, candidate_forms, default_forms, route
+
+RULE = {"easier": "S1M2 Easy", "harder": "S1M2 Hard", "threshold": 0.6}
+AVAILABLE = set(MODULE_MAPPING.values()) | {"S1M2 Easy", "S1M2 Hard"}
+
+
+def adaptive_entry(**extra) -> ExamEntry:
+    return ExamEntry(id="adaptive", title="Adaptive", routing={2: dict(RULE)}, **extra)
+
+
+def test_manifest_routing_is_parsed():
+    entry = _entry_from_dict({"id": "x", "routing": '{"2": {"easier": "A", "harder": "B"}}', "forms": {"1": "F1"}})
+    assert entry.routing == {2: {"easier": "A", "harder": "B", "threshold": 0.6}}
+    assert entry.forms == {1: "F1"}
+    assert _entry_from_dict({"id": "y", "routing": {"2": {"easier": "A"}}}).routing == {}
+
+
+def test_candidate_forms_need_both_forms_in_the_bank():
+    entry = adaptive_entry()
+    assert candidate_forms(entry, AVAILABLE, 2) == {"easier": "S1M2 Easy", "harder": "S1M2 Hard"}
+    assert candidate_forms(entry, AVAILABLE - {"S1M2 Hard"}, 2) == {}
+    assert candidate_forms(entry, AVAILABLE, 4) == {}
+    assert ROUTED_FROM[1] == 2
+
+
+def test_route_by_threshold():
+    entry = adaptive_entry()
+    assert route(entry, AVAILABLE, 2, correct=6, total=10) == "S1M2 Hard"
+    assert route(entry, AVAILABLE, 2, correct=5, total=10) == "S1M2 Easy"
+    assert route(entry, AVAILABLE, 2, correct=0, total=0) == "S1M2 Easy"
+
+
+def test_unrouted_step_gets_its_default_form():
+    entry = adaptive_entry()
+    assert route(entry, AVAILABLE, 4, correct=10, total=10) == MODULE_MAPPING[4]
+    assert default_forms(None) == MODULE_MAPPING
+    assert default_forms(ExamEntry(id="f", title="f", forms={1: "F1"})) == {1: "F1"}
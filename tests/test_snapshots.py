@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from core import snapshots
+from core.bank import Bank, BankCache
+from core.catalog import ExamEntry
+from core.questions import MODULE_MAPPING
+from tools.synthetic import make_question_bank
+
+ENTRY = ExamEntry(id="snap", title="Snapshots", worksheet="snap")
+
+
+@pytest.fixture
+def store(backend, monkeypatch):
+    monkeypatch.setattr(snapshots, "_stored", set())
+    monkeypatch.setattr(snapshots, "GRACE_SEC", -60)  # collect right away
+    return backend(snapshots.get_snapshots)
+
+
+@pytest.fixture
+def banks():
+    old = Bank(make_question_bank(scale=0.2))
+    df = old.df.copy()
+    df.loc[old.form_rows(MODULE_MAPPING[1])[0], "Correct_Answer"] = "D"
+    return old, old.refreshed(df)
+
+
+def same(loaded: Bank, bank: Bank) -> bool:
+    return (loaded.version == bank.version and (loaded.row_hashes == bank.row_hashes).all()
+            and loaded.answer_key == bank.answer_key)
+
+
+def refs(store, bank: Bank) -> int:
+    return store.add_ref(snapshots.source_key(ENTRY), bank.version, 0)
+
+
+def test_pin_release_collect(store, banks):
+    old, new = banks
+    assert snapshots.pin(ENTRY, old) == old.version
+    snapshots.pin(ENTRY, old)
+    snapshots.pin(ENTRY, new)  # stores only the edited row next to old's
+    assert refs(store, old) == 2
+    assert same(snapshots.load(ENTRY, old.version), old)
+    assert same(snapshots.load(ENTRY, new.version), new)
+
+    snapshots.release(ENTRY, old.version)
+    assert snapshots.load(ENTRY, old.version) is not None  # still pinned once
+    snapshots.release(ENTRY, old.version)
+    assert snapshots.load(ENTRY, old.version) is None
+    assert same(snapshots.load(ENTRY, new.version), new)  # shared rows survive the collect
+
+    snapshots.release(ENTRY, new.version)
+    assert snapshots.load(ENTRY, new.version) is None
+
+
+def test_pin_restores_a_version_collected_elsewhere(store, banks):
+    old, _ = banks
+    snapshots.pin(ENTRY, old)
+    source = snapshots.source_key(ENTRY)
+    store.add_ref(source, old.version, -1)  # another worker released and collected it
+    assert store.collect(source, set(), time.time() + 1) == 1
+
+    snapshots.pin(ENTRY, old)  # this process still thinks it is stored
+    assert refs(store, old) == 1
+    assert same(snapshots.load(ENTRY, old.version), old)
+
+
+def test_superseded_versions_count_against_the_budget(banks):
+    old, new = banks
+    cache = BankCache(budget_bytes=old.nbytes + new.nbytes)
+    cache._banks[ENTRY.source] = new
+    cache._keep_version(ENTRY.source, old)
+    assert cache.total_bytes() == old.nbytes + new.nbytes
+    assert not cache.has_room_for_more()
+
+    cache.budget_bytes = new.nbytes
+    cache._evict(keep=ENTRY.source)
+    assert cache._versions == {} and cache._banks == {ENTRY.source: new}
@@ -0,0 +1,108 @@
+import pytest
+
+from core import state_store
+
+
+@pytest.fixture
+def store(backend):
+    return backend(state_store.get_store)
+
+
+def engine_state(**extra):
+    state = {
+        "selected_exam": "sat_mock_v1",
+        "module_step": 1,
+        "q_index": 3,
+        "responses": {(1, 0): {"value": "A"}, (1, 2): {"value": "12"}},
+        "question_times": {(1, 0): 12.5},
+        "flags": {1: {2: True}},
+        "module_forms": {1: "Session 1 Module 1", 2: "Session 1 Module 2"},
+        "current_question_key": (1, 3),
+    }
+    state.update(extra)
+    return state
+
+
+def test_encode_decode_round_trip():
+    state = engine_state()
+    assert state_store.decode_state(state_store.encode_state(state)) == state
+
+
+def test_save_then_hydrate_in_a_fresh_session(store):
+    key = state_store.attempt_key("Student0 ", "sat_mock_v1")
+    assert key == "student0:sat_mock_v1"
+    writer = engine_state()
+    assert state_store.hydrate(writer, key) is False
+    assert state_store.save(writer, key) is True
+    assert writer["_state_version"] == 1
+
+    reader = {}
+    assert state_store.hydrate(reader, key) is True
+    assert reader["responses"] == writer["responses"]
+    assert reader["current_question_key"] == (1, 3)
+    # already current: one version lookup, nothing reloaded
+    assert state_store.hydrate(reader, key) is False
+
+
+def test_unchanged_state_is_not_written_again(store):
+    key = state_store.attempt_key("u", "e")
+    session = engine_state()
+    state_store.hydrate(session, key)
+    state_store.save(session, key)
+    state_store.save(session, key)
+    assert store.version(key) == 1
+
+
+def test_stale_save_is_rejected_and_rehydrates(store):
+    key = state_store.attempt_key("u", "e")
+    a = engine_state()
+    state_store.hydrate(a, key)
+    state_store.save(a, key)
+    b = {}
+    state_store.hydrate(b, key)
+
+    b["q_index"] = 7
+    assert state_store.save(b, key) is True  # b moves the attempt to version 2
+    a["q_index"] = 5
+    assert state_store.save(a, key) is False  # a still holds version 1
+    assert a["q_index"] == 7 and a["_state_version"] == 2
+    assert store.get(key)[1]["q_index"] == 7
+
+
+def test_put_compare_and_set(store):
+    assert store.put("k", {"v": 1}, expected=0) == 1
+    assert store.put("k", {"v": 2}, expected=0) is None
+    assert store.put("k", {"v": 2}, expected=1) == 2
+    assert store.put("k", {"v": 3}, expected=1) is None
+    assert store.put("k", {"v": 3}) == 3  # unconditional
+    assert store.get("k") == (3, {"v": 3})
+
+
+def test_discard_forgets_the_attempt(store):
+    key = state_store.attempt_key("u", "e")
+    session = engine_state()
+    state_store.hydrate(session, key)
+    state_store.save(session, key)
+    state_store.discard(session, key)
+    assert store.get(key) is None
+    assert "_state_version" not in session
+
+
+def test_scan_since_watermark(store):
+    store.put("u1:e", {"q_index": 1})
+    rows = list(store.scan())
+    assert [k for k, _, _ in rows] == ["u1:e"]
+    assert list(store.scan(rows[-1][1])) == []
+
+
+@pytest.mark.parametrize("user, exam_id, kind", [
+    ("student0", "sat_mock_v1", "exam"),
+    ("student0", "sat_mock_v1", "drill"),
+    ("ms:smith", "sat_mock_v1", "exam"),
+    ("ms:smith", "s:assembled", "drill"),
+    ("a:sat", "sat", "exam"),
+])
+def test_iter_attempts_splits_keys_with_colons(store, user, exam_id, kind):
+    store.put(state_store.attempt_key(user, exam_id, kind), state_store.encode_state(engine_state(selected_exam=exam_id)))
+    [(got_user, got_kind, state, _)] = list(state_store.iter_attempts())
+    assert (got_user, got_kind, state["selected_exam"]) == (user, kind, exam_id)
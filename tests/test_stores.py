@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+from core import history, progress, tokens
+
+
+def test_progress_board_changes_since(backend):
+    board = backend(progress.get_board)
+    seq, changed = board.changes_since(0)
+    assert changed == {}
+
+    board.publish("a:e", {"q": 1})
+    board.publish("b:e", {"q": 1})
+    seq, changed = board.changes_since(0)
+    assert changed == {"a:e": {"q": 1}, "b:e": {"q": 1}}
+
+    board.publish("a:e", {"q": 2})
+    latest, changed = board.changes_since(seq)
+    assert latest > seq
+    assert changed == {"a:e": {"q": 2}}
+    assert board.changes_since(latest) == (latest, {})
+
+
+def _record(attempt: str, finished_at: float, correct: int, exam_id: str = "e") -> dict:
+    return {
+        "attempt_id": attempt, "user": "u", "exam_id": exam_id, "kind": "exam", "title": "",
+        "finished_at": finished_at, "correct": correct, "total": 10, "pct": correct * 10.0,
+        "time_sec": 100.0, "sec_per_q": 10.0, "modules": {"M1": {"correct": correct, "total": 10}},
+        "score_lo": None, "score_hi": None,
+    }
+
+
+def test_history_record_page_and_rollups(backend):
+    store = backend(history.get_history)
+    assert store.record(_record("a1", 100.0, 6)) is True
+    assert store.record(_record("a1", 100.0, 6)) is False  # resubmitted attempt
+    store.record(_record("a2", 300.0, 8))
+    store.record(_record("a3", 200.0, 4))  # arrives out of order
+    store.record(_record("b1", 50.0, 9, exam_id="other"))
+
+    rows, total = store.page("u", "e", "exam", offset=0, limit=2)
+    assert total == 3
+    assert [r["attempt_id"] for r in rows] == ["a2", "a3"]
+    rows, total = store.page("u")
+    assert total == 4
+
+    rollup = store.rollups("u")[("e", "exam")]
+    assert rollup["attempts"] == 3
+    assert rollup["best"]["attempt_id"] == "a2"
+    assert rollup["last"]["attempt_id"] == "a2"
+    assert [p[0] for p in rollup["trend"]["M1"]] == [100.0, 200.0, 300.0]
+
+
+def test_revocations_since(backend):
+    store = backend(tokens.get_revocations)
+    start = time.time() - 1
+    store.add("t:abc", 0.0, time.time() + 60)
+    store.add("u:student", 123.0, time.time() + 60)
+    store.add("t:old", 0.0, time.time() - 1)  # already expired: forgotten
+    rows = {key: cutoff for key, cutoff, _ in store.since(start)}
+    assert rows.get("t:abc") == 0.0
+    assert rows.get("u:student") == 123.0
+    if backend.kind != "redis":  # redis trims by revocation time, not token expiry
+        assert "t:old" not in rows
+    latest = max(at for _, _, at in store.since(start))
+    assert store.since(latest) == []
+
+
+def test_progress_heartbeat_drives_stalled_status(backend):
+    board = backend(progress.get_board)
+    session, row = {}, {"q_index": 3}
+    t0 = time.time() - 1000
+    progress.publish(session, "a:e", row, seen_at=t0)
+    seq, changed = board.changes_since(0)
+    assert changed["a:e"]["last_seen"] == t0
+    assert progress.status(changed["a:e"], now=t0 + progress.STALLED_AFTER_SEC + 1) == "stalled"
+
+    progress.publish(session, "a:e", row, seen_at=t0 + 1)  # same row, fresh interaction: no write yet
+    assert board.changes_since(seq) == (seq, {})
+
+    seen = t0 + progress.HEARTBEAT_SEC
+    progress.publish(session, "a:e", row, seen_at=seen)  # heartbeat due
+    _, changed = board.changes_since(seq)
+    assert changed["a:e"]["last_seen"] == seen
+    assert progress.status(changed["a:e"], now=seen + 60) == "testing"
+
+
+def test_failed_history_submit_is_logged(backend, monkeypatch, caplog):
+    store = backend(history.get_history)
+
+    def broken(*args):
+        raise ValueError("bank gone")
+
+    monkeypatch.setattr(history, "summarize", broken)
+    future = history.submit("u", {"selected_exam": "e", "exam_finished_at": 100.0})
+    with pytest.raises(ValueError):
+        future.result()
+    history._pool.submit(lambda: None).result()  # done-callbacks ran before the next task
+    assert "was not recorded in history" in caplog.text
+    assert store.page("u") == ([], 0)
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from core import tokens
+
+
+@pytest.fixture
+def revocations(backend, monkeypatch):
+    monkeypatch.setenv(tokens.SECRET_ENV, "new,old")
+    monkeypatch.setattr(tokens, "_keys", None)
+    monkeypatch.setattr(tokens, "_revoked", {})
+    monkeypatch.setattr(tokens, "_synced_at", 0.0)
+    return backend(tokens.get_revocations)
+
+
+def test_tokens_expire(revocations):
+    now = time.time()
+    token = tokens.issue("Student0", {"exam": "e", "title": "E", "kind": "exam"}, now=now)
+    claims = tokens.verify(token, now=now + 1)
+    assert claims["u"] == "student0" and claims["a"]["exam"] == "e"
+    assert tokens.verify(token, now=now + tokens.ttl_sec() + 1) is None
+
+
+def test_tampered_tokens_are_rejected(revocations, monkeypatch):
+    token = tokens.issue("student0")
+    body, _, sig = token.partition(".")
+    forged = tokens._b64(tokens._unb64(body).replace(b"student0", b"proctor0"))
+    assert tokens.verify(f"{forged}.{sig}") is None
+    assert tokens.verify(f"{body}.{sig[:-2]}xx") is None
+    assert tokens.verify(body) is None
+    assert tokens.verify("") is None
+
+    monkeypatch.setattr(tokens, "_keys", [b"old"])  # signed before a rotation: still verifies
+    old = tokens.issue("student0")
+    monkeypatch.setattr(tokens, "_keys", None)
+    assert tokens.verify(old)["u"] == "student0"
+
+
+def test_revocation_reaches_other_workers(revocations, monkeypatch):
+    token, other = tokens.issue("student0"), tokens.issue("student0")
+    tokens.revoke(token)
+    assert tokens.verify(token) is None
+    assert tokens.verify(other) is not None
+
+    monkeypatch.setattr(tokens, "_revoked", {})  # a worker that has not synced yet
+    assert tokens.verify(token) is not None
+    tokens.sync_revocations()
+    assert tokens.verify(token) is None
+
+
+def test_revoke_user_ends_every_earlier_token(revocations, monkeypatch):
+    now = time.time()
+    before = tokens.issue("student0", now=now - 60)
+    tokens.revoke_user("Student0", now=now)
+    assert tokens.verify(before) is None
+    assert tokens.verify(tokens.issue("student0", now=now + 2)) is not None
+    assert tokens.verify(tokens.issue("student1", now=now - 60)) is not None
+
+    monkeypatch.setattr(tokens, "_revoked", {})
+    tokens.sync_revocations()
+    assert tokens.verify(before) is None
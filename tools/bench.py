@@ -0,0 +1,150 @@
+"""Micro-benchmarks for the scoring, rendering and data-loading hot paths.
+
+Runs each case on synthetic question banks (100 .. 100k rows) and synthetic
+cohorts of attempts, then compares against a stored baseline:
+
+    python -m tools.bench --save            # record .benchmarks/baseline.json
+    python -m tools.bench                   # compare, exit 1 on regressions
+    python -m tools.bench --sizes 100,1000 --only grade
+
+A case regresses when its median is more than ``--threshold`` slower than
+the baseline median (and slower by more than the noise floor).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.questions import MODULE_MAPPING, get_image_url, module_frame, normalize_image_url, table_html  # noqa: E402
+from core.scoring import build_answer_key, grade_attempt, is_correct, normalize_answer, score_range_from_pct_harder  # noqa: E402
+from tools.synthetic import MODULE_SIZES, make_cohort, make_question_bank  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, ".benchmarks", "baseline.json")
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000]
+COHORT_SIZES = [10, 100]
+NOISE_FLOOR_SEC = 0.0005
+
+
+def timed(fn, repeat: int) -> list[float]:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def bank_cases(rows: int):
+    """(name, items, fn) for every per-bank case at one bank size."""
+    bank = make_question_bank(scale=rows / sum(MODULE_SIZES.values()), image_rate=0.3, table_rate=0.2)
+    records = bank.to_dict("records")
+    urls = bank["Image_URL"].tolist()
+    tables = bank["Table_Data"].tolist()
+    answers = bank["Correct_Answer"].tolist()
+    pairs = [(a, a.lower() + ")", "SPR" if a.isdigit() else "MCQ") for a in answers]
+    labels = list(MODULE_MAPPING.values())
+
+    return [
+        ("normalize_answer", len(answers), lambda: [normalize_answer(a) for a in answers]),
+        ("is_correct", len(pairs), lambda: [is_correct(s, c, t) for s, c, t in pairs]),
+        ("normalize_image_url", len(urls), lambda: [normalize_image_url(u) for u in urls]),
+        ("get_image_url", len(records), lambda: [get_image_url(r) for r in records]),
+        ("table_html", len(tables), lambda: [table_html(t) for t in tables]),
+        ("module_filter", len(labels), lambda: [module_frame(bank, label) for label in labels]),
+    ]
+
+
+def cohort_cases(attempts: int):
+    bank = make_question_bank()
+    cohort = make_cohort(bank, attempts)
+    key = build_answer_key(bank)
+    pcts = [i / max(1, attempts * 10) for i in range(attempts * 10)]
+
+    return [
+        ("score_range_from_pct_harder", len(pcts), lambda: [score_range_from_pct_harder(p) for p in pcts]),
+        ("grade_attempt", attempts, lambda: [grade_attempt(bank, r, t) for r, t in cohort]),
+        ("grade_attempt_keyed", attempts, lambda: [grade_attempt(None, r, t, answer_key=key) for r, t in cohort]),
+    ]
+
+
+def run(sizes: list[int], cohorts: list[int], repeat: int, only: str | None) -> dict:
+    results = {}
+    groups = [(f"bank={n}", bank_cases, n) for n in sizes] + [(f"cohort={n}", cohort_cases, n) for n in cohorts]
+    for label, factory, n in groups:
+        for name, items, fn in factory(n):
+            key = f"{name}[{label}]"
+            if only and only not in key:
+                continue
+            samples = timed(fn, repeat)
+            median = statistics.median(samples)
+            results[key] = {
+                "items": items,
+                "min_sec": min(samples),
+                "median_sec": median,
+                "per_item_us": median / max(1, items) * 1e6,
+            }
+            print(f"{key:<44}{median * 1000:>10.2f} ms{results[key]['per_item_us']:>12.2f} us/item")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    print(f"\n{'case':<44}{'baseline ms':>13}{'now ms':>10}{'change':>9}")
+    for key, row in results.items():
+        old = baseline.get(key)
+        if not old:
+            continue
+        before, now = old["median_sec"], row["median_sec"]
+        change = (now - before) / before if before else 0.0
+        flag = ""
+        if change > threshold and now - before > NOISE_FLOOR_SEC:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<44}{before * 1000:>13.2f}{now * 1000:>10.2f}{change * 100:>8.1f}%{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="bank sizes in rows")
+    parser.add_argument("--cohorts", default=",".join(map(str, COHORT_SIZES)), help="cohort sizes in attempts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(x) for x in args.sizes.split(",") if x]
+    cohorts = [int(x) for x in args.cohorts.split(",") if x]
+    results = run(sizes, cohorts, args.repeat, args.only)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": platform.node(), "python": platform.python_version(), "results": results}, f, indent=2)
+        print(f"\nbaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nno baseline yet; run with --save to record one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline.get("results", {}), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Build right-sized, compressed variants of assets/images/ for the exam page.
+
+Question images are shown at most 350 CSS px tall (``.sat-image``), but the
+sources are full-size PNGs. For each source this writes, under assets/build/:
+
+    math-1-12-325w@1x.075520b791.webp     1x and 2x WebP (smaller of lossy/lossless)
+    math-1-12-325w@1x.d63032f55b.png      1x and 2x fallback (PNG, or JPEG for photos)
+
+File names carry a content hash, so they can be cached forever, and
+manifest.json maps each source file name to its variants; stale outputs are
+removed. ``get_image_url`` resolves assets/images/ links through it:
+
+    python -m tools.build_assets
+    python -m tools.build_assets --check      # exit 1 if the build is out of date (writes nothing)
+
+Needs Pillow (pip install -r requirements-dev.txt); the app itself only reads the manifest.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.assets import BUILD_DIR, MANIFEST_PATH, RENDER_MAX_HEIGHT, SOURCE_DIR  # noqa: E402
+
+RENDER_MAX_WIDTH = 640  # CSS px; widest the question column gets in the wide layout
+DENSITIES = (1, 2)
+SOURCE_EXTS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", os.path.splitext(name)[0].lower()).strip("-") or "image"
+
+
+def css_size(width: int, height: int) -> tuple[int, int]:
+    """Display size in CSS px: fit the render box, never upscale."""
+    scale = min(1.0, RENDER_MAX_WIDTH / width, RENDER_MAX_HEIGHT / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def encode_webp(im) -> bytes:
+    lossy, lossless = io.BytesIO(), io.BytesIO()
+    im.save(lossy, "WEBP", quality=82, method=6)
+    im.save(lossless, "WEBP", lossless=True, method=6)
+    return min(lossy.getvalue(), lossless.getvalue(), key=len)
+
+
+def encode_fallback(im) -> tuple[bytes, str]:
+    """Palette PNG for diagrams (<= 256 colours), JPEG for photos, full PNG when there is alpha."""
+    out = io.BytesIO()
+    if im.mode == "RGBA":
+        im.save(out, "PNG", optimize=True)
+        return out.getvalue(), "png"
+    if im.getcolors(256) is not None:
+        im.quantize(256).save(out, "PNG", optimize=True)
+        return out.getvalue(), "png"
+    im.save(out, "JPEG", quality=85, optimize=True, progressive=True)
+    return out.getvalue(), "jpg"
+
+
+def write_hashed(out_dir: str, stem: str, data: bytes, ext: str) -> str:
+    name = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}.{ext}"
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(data)
+    return name
+
+
+def build_one(Image, path: str, out_dir: str) -> dict:
+    with Image.open(path) as src:
+        src.load()
+        has_alpha = "A" in src.getbands() or "transparency" in src.info
+        im = src.convert("RGBA" if has_alpha else "RGB")
+    width, height = css_size(*im.size)
+    stem = f"{slug(os.path.basename(path))}-{width}w"
+    entry = {"width": width, "height": height, "webp": [], "fallback": [], "bytes": {"source": os.path.getsize(path)}}
+    for density in DENSITIES:
+        w, h = width * density, height * density
+        if w > im.size[0]:
+            if im.size[0] < width * 1.25:
+                break  # the source has no more pixels worth sending
+            w, h = im.size
+        variant = im if (w, h) == im.size else im.resize((w, h), Image.LANCZOS)
+        webp = encode_webp(variant)
+        fallback, ext = encode_fallback(variant)
+        entry["webp"].append(write_hashed(out_dir, f"{stem}@{density}x", webp, "webp"))
+        entry["fallback"].append(write_hashed(out_dir, f"{stem}@{density}x", fallback, ext))
+        entry["bytes"][f"{density}x"] = {"webp": len(webp), "fallback": len(fallback)}
+    return entry
+
+
+def build(out_dir: str = BUILD_DIR) -> dict[str, dict]:
+    """Build every source image into ``out_dir`` and rewrite its manifest; returns the manifest."""
+    from PIL import Image
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    for name in sorted(os.listdir(SOURCE_DIR)):
+        if name.lower().endswith(SOURCE_EXTS):
+            manifest[name] = build_one(Image, os.path.join(SOURCE_DIR, name), out_dir)
+
+    manifest_name = os.path.basename(MANIFEST_PATH)
+    keep = {f for entry in manifest.values() for f in entry["webp"] + entry["fallback"]}
+    for name in os.listdir(out_dir):
+        if name != manifest_name and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+
+    path = os.path.join(out_dir, manifest_name)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(f"{path}.tmp", path)
+    return manifest
+
+
+def stale_files(built_dir: str, committed_dir: str = BUILD_DIR) -> list[str]:
+    """Names that differ between a fresh build and the committed one (missing, extra or changed)."""
+    def listing(folder: str) -> dict[str, bytes]:
+        if not os.path.isdir(folder):
+            return {}
+        out = {}
+        for name in os.listdir(folder):
+            with open(os.path.join(folder, name), "rb") as f:
+                out[name] = f.read()
+        return out
+
+    built, committed = listing(built_dir), listing(committed_dir)
+    return sorted(n for n in built.keys() | committed.keys() if built.get(n) != committed.get(n))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="fail if the committed build is out of date")
+    args = parser.parse_args(argv)
+
+    try:
+        import PIL  # noqa: F401  (optional dependency, only needed to build)
+    except ImportError:
+        print("Building assets needs Pillow (pip install pillow)")
+        return 1
+
+    if args.check:
+        with tempfile.TemporaryDirectory() as tmp:
+            build(tmp)
+            stale = stale_files(tmp)
+        if stale:
+            print("assets/build is out of date; run python -m tools.build_assets and commit:")
+            for name in stale:
+                print(f"  {name}")
+            return 1
+        print("assets/build is up to date")
+        return 0
+
+    manifest = build()
+    source = sum(e["bytes"]["source"] for e in manifest.values())
+    served = sum(e["bytes"]["1x"]["webp"] for e in manifest.values())
+    print(f"{len(manifest)} image(s): {source / 1024:.0f} KB source -> {served / 1024:.0f} KB WebP at 1x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""Stream stored attempts out as flat per-question rows (Parquet or CSV).
+
+One row per question with the score page's ``score_df`` columns plus
+student, exam and attempt ids. Attempts are read from the state store in
+chunks, so memory stays flat however many there are. Output is partitioned
+by exam and finish date:
+
+    exports/exam_id=sat_mock_v1/date=2026-10-19/part-<run>-00000.parquet
+
+Each run records in ``_export_state.json`` the time it started (its
+watermark) and the attempt id last exported per stored attempt. The next run
+rescans from a little before that watermark, to catch writes that were in
+flight or stamped by a worker with a slightly slow clock, and skips attempts
+whose id was already exported, so a later save of a finished attempt does
+not export it twice:
+
+    python -m tools.export --out exports/                 # incremental
+    python -m tools.export --out exports/ --full          # everything again
+    python -m tools.export --out exports/ --format csv --chunk 200
+
+It runs as its own process at lowered CPU priority, reading the store the
+same way a worker does, so the serving processes are not slowed down.
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core import state_store  # noqa: E402
+from core.bank import bank_for  # noqa: E402
+from core.results import attempt_id, grade_state  # noqa: E402
+
+STATE_FILE = "_export_state.json"
+OVERLAP_SEC = 60  # rescanned before the watermark; writes in flight and worker clock skew
+
+
+def attempt_rows(user: str, kind: str, state: dict) -> pd.DataFrame:
+    """``score_df`` of one stored attempt, with id columns in front."""
+    exam_id = state["selected_exam"]
+    score_df, _ = grade_state(bank_for(state), state, kind)
+    finished_at = float(state.get("exam_finished_at") or 0)
+    ids = {
+        "student": user,
+        "exam_id": exam_id,
+        "kind": kind,
+        "attempt_id": attempt_id(user, state, kind),
+        "finished_at": dt.datetime.fromtimestamp(finished_at, dt.timezone.utc).isoformat() if finished_at else "",
+    }
+    for i, (col, value) in enumerate(ids.items()):
+        score_df.insert(i, col, value)
+    return score_df
+
+
+class PartitionWriter:
+    """Writes chunks under <root>/exam_id=../date=../part-<run>-<n>.<fmt>."""
+
+    def __init__(self, root: str, fmt: str, run_id: str):
+        self.root, self.fmt, self.run_id = root, fmt, run_id
+        self.files: list[str] = []
+        self.rows = 0
+
+    def write(self, frames: list[pd.DataFrame]):
+        chunk = pd.concat(frames, ignore_index=True)
+        chunk["_date"] = chunk["finished_at"].str[:10].replace("", "unfinished")
+        for (exam_id, date), part in chunk.groupby(["exam_id", "_date"], sort=False):
+            folder = os.path.join(self.root, f"exam_id={exam_id}", f"date={date}")
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"part-{self.run_id}-{len(self.files):05d}.{self.fmt}")
+            part = part.drop(columns="_date")
+            if self.fmt == "parquet":
+                part.to_parquet(path, index=False)
+            else:
+                part.to_csv(path, index=False)
+            self.files.append(path)
+            self.rows += len(part)
+
+
+def export(out: str, fmt: str = "parquet", chunk: int = 500, full: bool = False,
+           include_unfinished: bool = False) -> dict:
+    """Export attempts stored after the last run's watermark; returns run stats."""
+    state_path = os.path.join(out, STATE_FILE)
+    watermark, exported = 0.0, {}
+    if not full and os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        watermark, exported = float(saved.get("watermark", 0.0)), saved.get("exported", {})
+
+    # Files go to a staging folder and are moved into place only when the run
+    # completes, so a crashed run leaves no half export behind the watermark.
+    run_id = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    staging = os.path.join(out, "_staging", run_id)
+    writer = PartitionWriter(staging, fmt, run_id)
+
+    started = time.time()  # the next watermark: anything written from here on is the next run's
+    since = max(0.0, watermark - OVERLAP_SEC) if watermark else 0.0
+    frames, attempts, skipped, unchanged = [], 0, 0, 0
+    for user, kind, state, _ in state_store.iter_attempts(since=since):
+        if not state.get("selected_exam") or not (state.get("finished_all") or include_unfinished):
+            skipped += 1
+            continue
+        key = state_store.attempt_key(user, state["selected_exam"], kind)
+        aid = attempt_id(user, state, kind)
+        if exported.get(key) == aid:
+            unchanged += 1
+            continue
+        exported[key] = aid
+        frames.append(attempt_rows(user, kind, state))
+        attempts += 1
+        if len(frames) >= chunk:
+            writer.write(frames)
+            frames = []
+    if frames:
+        writer.write(frames)
+
+    for path in writer.files:
+        final = os.path.join(out, os.path.relpath(path, staging))
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(path, final)
+    shutil.rmtree(os.path.join(out, "_staging"), ignore_errors=True)
+
+    with open(f"{state_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"watermark": started, "last_run": run_id, "exported": exported}, f)
+    os.replace(f"{state_path}.tmp", state_path)
+    return {"run": run_id, "attempts": attempts, "skipped": skipped, "unchanged": unchanged,
+            "rows": writer.rows, "files": len(writer.files)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="export root folder")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--chunk", type=int, default=500, help="attempts per written chunk")
+    parser.add_argument("--full", action="store_true", help="ignore the watermark and export everything")
+    parser.add_argument("--include-unfinished", action="store_true")
+    parser.add_argument("--nice", type=int, default=10, help="lower this process's CPU priority by this much")
+    args = parser.parse_args(argv)
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401  (optional dependency, only needed for Parquet)
+        except ImportError:
+            print("Parquet export needs pyarrow (pip install pyarrow), or use --format csv")
+            return 1
+    if args.nice and hasattr(os, "nice"):
+        os.nice(args.nice)
+
+    os.makedirs(args.out, exist_ok=True)
+    t0 = time.perf_counter()
+    stats = export(args.out, args.format, args.chunk, args.full, args.include_unfinished)
+    print(
+        f"{stats['attempts']} attempt(s), {stats['rows']} row(s) in {stats['files']} file(s) "
+        f"({stats['skipped']} unfinished skipped, {stats['unchanged']} already exported) "
+        f"in {time.perf_counter() - t0:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
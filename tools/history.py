@@ -0,0 +1,44 @@
+"""Backfill attempt history from finished attempts already in the state store.
+
+Attempts are recorded into history as they finish; this covers attempts
+finished before history existed (or while its writer was down). Recording
+is idempotent per attempt, so it is safe to run again:
+
+    python -m tools.history
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core import state_store  # noqa: E402
+from core.catalog import get_entry  # noqa: E402
+from core.history import get_history, summarize  # noqa: E402
+from core.index import DRILL_TITLE  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    store = get_history()
+    added = seen = 0
+    for user, kind, state, _ in state_store.iter_attempts():
+        if not state.get("finished_all") or not state.get("selected_exam"):
+            continue
+        seen += 1
+        title = get_entry(state["selected_exam"]).title
+        if kind == "drill":
+            title = f"{DRILL_TITLE} • {title}"
+        added += store.record(summarize(user, state, kind, title))
+    print(f"{added} of {seen} finished attempt(s) added in {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
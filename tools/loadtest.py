@@ -0,0 +1,363 @@
+"""Drive the real portal pages with N simulated students.
+
+Each student gets its own Streamlit ``AppTest`` session and walks the full
+flow: login -> dashboard -> four timed modules (with the break) -> score
+report. Sheets are served from a local CSV stand-in (see
+``core.sheets.LocalSheetsConnection``) so no Google quota is touched.
+
+    python -m tools.loadtest --students 25 --speedup 400
+
+Attempts, history, progress, snapshots and reports go to a temp dir for the
+run (SQLite there unless --state-backend names another SAT_STATE_BACKEND).
+
+Think times are drawn from a log-normal around ``--think`` seconds and then
+divided by ``--speedup`` so a full exam finishes in a reasonable time.
+
+AppTest shares one fake runtime per process, so script runs are serialized
+behind a lock. That mirrors a real server closely enough (reruns are
+GIL-bound Python) and lets us report two numbers per rerun: *latency*, what
+the student waits including queueing behind other students, and *service*,
+the time the rerun itself took. CPU is measured inside the lock, so it is
+attributed to the session that spent it.
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.backends import STATE_BACKEND_ENV  # noqa: E402
+from core.catalog import CATALOG_ENV  # noqa: E402
+from core.reports import REPORT_DIR_ENV  # noqa: E402
+from core.sheets import LOCAL_SHEETS_ENV  # noqa: E402
+from core.state_store import ENGINE_KEYS  # noqa: E402
+from tools.synthetic import make_question_bank, make_users, write_local_sheets, write_routed_manifest  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "SAT app.py")
+
+# Keys that make up one student's session state (what a session costs us).
+SESSION_KEYS = ["authenticated", "user_name"] + ENGINE_KEYS
+
+
+_RUN_LOCK = threading.Lock()
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def isolate(run_dir: str, state_backend: str | None = None):
+    """Send this run's attempts, history, progress, snapshots and reports to ``run_dir``.
+
+    Simulated students must never land in the real .state/ and .reports/.
+    """
+    os.environ[STATE_BACKEND_ENV] = state_backend or f"sqlite:///{os.path.join(run_dir, 'state.sqlite3')}"
+    os.environ[REPORT_DIR_ENV] = os.path.join(run_dir, "reports")
+
+
+class SimulatedStudent:
+    """One browser session; every interaction is a timed rerun of the real page."""
+
+    def __init__(self, username: str, password: str, timeout: float = 30.0):
+        from streamlit.testing.v1 import AppTest
+
+        self.username = username
+        self.password = password
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.samples: list[tuple[str, float, float]] = []  # (kind, latency, service)
+        self.cpu_sec = 0.0
+
+    # ---- plumbing ----
+    def run(self, kind: str):
+        queued = time.perf_counter()
+        with _RUN_LOCK:
+            started, cpu = time.perf_counter(), time.process_time()
+            self.at.run()
+            done = time.perf_counter()
+            self.cpu_sec += time.process_time() - cpu
+        self.samples.append((kind, done - queued, done - started))
+        if self.at.exception:
+            raise RuntimeError(f"{self.username}: {kind} raised {self.at.exception[0].message}")
+
+    def state(self, key, default=None):
+        try:
+            return self.at.session_state[key]
+        except KeyError:
+            return default
+
+    def click(self, kind: str, label: str | None = None, key: str | None = None):
+        if key is not None:
+            button = self.at.button(key=key)
+        else:
+            matches = [b for b in self.at.button if b.label.startswith(label)]
+            if not matches:
+                raise RuntimeError(f"{self.username}: no '{label}' button during {kind}")
+            button = matches[0]
+        button.click()
+        self.run(kind)
+
+    def state_bytes(self) -> int:
+        snapshot = {k: self.state(k) for k in SESSION_KEYS}
+        return len(pickle.dumps(snapshot))
+
+    # ---- flow ----
+    def login(self):
+        self.run("open")
+        self.at.text_input(key="login_user").input(self.username)
+        self.at.text_input(key="login_pw").input(self.password)
+        self.click("login", label="Log In")
+
+    def start_exam(self, exam_id: str = "sat_mock_v1"):
+        self.click("start", key=f"start_{exam_id}")
+        self.wait_for_admission()
+
+    def wait_for_admission(self, poll_sec: float = 0.5):
+        # in the waiting room until the module timer has been started
+        while self.state("end_time") is None:
+            time.sleep(poll_sec)
+            self.run("wait")
+
+    def module_size(self) -> int:
+        return int((self.state("_progress_last") or {}).get("total", 0))
+
+    def click_grid(self, key: str, q_index: int):
+        # the grid is a browser-side component: a click is its value arriving on the next run
+        self.at.session_state[key] = {"index": q_index, "nonce": f"{time.time()}-{q_index}"}
+        self.run("navigate")
+
+    def answer_current(self, rng: random.Random):
+        if len(self.at.radio):
+            radio = self.at.radio[0]
+            radio.set_value(rng.choice(radio.options))
+            self.run("answer")
+        elif len(self.at.text_input):
+            self.at.text_input[0].input(str(rng.randint(1, 40)))
+            self.run("answer")
+
+    def set_answer(self, value: str | None):
+        if len(self.at.radio):
+            radio = self.at.radio[0]
+            matches = [o for o in radio.options if value and o.startswith(f"{value})")]
+            if not matches:
+                return
+            radio.set_value(matches[0])
+        elif len(self.at.text_input):
+            self.at.text_input[0].input(value or "")
+        else:
+            return
+        self.run("answer")
+
+    def toggle_flag(self):
+        box = self.at.checkbox[0]
+        box.set_value(not box.value)
+        self.run("flag")
+
+    def set_flag(self, on: bool):
+        if len(self.at.checkbox) and self.at.checkbox[0].value != on:
+            self.toggle_flag()
+
+    def goto(self, q_index: int):
+        self.click_grid(f"navgrid_{self.state('module_step')}", q_index)
+
+    def goto_from_review(self, q_index: int):
+        self.click_grid(f"revgrid_{self.state('module_step')}", q_index)
+
+    def next(self):
+        self.click("next", label="Next")
+
+    def back(self):
+        self.click("back", label="⬅️ Back")
+
+    def expire_module_timer(self):
+        self.at.session_state["end_time"] = time.time() - 1
+        self.run("timeout")
+
+    def open_review(self):
+        self.click("review", key="goto_rev")
+
+    def next_to_review(self):
+        self.click("review", label="Review Module")
+
+    def submit_module(self):
+        self.click("submit", label="Submit Module")
+
+    def resume_from_break(self):
+        self.click("resume", label="Resume Testing Now")
+
+
+def simulate(student: SimulatedStudent, rng: random.Random, think: float, speedup: float,
+             change_rate: float, flag_rate: float):
+    def pause():
+        time.sleep(rng.lognormvariate(0, 0.5) * think / speedup)
+
+    student.login()
+    pause()
+    student.start_exam()
+    while not student.state("finished_all", False):
+        if student.state("on_break", False):
+            pause()
+            student.resume_from_break()
+            continue
+
+        size = student.module_size()
+        for q in range(size):
+            pause()
+            student.answer_current(rng)
+            if rng.random() < flag_rate:
+                student.toggle_flag()
+            if q < size - 1:
+                student.next()
+
+        # second pass: revisit a few questions and change the answer
+        for q in rng.sample(range(size), k=int(size * change_rate)):
+            pause()
+            student.goto(q)
+            student.answer_current(rng)
+
+        student.open_review()
+        pause()
+        student.submit_module()
+
+
+def run_concurrently(students: list[SimulatedStudent], target) -> tuple[list[str], float, float]:
+    """Run ``target(i, student)`` for every student on its own thread; returns (errors, cpu, wall)."""
+    errors: list[str] = []
+
+    def worker(i: int, student: SimulatedStudent):
+        try:
+            target(i, student)
+        except Exception as e:  # keep the other students running
+            errors.append(str(e))
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i, s), daemon=True) for i, s in enumerate(students)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors, time.process_time() - cpu0, time.perf_counter() - wall0
+
+
+def summarize(students: list[SimulatedStudent], errors: list[str], cpu: float, wall: float) -> dict:
+    latency, service = defaultdict(list), defaultdict(list)
+    for s in students:
+        for kind, lat, svc in s.samples:
+            latency[kind].append(lat)
+            latency["ALL"].append(lat)
+            service[kind].append(svc)
+            service["ALL"].append(svc)
+
+    kinds = sorted((k for k in latency if k != "ALL"), key=lambda k: -len(latency[k])) + ["ALL"]
+    session_cpu = [s.cpu_sec for s in students] or [0.0]
+    state_sizes = [s.state_bytes() for s in students] or [0]
+    return {
+        "students": len(students),
+        "finished": sum(1 for s in students if s.state("finished_all", False)),
+        "errors": errors,
+        "wall_sec": round(wall, 3),
+        "cpu_sec": round(cpu, 3),
+        "reruns": {
+            kind: {
+                "n": len(latency[kind]),
+                **{f"p{p}_ms": round(percentile(latency[kind], p) * 1000, 2) for p in (50, 90, 95, 99, 100)},
+                "svc_p50_ms": round(percentile(service[kind], 50) * 1000, 2),
+                "svc_p99_ms": round(percentile(service[kind], 99) * 1000, 2),
+            }
+            for kind in kinds
+        },
+        "session_cpu_mean_sec": round(statistics.mean(session_cpu), 4),
+        "session_cpu_max_sec": round(max(session_cpu), 4),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "state_kb_mean": round(statistics.mean(state_sizes) / 1024, 2),
+        "state_kb_max": round(max(state_sizes) / 1024, 2),
+    }
+
+
+def print_summary(summary: dict):
+    print(
+        f"students: {summary['students']}  finished: {summary['finished']}  "
+        f"errors: {len(summary['errors'])}  wall: {summary['wall_sec']:.1f}s"
+    )
+    print(f"{'rerun':<10}{'n':>6}{'p50 ms':>9}{'p90 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'svc p50':>9}{'svc p99':>9}")
+    for kind, row in summary["reruns"].items():
+        print(
+            f"{kind:<10}{row['n']:>6}"
+            + "".join(f"{row[f'p{p}_ms']:>9.1f}" for p in (50, 90, 95, 99, 100))
+            + f"{row['svc_p50_ms']:>9.1f}{row['svc_p99_ms']:>9.1f}"
+        )
+    print(
+        f"cpu per session: mean {summary['session_cpu_mean_sec']:.2f}s, max {summary['session_cpu_max_sec']:.2f}s "
+        f"({summary['cpu_sec']:.2f}s process total over {summary['wall_sec']:.1f}s wall)"
+    )
+    print(f"memory: peak RSS {summary['peak_rss_mb']:.0f} MB for {summary['students']} sessions")
+    print(f"session state: mean {summary['state_kb_mean']:.1f} KB, max {summary['state_kb_max']:.1f} KB")
+    for e in summary["errors"][:5]:
+        print(f"error: {e}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=10)
+    parser.add_argument("--think", type=float, default=40.0, help="median think time per step, seconds")
+    parser.add_argument("--speedup", type=float, default=200.0, help="divide think times by this factor")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which students arrive")
+    parser.add_argument("--change-rate", type=float, default=0.15, help="share of answers changed on a second pass")
+    parser.add_argument("--flag-rate", type=float, default=0.05)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply synthetic module sizes")
+    parser.add_argument("--sheets", help="existing local sheets folder (default: synthetic data in a temp dir)")
+    parser.add_argument("--routed", action="store_true", help="synthetic bank with adaptive Module 2 forms")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--state-backend", help="SAT_STATE_BACKEND for the run (default: SQLite in a temp dir)")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args(argv)
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    run_dir = tempfile.mkdtemp(prefix="sat-load-")
+    isolate(run_dir, args.state_backend)
+    if args.sheets:
+        sheets_dir = args.sheets
+    else:
+        sheets_dir = write_local_sheets(
+            run_dir,
+            make_question_bank(scale=args.scale, routed=args.routed),
+            make_users(args.students),
+        )
+        if args.routed:
+            os.environ[CATALOG_ENV] = write_routed_manifest(os.path.join(sheets_dir, "exams.json"))
+    os.environ[LOCAL_SHEETS_ENV] = sheets_dir
+
+    students = [SimulatedStudent(f"student{i}", f"pw{i}") for i in range(args.students)]
+
+    def target(i: int, student: SimulatedStudent):
+        rng = random.Random(args.seed * 1000 + i)
+        if args.ramp:
+            time.sleep(rng.uniform(0, args.ramp))
+        simulate(student, rng, args.think, args.speedup, args.change_rate, args.flag_rate)
+
+    errors, cpu, wall = run_concurrently(students, target)
+    summary = summarize(students, errors, cpu, wall)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
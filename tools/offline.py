@@ -0,0 +1,168 @@
+"""Build offline exam packages, and sync results queued at offline centers.
+
+    python -m tools.offline build --out packages/                    # every catalog exam
+    python -m tools.offline build --out packages/ --exam sat_mock_v1 --with-roster
+    python -m tools.offline sync --packages packages/ outbox.jsonl [more.jsonl ...]
+
+``build`` runs online: it reads each exam's bank, compiles its answer keys
+and downloads its images (assets/images/ files come from the local asset
+build) into packages/<exam>-<version>.satpkg. A center then runs the app
+with SAT_OFFLINE_PACKAGES=packages/ and no network.
+
+``sync`` replays outbox files copied back from a center into this
+process's state store and attempt history:
+
+    python -m tools.offline sync --packages packages/ outbox.jsonl
+
+Each queued result names the package it was taken on. That package's bank
+is recorded as a bank snapshot and the attempt is pinned to it, so history,
+the score page and exports grade exactly the questions the student saw,
+however the live sheet has changed since. Results whose package is not in
+--packages are reported and left out. Replays are idempotent, so a file can
+be synced twice.
+"""
+import argparse
+import mimetypes
+import os
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core import assets, offline, snapshots, state_store  # noqa: E402
+from core.bank import get_bank  # noqa: E402
+from core.catalog import get_entry, load_catalog  # noqa: E402
+from core.history import get_history, summarize  # noqa: E402
+from core.questions import source_image_url  # noqa: E402
+
+FETCH_TIMEOUT_SEC = 20
+
+
+def fetch_image(url: str) -> tuple[bytes, str]:
+    """Image bytes and MIME type: the local asset build when there is one, else a download."""
+    name = assets.source_name(url)
+    built = assets.load_manifest().get(name) if name else None
+    if built:
+        path = os.path.join(assets.BUILD_DIR, built["webp"][0])
+        with open(path, "rb") as f:
+            return f.read(), "image/webp"
+    if name and os.path.exists(os.path.join(assets.SOURCE_DIR, name)):
+        path = os.path.join(assets.SOURCE_DIR, name)
+        with open(path, "rb") as f:
+            return f.read(), mimetypes.guess_type(path)[0] or "image/png"
+    with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT_SEC) as resp:
+        return resp.read(), resp.headers.get_content_type()
+
+
+def build(out: str, exam_ids: list[str], with_roster: bool) -> int:
+    os.makedirs(out, exist_ok=True)
+    roster = None
+    if with_roster:
+        from core.users import load_users_index
+
+        roster = load_users_index()
+    for exam_id in exam_ids:
+        entry = load_catalog()[exam_id]
+        bank = get_bank(exam_id)
+        labels = set(bank.forms) | set(entry.forms.values())
+        labels |= {label for rule in entry.routing.values() for label in (rule["easier"], rule["harder"])}
+        answer_keys = {label: bank.form_answer_key(label) for label in sorted(labels)}
+
+        images, missing = {}, []
+        if "Image_URL" in bank.df.columns:
+            for cell in bank.df["Image_URL"].dropna().unique():
+                url = source_image_url({"Image_URL": cell})
+                if not url:
+                    continue
+                try:
+                    images[cell] = fetch_image(url)
+                except OSError as e:
+                    missing.append(f"{url} ({e})")
+
+        tmp = os.path.join(out, f"{exam_id}.building{offline.EXTENSION}")
+        version = offline.write_package(tmp, entry, bank.df, answer_keys, images, roster)
+        path = os.path.join(out, f"{exam_id}-{version}{offline.EXTENSION}")
+        os.replace(tmp, path)
+        size = os.path.getsize(path) / 1024
+        print(f"{exam_id}: {len(bank.df)} questions, {len(answer_keys)} forms, {len(images)} images -> {path} ({size:.0f} KB)")
+        for m in missing:
+            print(f"  image not packaged (will not show offline): {m}")
+    return 0
+
+
+def sync(paths: list[str], package_dir: str) -> int:
+    by_version = {}
+    for path in offline.package_paths(package_dir):
+        pkg = offline.Package(path)
+        by_version[pkg.version] = pkg
+    banks: dict[str, offline.PackagedBank] = {}
+    store, history = state_store.get_store(), get_history()
+    added = stored = total = 0
+    skipped = []
+    for path in paths:
+        for item in offline.read_outbox(path):
+            total += 1
+            who = f"{item['user']} / {item['exam_id']}"
+            pkg = by_version.get(item.get("package_version"))
+            if pkg is None or pkg.entry.id != item["exam_id"]:
+                skipped.append(f"{who}: package {item.get('package_version')} not in {package_dir}")
+                continue
+            if pkg.version not in banks:
+                banks[pkg.version] = offline.PackagedBank(pkg)
+            bank = banks[pkg.version]
+            state = state_store.decode_state(item["state"])
+            if state.get("bank_version", bank.version) != bank.version:
+                skipped.append(f"{who}: taken on bank {state['bank_version']}, package holds {bank.version}")
+                continue
+
+            entry = get_entry(item["exam_id"])
+            snapshots.record(entry, bank)
+            state["selected_exam"] = item["exam_id"]
+            state["bank_version"] = bank.version
+            added += history.record(summarize(item["user"], state, item["kind"], item.get("title", "")))
+            key = state_store.attempt_key(item["user"], item["exam_id"], item["kind"])
+            current = store.get(key)
+            if current is None or float(current[1].get("exam_finished_at") or 0) < float(state.get("exam_finished_at") or 0):
+                if current is not None:
+                    snapshots.release_attempt(current[1])
+                store.put(key, state_store.encode_state(state))
+                snapshots.pin(entry, bank)
+                stored += 1
+    print(f"{total} queued result(s): {added} new in history, {stored} written to the state store")
+    for line in skipped:
+        print(f"  not synced: {line}")
+    return 1 if skipped else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="write one package per exam")
+    b.add_argument("--out", required=True)
+    b.add_argument("--exam", action="append", help="exam id (repeatable; default: every catalog exam)")
+    b.add_argument("--with-roster", action="store_true", help="include usernames/passwords so logins work offline")
+    s = sub.add_parser("sync", help="replay outbox files into the state store and history")
+    s.add_argument("--packages", required=True, help="folder with the packages the results were taken on")
+    s.add_argument("outbox", nargs="+")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if args.cmd == "build":
+        if offline.enabled():
+            print(f"unset {offline.PACKAGES_ENV} to build packages from the live sources")
+            return 1
+        code = build(args.out, args.exam or list(load_catalog()), args.with_roster)
+    else:
+        if offline.enabled():
+            print(f"unset {offline.PACKAGES_ENV} to sync into the central store")
+            return 1
+        code = sync(args.outbox, args.packages)
+    print(f"done in {time.perf_counter() - t0:.1f}s")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""Rebuild the cohort pacing table the exam header compares students against.
+
+For every form with finished attempts in the state store it records the
+25th/50th/75th-percentile time spent per question, as cumulative sums so
+the page needs a single lookup per timer tick:
+
+    python -m tools.pacing                       # writes .state/pacing.json (or $SAT_PACING)
+    python -m tools.pacing --out pacing.json
+
+Run it after a cohort finishes (or nightly); forms without a table fall back
+to even pacing across the module.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core import state_store  # noqa: E402
+from core.pacing import build_pacing, write_pacing  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", help="pacing file (default: $SAT_PACING or .state/pacing.json)")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    tables = build_pacing(state_store.iter_attempts())
+    path = write_pacing(tables, args.out)
+    print(f"{len(tables)} form(s) -> {path} in {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
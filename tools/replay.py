@@ -0,0 +1,144 @@
+"""Replay recorded exam sessions against a local test server.
+
+Traces come from running the app with ``SAT_TRACE_DIR`` set (see
+``core/trace.py``). Every trace is replayed as its own simulated student,
+all of them concurrently, with the recorded gaps divided by ``--speedup``:
+
+    python -m tools.replay traces/*.jsonl --speedup 50 --json release.json
+    python -m tools.replay traces/*.jsonl --speedup 50 --compare release.json
+
+``--compare`` prints latency/memory deltas against an earlier run so two
+releases can be measured on the same real workload. Like the load test, a
+replay keeps its attempts and reports in a temp dir (--state-backend to
+pick another SAT_STATE_BACKEND).
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from core.sheets import LOCAL_SHEETS_ENV  # noqa: E402
+from core.trace import TRACE_DIR_ENV, load_trace  # noqa: E402
+from tools.loadtest import SimulatedStudent, isolate, print_summary, run_concurrently, summarize  # noqa: E402
+from tools.synthetic import make_question_bank, make_users, write_local_sheets  # noqa: E402
+
+
+def replay(student: SimulatedStudent, header: dict, events: list[list], speedup: float):
+    """Feed one trace through the real pages, preserving the recorded widget paths."""
+    student.login()
+    student.start_exam(header.get("exam", "sat_mock_v1"))
+
+    last_ms = 0
+    for dt_ms, kind, *args in events:
+        time.sleep(max(0, dt_ms - last_ms) / 1000 / speedup)
+        last_ms = dt_ms
+
+        if kind == "answer":
+            student.set_answer(args[1])
+        elif kind == "flag":
+            student.set_flag(bool(args[1]))
+        elif kind == "goto":
+            q, via = args[0], args[1]
+            if via == "next":
+                student.next()
+            elif via == "back":
+                student.back()
+            elif via == "review":
+                student.goto_from_review(q)
+            else:
+                student.goto(q)
+        elif kind == "review":
+            if args and args[0] == "next":
+                student.next_to_review()
+            else:
+                student.open_review()
+        elif kind == "timeout":
+            student.expire_module_timer()
+        elif kind == "submit":
+            student.submit_module()
+        elif kind == "resume":
+            student.resume_from_break()
+        elif kind == "leave":
+            break
+
+
+def compare(current: dict, baseline: dict):
+    print(f"\n{'rerun':<10}{'p50 ms':>16}{'p95 ms':>16}{'p99 ms':>16}")
+    for kind, row in current["reruns"].items():
+        old = baseline.get("reruns", {}).get(kind)
+        if not old:
+            continue
+        cells = []
+        for p in (50, 95, 99):
+            new_v, old_v = row[f"p{p}_ms"], old[f"p{p}_ms"]
+            change = (new_v - old_v) / old_v * 100 if old_v else 0.0
+            cells.append(f"{new_v:>8.1f} ({change:+5.1f}%)")
+        print(f"{kind:<10}" + "".join(f"{c:>16}" for c in cells))
+    for key, label in (("peak_rss_mb", "peak RSS MB"), ("state_kb_mean", "state KB"), ("session_cpu_mean_sec", "cpu/session s")):
+        print(f"{label}: {baseline.get(key)} -> {current.get(key)}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="+", help="trace files or glob patterns")
+    parser.add_argument("--speedup", type=float, default=50.0, help="divide recorded gaps by this factor")
+    parser.add_argument("--sheets", help="local sheets folder holding the bank the traces were recorded on")
+    parser.add_argument("--json", help="write the summary to this file")
+    parser.add_argument("--compare", help="summary JSON from an earlier run to diff against")
+    parser.add_argument("--state-backend", help="SAT_STATE_BACKEND for the run (default: SQLite in a temp dir)")
+    args = parser.parse_args(argv)
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    paths = sorted({p for pattern in args.traces for p in glob.glob(pattern)})
+    if not paths:
+        print("no trace files matched")
+        return 1
+    traces = [load_trace(p) for p in paths]
+
+    run_dir = tempfile.mkdtemp(prefix="sat-replay-")
+    isolate(run_dir, args.state_backend)
+    os.environ.pop(TRACE_DIR_ENV, None)  # replayed sessions are not new traces
+    if args.sheets:
+        sheets_dir = args.sheets
+    else:
+        # Size the synthetic bank so every recorded q_index exists.
+        largest = max((int(v) for header, _ in traces for v in header.get("sizes", {}).values()), default=27)
+        sheets_dir = write_local_sheets(
+            run_dir,
+            make_question_bank(scale=max(1.0, largest / 22)),
+            make_users(len(traces)),
+        )
+    os.environ[LOCAL_SHEETS_ENV] = sheets_dir
+
+    students = [SimulatedStudent(f"student{i}", f"pw{i}") for i in range(len(traces))]
+
+    def target(i: int, student: SimulatedStudent):
+        header, events = traces[i]
+        time.sleep(random.Random(i).uniform(0, 0.5))
+        replay(student, header, events, args.speedup)
+
+    errors, cpu, wall = run_concurrently(students, target)
+    summary = summarize(students, errors, cpu, wall)
+    summary["traces"] = [os.path.basename(p) for p in paths]
+    print_summary(summary)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(summary, json.load(f))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Start the portal and preload exam data before reporting ready.
+
+    python -m tools.serve --port 8501 --ready-file /tmp/sat.ready
+
+The Streamlit server starts as usual; as soon as its runtime exists, every
+exam bank, answer key, image map and the users index are loaded into the
+server's caches. Only then is "READY" printed and the ready file written,
+so the proctor (or a deploy script polling the file) knows it is safe to
+let students in.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+APP_PATH = os.path.join(ROOT, "SAT app.py")
+
+
+def warm_when_runtime_is_up():
+    from streamlit.runtime import Runtime
+
+    from core import warmup
+
+    while not Runtime.exists():
+        time.sleep(0.05)
+    started = time.perf_counter()
+    warmup.start_in_background().join()
+    if warmup.is_ready():
+        print(f"READY in {time.perf_counter() - started:.1f}s {warmup.timings}", flush=True)
+    else:
+        print("warm start failed; serving with lazy loading", flush=True)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--ready-file", help="file to write once the caches are warm")
+    args = parser.parse_args(argv)
+
+    from streamlit.web import bootstrap
+
+    from core.warmup import READY_FILE_ENV
+
+    if args.ready_file:
+        os.environ[READY_FILE_ENV] = args.ready_file
+
+    flag_options = {"server.port": args.port, "server.headless": True}
+    bootstrap.load_config_options(flag_options=flag_options)
+    threading.Thread(target=warm_when_runtime_is_up, name="sat-warmup-wait", daemon=True).start()
+    bootstrap.run(APP_PATH, False, [], flag_options)
+
+
+if __name__ == "__main__":
+    main()
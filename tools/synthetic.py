@@ -0,0 +1,136 @@
+"""Synthetic question banks and users for load tests and local development."""
+import json
+import os
+import random
+
+import pandas as pd
+
+from core.sheets import DEFAULT_WORKSHEET
+
+MODULE_SIZES = {
+    "Session 1 Module 1": 27,
+    "Session 1 Module 2": 27,
+    "Session 2 Module 1": 22,
+    "Session 2 Module 2": 22,
+}
+
+# Extra forms for adaptive runs: Module 2 of each section in two difficulties.
+ROUTED_FORMS = {
+    2: ("Session 1 Module 2 Easier", "Session 1 Module 2 Harder"),
+    4: ("Session 2 Module 2 Easier", "Session 2 Module 2 Harder"),
+}
+
+# Blueprint tags, as College Board names them.
+DOMAINS = {
+    "Reading and Writing": {
+        "Information and Ideas": ["Central ideas and details", "Command of evidence", "Inferences"],
+        "Craft and Structure": ["Words in context", "Text structure and purpose", "Cross-text connections"],
+        "Expression of Ideas": ["Rhetorical synthesis", "Transitions"],
+        "Standard English Conventions": ["Boundaries", "Form, structure, and sense"],
+    },
+    "Math": {
+        "Algebra": ["Linear equations in one variable", "Linear functions", "Systems of linear equations"],
+        "Advanced Math": ["Nonlinear functions", "Equivalent expressions"],
+        "Problem-Solving and Data Analysis": ["Ratios, rates, and proportions", "Percentages", "Probability"],
+        "Geometry and Trigonometry": ["Area and volume", "Right triangles and trigonometry", "Circles"],
+    },
+}
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+SAMPLE_IMAGES = [
+    "https://github.com/primeivy/SAT/blob/main/assets/images/Math%201-9.png?raw=true",
+    "https://github.com/primeivy/SAT/blob/main/assets/images/Reading%20Module%202-10.png?raw=true",
+    "https://drive.google.com/file/d/1AbCdEfGhIjKlMnOpQrStUvWxYz012345/view?usp=sharing",
+]
+
+
+def make_question_bank(
+    scale: float = 1.0, seed: int = 7, image_rate: float = 0.15, table_rate: float = 0.1, routed: bool = False
+) -> pd.DataFrame:
+    """Build a sheet-shaped question bank; ``scale`` multiplies the per-module counts.
+
+    With ``routed`` the bank also holds the easier/harder Module 2 forms.
+    """
+    rng = random.Random(seed)
+    rows = []
+    sizes = dict(MODULE_SIZES)
+    if routed:
+        for module_step, labels in ROUTED_FORMS.items():
+            base = MODULE_SIZES[list(MODULE_SIZES)[module_step - 1]]
+            sizes.update({label: base for label in labels})
+    for session, size in sizes.items():
+        math = session.startswith("Session 2")
+        domains = DOMAINS["Math" if math else "Reading and Writing"]
+        for i in range(max(1, int(size * scale))):
+            spr = math and rng.random() < 0.25
+            domain = rng.choice(list(domains))
+            rows.append(
+                {
+                    "Session": session,
+                    "Question_Type": "SPR" if spr else "MCQ",
+                    "Content": " ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, 160))),
+                    "Prompt": f"Which choice best answers question {i + 1}?",
+                    "Option_A": "first choice",
+                    "Option_B": "second choice",
+                    "Option_C": "third choice",
+                    "Option_D": "fourth choice",
+                    "Correct_Answer": str(rng.randint(1, 40)) if spr else rng.choice("ABCD"),
+                    "Image_URL": rng.choice(SAMPLE_IMAGES) if rng.random() < image_rate else "",
+                    "Table_Data": "x,y;1,3;2,5;3,7" if rng.random() < table_rate else None,
+                    "Domain": domain,
+                    "Skill": rng.choice(domains[domain]),
+                    "Difficulty": rng.choice(DIFFICULTIES),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def make_cohort(bank: pd.DataFrame, n: int, seed: int = 11, answer_rate: float = 0.9) -> list[tuple[dict, dict]]:
+    """Random attempts on ``bank`` as (responses, question_times) pairs, keyed like exam.py."""
+    rng = random.Random(seed)
+    sizes = bank["Session"].value_counts().to_dict()
+    attempts = []
+    for _ in range(n):
+        responses, times = {}, {}
+        for module_step, session in enumerate(MODULE_SIZES, start=1):
+            for q in range(sizes.get(session, 0)):
+                times[(module_step, q)] = rng.lognormvariate(3.5, 0.6)
+                if rng.random() < answer_rate:
+                    spr = session.startswith("Session 2") and rng.random() < 0.25
+                    value = str(rng.randint(1, 40)) if spr else rng.choice(["A", "B", "C", "D", "b)", " C. "])
+                    responses[(module_step, q)] = {"type": "SPR" if spr else "MCQ", "value": value}
+        attempts.append((responses, times))
+    return attempts
+
+
+def write_routed_manifest(path: str, threshold: float = 0.6) -> str:
+    """Catalog manifest with one adaptive exam over a ``routed`` bank."""
+    routing = {
+        str(step): {"easier": easier, "harder": harder, "threshold": threshold}
+        for step, (easier, harder) in ROUTED_FORMS.items()
+    }
+    exam = {"id": "sat_mock_v1", "title": "SAT Mock Exam (Adaptive)", "routing": routing}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"exams": [exam]}, f, indent=2)
+    return path
+
+
+def make_users(n: int, prefix: str = "student") -> pd.DataFrame:
+    return pd.DataFrame(
+        [{"Username": f"{prefix}{i}", "Password": f"pw{i}"} for i in range(n)]
+    )
+
+
+def write_local_sheets(root: str, bank: pd.DataFrame, users: pd.DataFrame) -> str:
+    """Lay out CSVs the way ``core.sheets.LocalSheetsConnection`` expects them."""
+    os.makedirs(root, exist_ok=True)
+    bank.to_csv(os.path.join(root, f"{DEFAULT_WORKSHEET}.csv"), index=False)
+    users.to_csv(os.path.join(root, "Users.csv"), index=False)
+    return root
+
+
+_WORDS = (
+    "the author argues that evidence from recent studies suggests a model of "
+    "growth rate function value equation graph passage claim data table shows "
+    "researchers observed significant increase decrease whereas although"
+).split()